@@ -20,6 +20,8 @@ CONFIG = {
     'subnet_id': 'subnet-07b5d70ad34e00a01',  # Your subnet ID
     'volume_size_gb': 100,
     'target_concurrency': 50,  # Conservative for 32GB (use 150 with 128GB)
+    'instance_count': 1,  # >1 requires a coordinator (workers lease manifest ranges)
+    'coordinator_url': '',  # e.g. http://10.0.1.5:8765 (python coordinator.py serve)
 }
 
 # Startup script that runs on the instance
@@ -58,9 +60,10 @@ export TARGET_CONCURRENCY={target_concurrency}
 export DATABASE_PATH=/data/scraper_data.db
 export EXPORT_DIR=/data/exports
 export MANIFEST_DIR=/data/manifests
+export COORDINATOR_URL={coordinator_url}
 
 # Start scraper in background with logging
-nohup python3.11 main.py --retailers target \
+nohup python3.11 main.py --retailers target {worker_args} \
     > /var/log/scraper.log 2>&1 &
 
 echo "=== Scraper started! PID: $! ===" | tee -a /var/log/setup.log
@@ -78,6 +81,9 @@ def launch_spot_instance():
     print(f"Max Price: ${CONFIG['max_price']}/hour")
     print(f"Region: {CONFIG['region']}")
     print(f"Target Concurrency: {CONFIG['target_concurrency']}")
+    print(f"Instances: {CONFIG['instance_count']}")
+    if CONFIG['coordinator_url']:
+        print(f"Coordinator: {CONFIG['coordinator_url']}")
     print("=" * 60)
     print()
     
@@ -90,11 +96,22 @@ def launch_spot_instance():
         print("  - ami_id: AMI ID for your region")
         sys.exit(1)
     
+    # Several instances on one manifest only works with lease coordination
+    if CONFIG['instance_count'] > 1 and not CONFIG['coordinator_url']:
+        print("ERROR: Launching more than one instance requires --coordinator")
+        print("  Start one with: python coordinator.py serve --db /data/coordinator.db")
+        print("  Workers must share the manifest (same MANIFEST_DIR contents)")
+        sys.exit(1)
+    
     # Create boto3 client
     ec2 = boto3.client('ec2', region_name=CONFIG['region'])
     
     # Prepare user data script
-    user_data = STARTUP_SCRIPT.format(target_concurrency=CONFIG['target_concurrency'])
+    user_data = STARTUP_SCRIPT.format(
+        target_concurrency=CONFIG['target_concurrency'],
+        coordinator_url=CONFIG['coordinator_url'],
+        worker_args='--worker --skip-enum' if CONFIG['coordinator_url'] else '',
+    )
     user_data_encoded = base64.b64encode(user_data.encode()).decode()
     
     print("Requesting Spot instance...")
@@ -103,7 +120,7 @@ def launch_spot_instance():
         # Request Spot instance
         response = ec2.request_spot_instances(
             SpotPrice=CONFIG['max_price'],
-            InstanceCount=1,
+            InstanceCount=CONFIG['instance_count'],
             Type='one-time',
             LaunchSpecification={
                 'ImageId': CONFIG['ami_id'],
@@ -123,37 +140,45 @@ def launch_spot_instance():
             }
         )
         
-        request_id = response['SpotInstanceRequests'][0]['SpotInstanceRequestId']
-        print(f"✓ Spot request created: {request_id}")
+        request_ids = [r['SpotInstanceRequestId'] for r in response['SpotInstanceRequests']]
+        print(f"✓ Spot requests created: {', '.join(request_ids)}")
         print("Waiting for fulfillment...")
         
         # Wait for fulfillment
+        instance_ids = []
         while True:
             time.sleep(5)
-            status = ec2.describe_spot_instance_requests(
-                SpotInstanceRequestIds=[request_id]
-            )['SpotInstanceRequests'][0]
+            statuses = ec2.describe_spot_instance_requests(
+                SpotInstanceRequestIds=request_ids
+            )['SpotInstanceRequests']
             
-            state = status['State']
-            print(f"  Status: {state}")
+            states = [status['State'] for status in statuses]
+            print(f"  Status: {', '.join(states)}")
             
-            if state == 'active':
-                instance_id = status['InstanceId']
+            for status in statuses:
+                if status['State'] in ['cancelled', 'failed', 'closed']:
+                    print(f"ERROR: Request {status['State']}: {status.get('Status', {}).get('Message', 'Unknown')}")
+                    sys.exit(1)
+            
+            if all(state == 'active' for state in states):
+                instance_ids = [status['InstanceId'] for status in statuses]
                 break
-            elif state in ['cancelled', 'failed', 'closed']:
-                print(f"ERROR: Request {state}: {status.get('Status', {}).get('Message', 'Unknown')}")
-                sys.exit(1)
         
-        print(f"✓ Instance launched: {instance_id}")
-        print("Waiting for instance to be running...")
+        print(f"✓ Instances launched: {', '.join(instance_ids)}")
+        print("Waiting for instances to be running...")
         
         # Wait for running
         waiter = ec2.get_waiter('instance_running')
-        waiter.wait(InstanceIds=[instance_id])
+        waiter.wait(InstanceIds=instance_ids)
         
-        # Get instance details
-        instance = ec2.describe_instances(InstanceIds=[instance_id])['Reservations'][0]['Instances'][0]
+        # Get instance details (first instance shown below, others listed)
+        reservations = ec2.describe_instances(InstanceIds=instance_ids)['Reservations']
+        instances = [inst for reservation in reservations for inst in reservation['Instances']]
+        instance = instances[0]
+        instance_id = instance['InstanceId']
         public_ip = instance.get('PublicIpAddress', 'N/A')
+        for other in instances[1:]:
+            print(f"  Also running: {other['InstanceId']} ({other.get('PublicIpAddress', 'N/A')})")
         
         print()
         print("=" * 60)
@@ -205,11 +230,17 @@ if __name__ == '__main__':
     parser.add_argument('--launch', action='store_true', help='Launch new Spot instance')
     parser.add_argument('--status', help='Check status of instance ID')
     parser.add_argument('--concurrency', type=int, help='Override target concurrency (default: 100)')
+    parser.add_argument('--count', type=int, help='Number of Spot instances to launch (default: 1)')
+    parser.add_argument('--coordinator', help='Coordinator URL; instances run as lease workers')
     
     args = parser.parse_args()
     
     if args.concurrency:
         CONFIG['target_concurrency'] = args.concurrency
+    if args.count:
+        CONFIG['instance_count'] = args.count
+    if args.coordinator:
+        CONFIG['coordinator_url'] = args.coordinator
     
     if args.launch:
         launch_spot_instance()
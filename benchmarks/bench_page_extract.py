@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Browser page read benchmark: one in-page extraction vs. page.content().
+
+Loads each fixture page into headless Chromium (page.set_content, no network)
+and reads it both ways through the real scraper code:
+  - content:  IN_PAGE_EXTRACT off - page.content() (plus Target's selector
+              lookups) shipped over CDP and parsed in Python
+  - evaluate: one page.evaluate() returning only the fields the parser needs
+
+Reports per page: CDP round trips, KB over CDP, ms per read+parse, and whether
+both paths produced the same record (exits 1 if not).
+
+Needs Playwright's Chromium (playwright install chromium).
+
+Usage:
+  python benchmarks/bench_page_extract.py
+  python benchmarks/bench_page_extract.py --repeat 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from common import environment_info, write_results
+from bench_parsers import load_fixture, normalize
+
+# (fixture, retailer, product_id, url)
+PAGES = [
+    ('target_marketplace.html.gz', 'target', '55555555', 'https://www.target.com/p/-/A-55555555'),
+    ('costco_jsonld.html.gz', 'costco', '100012345', 'https://www.costco.com/product.100012345.html'),
+    ('homegoods_jsonld.html.gz', 'homegoods', '3000123456', 'https://www.homegoods.com/us/store/products/3000123456'),
+    ('tjmaxx_jsonld.html.gz', 'tjmaxx', '1000987654', 'https://tjmaxx.tjx.com/store/jump/product/1000987654'),
+]
+
+
+async def read_page(scraper, page, product_url: str, product_id: str):
+    """The page read + parse each scraper does after navigation."""
+    if scraper.retailer_name == 'target':
+        return await scraper._parse_browser_fallback_live(page, product_url, product_id)
+    extracted = await scraper.extract_in_page(page)
+    product = scraper._product_from_json_ld(extracted['json_ld'], product_url, product_id) if extracted else None
+    if product:
+        return product
+    html = await scraper.page_content(page, fallback=extracted is not None)
+    return await scraper.parse_page(html, product_url, product_id)
+
+
+async def run(repeat: int) -> dict:
+    from playwright.async_api import async_playwright
+    from config import CONFIG
+    from scrapers import page_extract, TargetScraper, CostcoScraper, HomeGoodsScraper, TJMaxxScraper
+    
+    classes = {'target': TargetScraper, 'costco': CostcoScraper, 'homegoods': HomeGoodsScraper, 'tjmaxx': TJMaxxScraper}
+    cases = {}
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch(headless=True)
+        except Exception as e:
+            print(f"✗ Could not start Chromium ({e}) - run `playwright install chromium` first")
+            sys.exit(1)
+        page = await browser.new_page()
+        for fixture, retailer, product_id, product_url in PAGES:
+            await page.set_content(load_fixture(fixture).decode('utf-8'))
+            records = {}
+            for mode in ('content', 'evaluate'):
+                config = dict(CONFIG, record_dir=None, replay_base_url=None, in_page_extract=(mode == 'evaluate'))
+                scraper = classes[retailer](config, None, None, None, None)
+                page_extract.PAGE_STATS.update({key: 0 for key in page_extract.PAGE_STATS})
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    records[mode] = await read_page(scraper, page, product_url, product_id)
+                elapsed = time.perf_counter() - start
+                stats = page_extract.PAGE_STATS
+                cases[f'{retailer}:{mode}'] = {
+                    'round_trips_per_page': round(stats['round_trips'] / repeat, 1),
+                    'cdp_kb_per_page': round((stats['evaluate_bytes'] + stats['content_bytes']) / repeat / 1024, 1),
+                    'ms_per_page': round(elapsed / repeat * 1000, 2),
+                }
+            same = normalize(records['content']) == normalize(records['evaluate'])
+            cases[f'{retailer}:evaluate']['same_record'] = same
+        await browser.close()
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-page extraction vs. page.content() benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='Reads per page and mode')
+    args = parser.parse_args()
+    
+    cases = asyncio.run(run(args.repeat))
+    
+    print(f"\n{'page:mode':<22} {'round trips':>12} {'KB over CDP':>12} {'ms/page':>9} {'same':>5}")
+    for name, case in cases.items():
+        same = '' if 'same_record' not in case else ('yes' if case['same_record'] else 'NO')
+        print(f"{name:<22} {case['round_trips_per_page']:>12} {case['cdp_kb_per_page']:>12,.1f} {case['ms_per_page']:>9} {same:>5}")
+    
+    results = {'environment': environment_info(), 'repeat': args.repeat, 'cases': cases}
+    print(f"\n✓ Results written to {write_results('page_extract', results)}")
+    
+    if not all(case.get('same_record', True) for case in cases.values()):
+        print("✗ In-page extraction and page.content() produced different records")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
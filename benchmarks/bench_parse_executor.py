@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Parse executor benchmark: event-loop responsiveness while product pages are parsed.
+
+Parses the Costco / HomeGoods / TJ Maxx fixture pages concurrently through
+ParseExecutor in each mode while a probe task measures how late the event loop
+wakes up (the delay every other in-flight request would see). Reports per mode:
+  - pages/sec
+  - loop lag p50/p99/max
+  - executor queue wait and parse time
+
+Usage:
+  python benchmarks/bench_parse_executor.py
+  python benchmarks/bench_parse_executor.py --pages 400 --workers 8 --html-backend soup
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import environment_info, write_results
+from bench_parsers import load_fixture
+
+PROBE_INTERVAL = 0.005
+
+
+async def loop_lag_probe(samples: list, stop: asyncio.Event):
+    """Sleep in short intervals and record how much later than requested the loop woke us."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - start - PROBE_INTERVAL))
+
+
+async def run_mode(mode: str, pages: int, workers: int, html_backend: str) -> dict:
+    from config import CONFIG
+    from parse_executor import ParseExecutor
+    from scrapers import CostcoScraper, HomeGoodsScraper, TJMaxxScraper
+    from utils import percentile_ms
+    
+    config = dict(CONFIG, html_backend=html_backend, parse_workers=workers)
+    executor = ParseExecutor(config, mode=mode)
+    scrapers = [cls(config, None, None, None, None, executor) for cls in (CostcoScraper, HomeGoodsScraper, TJMaxxScraper)]
+    fixtures = [(scraper, load_fixture(f'{scraper.retailer_name}_{style}.html.gz').decode('utf-8'))
+                for scraper in scrapers for style in ('jsonld', 'markup')]
+    
+    if mode == 'process':
+        # Start the workers before timing (spawn + imports take a while)
+        await asyncio.gather(*(scraper.parse_page('<html></html>', 'warmup', 'warmup') for scraper in scrapers * workers))
+        executor.queue_waits.clear()
+        executor.parse_times.clear()
+        executor.parsed = executor.failed = 0
+    
+    semaphore = asyncio.Semaphore(max(1, workers) * 2)
+    
+    async def parse_one(i: int):
+        scraper, html = fixtures[i % len(fixtures)]
+        async with semaphore:
+            return await scraper.parse_page(html, f'https://www.{scraper.retailer_name}.com/product/{i}', str(i))
+    
+    lag = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(lag, stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(parse_one(i) for i in range(pages)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    executor.shutdown()
+    
+    lag.sort()
+    stats = executor.get_stats()
+    return {
+        'pages': pages,
+        'parsed_ok': sum(1 for r in results if r is not None),
+        'elapsed_s': round(elapsed, 2),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'loop_lag_p50_ms': percentile_ms(lag, 50),
+        'loop_lag_p99_ms': percentile_ms(lag, 99),
+        'loop_lag_max_ms': round(lag[-1] * 1000, 1) if lag else 0.0,
+        **{key: stats[key] for key in ('workers', 'queue_wait_p50_ms', 'queue_wait_p95_ms', 'parse_p50_ms', 'parse_p95_ms')},
+    }
+
+
+def main():
+    import os
+    
+    parser = argparse.ArgumentParser(description='Parse executor loop-lag benchmark')
+    parser.add_argument('--pages', type=int, default=120, help='Pages to parse per mode')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Process pool size')
+    parser.add_argument('--html-backend', default='lxml', choices=['lxml', 'soup'])
+    parser.add_argument('--modes', nargs='+', default=['inline', 'process'], choices=['inline', 'process'])
+    args = parser.parse_args()
+    
+    cases = {}
+    for mode in args.modes:
+        print(f"Running {mode} ({args.pages} pages, {args.html_backend})...", flush=True)
+        cases[mode] = asyncio.run(run_mode(mode, args.pages, args.workers, args.html_backend))
+    
+    print(f"\n{'mode':<8} {'pages/s':>8} {'lag p50':>8} {'lag p99':>8} {'lag max':>8} {'parse p50':>10} {'queue p95':>10}")
+    for mode, m in cases.items():
+        print(f"{mode:<8} {m['pages_per_sec']:>8} {m['loop_lag_p50_ms']:>8} {m['loop_lag_p99_ms']:>8} "
+              f"{m['loop_lag_max_ms']:>8} {m['parse_p50_ms']:>10} {m['queue_wait_p95_ms']:>10}")
+    
+    results = {'environment': environment_info(), 'html_backend': args.html_backend, 'cases': cases}
+    print(f"\n✓ Results written to {write_results('parse_executor', results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Parser microbenchmarks and golden-output checks.
+
+Runs every retailer parser over the fixture corpus in benchmarks/fixtures/ and
+reports per case:
+  - µs per parse (decode/soup construction included - that is the per-item cost)
+  - peak allocation per parse (tracemalloc - Python heap only; lxml's libxml2
+    tree is allocated outside it, so lxml cases understate total memory)
+  - whether the output still matches benchmarks/fixtures/golden/<case>.json
+
+Parser changes must keep the golden outputs identical; the script exits 1 on
+any mismatch or on a timing regression beyond --threshold against
+benchmarks/baseline_parsers.json.
+
+Usage:
+  python benchmarks/bench_parsers.py                      # All cases
+  python benchmarks/bench_parsers.py --cases costco_jsonld target_api_simple
+  python benchmarks/bench_parsers.py --update-golden      # Accept current parser output
+  python benchmarks/bench_parsers.py --update-baseline    # Accept current timings
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import timeit
+import tracemalloc
+
+from common import BENCH_DIR, environment_info, write_results, check_regressions, load_baseline
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+GOLDEN_DIR = FIXTURES_DIR / 'golden'
+BASELINE_PATH = BENCH_DIR / 'baseline_parsers.json'
+LOWER_IS_BETTER = ['us_per_parse', 'peak_alloc_kb']
+
+# Comparison cases (the slower path a production case replaced) share its golden output
+GOLDEN_ALIASES = {
+    'target_api_simple_json': 'target_api_simple',
+    'target_api_variants_json': 'target_api_variants',
+}
+for _retailer in ('costco', 'homegoods', 'tjmaxx'):
+    for _style in ('jsonld', 'markup'):
+        GOLDEN_ALIASES[f'{_retailer}_{_style}_soup'] = f'{_retailer}_{_style}'
+
+
+class FakeElement:
+    def __init__(self, text: str):
+        self.text = text
+
+    async def inner_text(self) -> str:
+        return self.text
+
+
+class FakePage:
+    """Just enough of a Playwright page for the live-DOM parsers: canned selector text and page HTML."""
+
+    def __init__(self, html: str, selector_text: dict):
+        self.html = html
+        self.selector_text = selector_text
+
+    async def query_selector(self, selector: str):
+        text = self.selector_text.get(selector)
+        return FakeElement(text) if text is not None else None
+
+    async def content(self) -> str:
+        return self.html
+
+
+def load_fixture(name: str) -> bytes:
+    path = FIXTURES_DIR / name
+    if path.suffix == '.gz':
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+    return path.read_bytes()
+
+
+def build_scrapers(html_backend: str = None) -> dict:
+    """Scrapers with no database/browser/proxy - parsers only use config and helpers."""
+    from config import CONFIG
+    from scrapers import TargetScraper, CostcoScraper, HomeGoodsScraper, TJMaxxScraper
+
+    # FakePage can't run in-page extraction; time the page HTML parsers
+    config = dict(CONFIG, html_backend=html_backend or CONFIG.get('html_backend'), in_page_extract=False)
+    return {
+        'target': TargetScraper(config, None, None, None, None),
+        'costco': CostcoScraper(config, None, None, None, None),
+        'homegoods': HomeGoodsScraper(config, None, None, None, None),
+        'tjmaxx': TJMaxxScraper(config, None, None, None, None),
+    }
+
+
+def build_cases(scrapers: dict, soup_scrapers: dict) -> dict:
+    """case name -> zero-argument callable that parses its fixture and returns the parser output."""
+    from scrapers import redsky_schema
+
+    target = scrapers['target']
+    loop = asyncio.new_event_loop()
+    cases = {}
+
+    def api_case(name, tcin, decode_pdp, decode_fulfillment):
+        pdp_raw = load_fixture(f'target_pdp_{name}.json')
+        fulfillment_raw = load_fixture(f'target_fulfillment_{name}.json')
+
+        def parse():
+            # Same decode + merge as TargetScraper._fetch_product_api
+            data = decode_pdp(pdp_raw)
+            fulfillment = decode_fulfillment(fulfillment_raw)
+            data['data']['product']['fulfillment_data'] = fulfillment['data']['product']
+            return target._parse_api_response(data, f'https://www.target.com/p/-/A-{tcin}', tcin)
+        return parse
+
+    # Production decode (typed projection when msgspec is installed) and plain json.loads for comparison
+    for name, tcin in [('simple', '87654321'), ('variants', '12345678')]:
+        cases[f'target_api_{name}'] = api_case(name, tcin, redsky_schema.decode_pdp, redsky_schema.decode_fulfillment)
+        cases[f'target_api_{name}_json'] = api_case(name, tcin, json.loads, json.loads)
+
+    raw = load_fixture('target_next_data.json')
+    cases['target_next_data'] = lambda: target._parse_next_data(
+        json.loads(raw), 'https://www.target.com/p/-/A-55555555', '55555555')
+
+    marketplace_html = load_fixture('target_marketplace.html.gz').decode('utf-8')
+    page = FakePage(marketplace_html, {
+        'span[data-test="product-price"]': '$49.99',
+        'text=/Arrives by/': 'Arrives by Fri, Oct 24',
+    })
+    cases['target_marketplace'] = lambda: loop.run_until_complete(target._parse_browser_fallback_live(
+        page, 'https://www.target.com/p/-/A-55555555', '55555555'))
+
+    # Configured HTML backend, and the BeautifulSoup backend for comparison
+    product_ids = {'costco': '100012345', 'homegoods': '3000123456', 'tjmaxx': '1000987654'}
+    for retailer, product_id in product_ids.items():
+        for style in ('jsonld', 'markup'):
+            html = load_fixture(f'{retailer}_{style}.html.gz').decode('utf-8')
+            url = f'https://www.{retailer}.com/product/{product_id}'
+            for suffix, scraper in [('', scrapers[retailer]), ('_soup', soup_scrapers[retailer])]:
+                cases[f'{retailer}_{style}{suffix}'] = (
+                    lambda scraper=scraper, html=html, url=url, product_id=product_id:
+                    scraper._parse_html(html, url, product_id)
+                )
+
+    return cases
+
+
+def normalize(result) -> dict:
+    """
+    Comparable form of a parser result (or golden file): every products column, as
+    stored - so a dict and a ProductRecord with the same row compare equal. JSON
+    round-trip, timestamps dropped.
+    """
+    from models import ProductRecord
+
+    if result is None:
+        return None
+    if isinstance(result, dict) and 'product_id' in result:
+        result = ProductRecord.from_dict(result)
+    if isinstance(result, ProductRecord):
+        result = result.to_dict()
+    result = json.loads(json.dumps(result, default=str))
+    result.pop('scraped_at', None)
+    return result
+
+
+def measure(parse, repeat: int) -> dict:
+    """Best-of-N time per parse, plus peak allocation of a single parse."""
+    timer = timeit.Timer(parse)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'us_per_parse': round(best * 1e6, 1),
+        'parses_per_sec': round(1 / best, 1),
+        'peak_alloc_kb': round((peak - base) / 1024, 1),
+    }
+
+
+def print_comparisons(metrics: dict):
+    """Per-page CPU and peak allocation saved by each production path over the path it replaced."""
+    from scrapers import redsky_schema
+
+    pairs = [(alias, name) for alias, name in GOLDEN_ALIASES.items() if alias in metrics and name in metrics]
+    if not pairs:
+        return
+    decoder = 'msgspec projection' if redsky_schema.MSGSPEC_AVAILABLE else ('orjson' if redsky_schema.ORJSON_AVAILABLE else 'json')
+    backend = build_scrapers()['costco'].html_backend
+    print(f"\nSaved per item (redsky decode: {decoder} vs json.loads; HTML: {backend} vs soup):")
+    for baseline_case, case in pairs:
+        base, current = metrics[baseline_case], metrics[case]
+        saved_us = base['us_per_parse'] - current['us_per_parse']
+        saved_kb = base['peak_alloc_kb'] - current['peak_alloc_kb']
+        print(f"  {case:<22} CPU {saved_us:>+12,.1f} µs ({saved_us / base['us_per_parse']:>4.0%})  "
+              f"peak {saved_kb:>+10,.1f} KB ({saved_kb / base['peak_alloc_kb']:>4.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parser microbenchmarks and golden-output checks')
+    parser.add_argument('--cases', nargs='+', help='Only run these cases')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats (best is reported)')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Allowed regression (0.15 = 15%%)')
+    parser.add_argument('--update-golden', action='store_true', help='Write current outputs as golden')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    args = parser.parse_args()
+
+    cases = build_cases(build_scrapers(), build_scrapers('soup'))
+    if args.cases:
+        unknown = set(args.cases) - set(cases)
+        if unknown:
+            print(f"✗ Unknown cases: {', '.join(sorted(unknown))} (have: {', '.join(cases)})")
+            sys.exit(2)
+        cases = {name: cases[name] for name in args.cases}
+
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    metrics = {}
+    mismatches = []
+
+    print(f"{'case':<22} {'µs/parse':>12} {'parses/s':>10} {'peak KB':>10}  golden")
+    for name, parse in cases.items():
+        output = normalize(parse())
+        golden_path = GOLDEN_DIR / f"{GOLDEN_ALIASES.get(name, name)}.json"
+
+        if args.update_golden and name not in GOLDEN_ALIASES:
+            with open(golden_path, 'w') as f:
+                json.dump(output, f, indent=2, sort_keys=True)
+            golden = 'updated'
+        elif not golden_path.exists():
+            golden = 'missing'
+            mismatches.append(f"{name}: no golden file (run with --update-golden)")
+        else:
+            with open(golden_path) as f:
+                expected = normalize(json.load(f))
+            if output == expected:
+                golden = 'ok'
+            else:
+                golden = 'MISMATCH'
+                changed = sorted(k for k in set(output or {}) | set(expected or {})
+                                 if (output or {}).get(k) != (expected or {}).get(k))
+                mismatches.append(f"{name}: fields differ: {', '.join(changed) or 'output is None'}")
+
+        metrics[name] = measure(parse, args.repeat)
+        m = metrics[name]
+        print(f"{name:<22} {m['us_per_parse']:>12,.1f} {m['parses_per_sec']:>10,.1f} {m['peak_alloc_kb']:>10,.1f}  {golden}")
+
+    print_comparisons(metrics)
+
+    results = {'environment': environment_info(), 'cases': metrics}
+    print(f"\n✓ Results written to {write_results('parsers', results)}")
+
+    if mismatches:
+        print(f"\n✗ {len(mismatches)} golden mismatch(es):")
+        for message in mismatches:
+            print(f"  - {message}")
+        sys.exit(1)
+
+    if args.update_baseline:
+        baseline = load_baseline(BASELINE_PATH)
+        baseline.update(metrics)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✓ Baseline updated: {BASELINE_PATH}")
+        return
+
+    regressions = check_regressions(metrics, load_baseline(BASELINE_PATH), [], LOWER_IS_BETTER, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print(f"✓ Golden outputs match, no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
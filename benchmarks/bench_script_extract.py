@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Script-block extraction benchmark: raw-page scan vs. DOM lookup.
+
+For every HTML page in benchmarks/fixtures/ (plus any --pages), looks up the
+JSON-LD and __NEXT_DATA__ script blocks with the scanner in
+scrapers/script_extract.py and with a full DOM parse per backend, and reports:
+  - hit rate (scan found the same blocks the DOM did, no fallback needed)
+  - µs per lookup for the scan and each DOM backend, and the time saved per page
+  - any page where scan and DOM disagree (exits 1)
+
+Usage:
+  python benchmarks/bench_script_extract.py
+  python benchmarks/bench_script_extract.py --pages corpus/www.costco.com/*.html --repeat 10
+"""
+
+import argparse
+import gzip
+import sys
+import timeit
+from pathlib import Path
+
+from common import BENCH_DIR, environment_info, write_results
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+
+# Lookup name -> scanner (attribute, value, page marker)
+LOOKUPS = {
+    'json_ld': ('type', 'application/ld+json', 'application/ld+json'),
+    'next_data': ('id', '__NEXT_DATA__', '__NEXT_DATA__'),
+}
+
+
+def load_page(path: Path) -> str:
+    data = path.read_bytes()
+    if path.suffix == '.gz':
+        data = gzip.decompress(data)
+    return data.decode('utf-8', errors='replace')
+
+
+def dom_blocks(html: str, backend: str, lookup: str) -> list:
+    from scrapers.html_backend import parse_document
+    
+    doc = parse_document(html, backend)
+    if lookup == 'json_ld':
+        return doc.json_ld_blocks()
+    if backend == 'soup':
+        script = doc.soup.find('script', id='__NEXT_DATA__')
+        return [script.string] if script and script.string else []
+    return [script.text for script in doc.root.iter('script') if script.get('id') == '__NEXT_DATA__' and script.text][:1]
+
+
+def scan_blocks(html: str, attr: str, value: str, marker: str, first_only: bool) -> list:
+    from scrapers.script_extract import find_script_blocks
+    
+    if marker not in html:
+        return []
+    return find_script_blocks(html, attr, value, first_only)
+
+
+def time_call(fn, repeat: int) -> float:
+    """Best-of-repeat seconds per call."""
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    from scrapers.html_backend import LXML_AVAILABLE
+    
+    parser = argparse.ArgumentParser(description='Script-block scan vs. DOM benchmark')
+    parser.add_argument('--pages', nargs='*', default=[], help='Extra HTML pages (.html or .html.gz)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats (best is kept)')
+    args = parser.parse_args()
+    
+    backends = ['lxml', 'soup'] if LXML_AVAILABLE else ['soup']
+    paths = sorted(FIXTURES_DIR.glob('*.html.gz')) + [Path(p) for p in args.pages]
+    
+    cases = {}
+    mismatches = []
+    for path in paths:
+        html = load_page(path)
+        # The DOM parse dominates either lookup, so time it once per page and backend
+        dom_us = {backend: time_call(lambda: dom_blocks(html, backend, 'json_ld'), args.repeat) * 1e6 for backend in backends}
+        for lookup, (attr, value, marker) in LOOKUPS.items():
+            first_only = lookup == 'next_data'
+            scanned = scan_blocks(html, attr, value, marker, first_only)
+            expected = dom_blocks(html, backends[0], lookup)
+            if not expected and not scanned:
+                continue
+            hit = scanned == expected
+            if not hit:
+                mismatches.append(f'{path.name}:{lookup}')
+            scan_us = time_call(lambda: scan_blocks(html, attr, value, marker, first_only), args.repeat) * 1e6
+            cases[f'{path.name}:{lookup}'] = {
+                'page_kb': round(len(html) / 1024),
+                'blocks': len(expected),
+                'hit': hit,
+                'scan_us': round(scan_us, 1),
+                **{f'dom_{backend}_us': round(us, 1) for backend, us in dom_us.items()},
+                **{f'saved_vs_{backend}_us': round(us - scan_us, 1) for backend, us in dom_us.items()},
+            }
+    
+    print(f"\n{'page:lookup':<40} {'KB':>6} {'hit':>4} {'scan µs':>10}" + ''.join(f" {b + ' µs':>12}" for b in backends))
+    for name, case in cases.items():
+        print(f"{name:<40} {case['page_kb']:>6} {'yes' if case['hit'] else 'NO':>4} {case['scan_us']:>10,.1f}"
+              + ''.join(f" {case[f'dom_{b}_us']:>12,.1f}" for b in backends))
+    
+    hits = sum(1 for case in cases.values() if case['hit'])
+    print(f"\nHit rate: {hits}/{len(cases)} ({hits / len(cases) * 100 if cases else 0:.0f}%)")
+    for backend in backends:
+        saved = sum(case[f'saved_vs_{backend}_us'] for case in cases.values() if case['hit'])
+        print(f"Time saved vs {backend} DOM: {saved / 1000:,.1f} ms over {hits} lookups "
+              f"({saved / hits / 1000 if hits else 0:,.2f} ms per page)")
+    
+    results = {'environment': environment_info(), 'cases': cases, 'mismatches': mismatches}
+    print(f"\n✓ Results written to {write_results('script_extract', results)}")
+    
+    if mismatches:
+        print(f"✗ Scan and DOM disagree: {', '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark.
+
+Drives RetailScraper.scrape_products_from_manifest for Target against a local
+mock_server.py with synthetic manifests, and reports per size:
+  - throughput (products/min)
+  - p50/p95/p99 per-item latency (plus p95 browser-lane time for items handed off)
+  - peak RSS
+  - DB write rate
+
+Each size runs in its own process so peak RSS is per case. Results are written to
+benchmarks/results/ and compared with benchmarks/baseline_throughput.json; the
+script exits 1 if a case fails more items than the mock server injects (baseline or
+not), if a case has no baseline yet, or if any metric regresses beyond --threshold.
+Baselines are machine-specific, so record one with --update-baseline before comparing.
+
+Usage:
+  python benchmarks/bench_throughput.py                       # 10K items
+  python benchmarks/bench_throughput.py --sizes 10000 100000 1000000
+  python benchmarks/bench_throughput.py --update-baseline     # Accept current numbers
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import BENCH_DIR, REPO_ROOT, environment_info, write_results, check_failures, check_regressions, load_baseline
+
+BASELINE_PATH = BENCH_DIR / 'baseline_throughput.json'
+HIGHER_IS_BETTER = ['products_per_min', 'db_writes_per_sec']
+LOWER_IS_BETTER = ['latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'peak_rss_mb']
+# Failures allowed on top of the mock's injected not-found/error/throttle rates (not-found is hashed per ID)
+FAILURE_SLACK = 0.01
+
+
+def write_manifest(path: Path, size: int):
+    """Synthetic Target manifest in the same format run_enumeration writes."""
+    with open(path, 'w') as f:
+        f.write('url,hash\n')
+        for i in range(size):
+            f.write(f"https://www.target.com/p/synthetic-product/-/A-{10000000 + i},\n")
+
+
+async def run_case(size: int, replay_url: str, concurrency: int, work_dir: Path) -> dict:
+    """Run one manifest size in this process and collect metrics."""
+    from config import CONFIG
+    from utils import percentile_ms
+    
+    CONFIG['database_path'] = str(work_dir / 'bench.db')
+    CONFIG['export_dir'] = str(work_dir / 'exports')
+    CONFIG['manifests_dir'] = str(work_dir / 'manifests')
+    if CONFIG['response_cache']['dir']:
+        CONFIG['response_cache'] = dict(CONFIG['response_cache'], dir=str(work_dir / 'response_cache'))
+    CONFIG['replay_base_url'] = replay_url
+    CONFIG['live_export_every'] = 0  # Full-table JSON exports would dominate at 1M rows
+    CONFIG['delays_ms'] = {'min': 0, 'max': 0}
+    CONFIG['concurrency']['target'] = concurrency
+    
+    from main import RetailScraper
+    
+    scraper = RetailScraper()
+    target = scraper.scrapers['target']
+    
+    # Per-item latency around the scraper call, and browser-lane time for items handed off
+    latencies = []
+    handoff_latencies = []
+    scrape_product = target.scrape_product
+    scrape_handoff = target.scrape_handoff
+    
+    async def timed_scrape_product(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await scrape_product(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    
+    async def timed_scrape_handoff(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await scrape_handoff(*args, **kwargs)
+        finally:
+            handoff_latencies.append(time.perf_counter() - start)
+    
+    target.scrape_product = timed_scrape_product
+    target.scrape_handoff = timed_scrape_handoff
+    
+    # DB write count and time (products are written in batches by ProductWriter)
+    write_times = []
+    write_count = 0
+    insert_products = scraper.database.insert_products
+    
+    def timed_insert_products(products):
+        nonlocal write_count
+        start = time.perf_counter()
+        try:
+            return insert_products(products)
+        finally:
+            write_times.append(time.perf_counter() - start)
+            write_count += len(products)
+    
+    scraper.database.insert_products = timed_insert_products
+    
+    manifest_path = work_dir / 'manifest_target_bench.csv'
+    write_manifest(manifest_path, size)
+    
+    start = time.perf_counter()
+    await scraper.scrape_products_from_manifest('target', str(manifest_path), resume=False)
+    elapsed = time.perf_counter() - start
+    
+    run = scraper.database.get_scrape_stats(scraper.retailer_runs['target'])
+    latencies.sort()
+    handoff_latencies.sort()
+    
+    return {
+        'items': size,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'products_per_min': round(len(latencies) / elapsed * 60, 1),
+        'latency_p50_ms': percentile_ms(latencies, 50),
+        'latency_p95_ms': percentile_ms(latencies, 95),
+        'latency_p99_ms': percentile_ms(latencies, 99),
+        'browser_handoffs': len(handoff_latencies),
+        'handoff_p95_ms': percentile_ms(handoff_latencies, 95),
+        # ru_maxrss is KB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'db_writes': write_count,
+        'db_writes_per_sec': round(write_count / elapsed, 1),
+        'db_write_mean_ms': round(sum(write_times) / write_count * 1000, 3) if write_count else None,
+        'db_batches': len(write_times),
+        'success': run['total_success'],
+        'failed': run['total_failed'],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(args) -> tuple:
+    """Start mock_server.py in its own process so it doesn't share the scraper's event loop."""
+    import httpx
+    
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / 'mock_server.py'), '--port', str(port),
+         '--latency-ms', str(args.latency_ms), '--latency-sigma', str(args.latency_sigma),
+         '--error-rate', str(args.error_rate), '--throttle-rate', str(args.throttle_rate),
+         '--not-found-rate', str(args.not_found_rate), '--seed', '1'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/__stats", timeout=1)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('mock_server.py did not start')
+
+
+def run_case_subprocess(size: int, replay_url: str, args) -> dict:
+    """Run a case in a child process and read its result file."""
+    with tempfile.TemporaryDirectory(prefix='bench_throughput_') as work_dir:
+        result_file = Path(work_dir) / 'result.json'
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--run-one', str(size), '--replay', replay_url,
+             '--concurrency', str(args.concurrency), '--work-dir', work_dir, '--result-file', str(result_file)],
+            # Progress bar output is per item - keep it out of the report unless asked
+            stdout=None if args.verbose else subprocess.DEVNULL,
+            check=True, cwd=work_dir,
+        )
+        with open(result_file) as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scraper throughput benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help='Manifest sizes to run')
+    parser.add_argument('--concurrency', type=int, default=100, help='Target concurrency')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Mock median latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Mock lognormal latency spread')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--not-found-rate', type=float, default=0.02)
+    parser.add_argument('--threshold', type=float, default=0.15, help='Allowed regression (0.15 = 15%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--verbose', action='store_true', help='Show scraper output')
+    # Internal: run a single case in this process
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--replay', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    if args.run_one:
+        result = asyncio.run(run_case(args.run_one, args.replay, args.concurrency, Path(args.work_dir)))
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+    
+    process, replay_url = start_mock_server(args)
+    cases = {}
+    try:
+        for size in args.sizes:
+            print(f"Running target_{size} (concurrency {args.concurrency})...", flush=True)
+            cases[f"target_{size}"] = run_case_subprocess(size, replay_url, args)
+    finally:
+        process.terminate()
+    
+    print(f"\n{'case':<18} {'items/min':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'writes/s':>9}")
+    for case, m in cases.items():
+        print(f"{case:<18} {m['products_per_min']:>10,.0f} {m['latency_p50_ms']:>8} {m['latency_p95_ms']:>8} "
+              f"{m['latency_p99_ms']:>8} {m['peak_rss_mb']:>8} {m['db_writes_per_sec']:>9,.0f}")
+    
+    results = {
+        'environment': environment_info(),
+        'mock': {key: getattr(args, key) for key in ('latency_ms', 'latency_sigma', 'error_rate', 'throttle_rate', 'not_found_rate')},
+        'cases': cases,
+    }
+    print(f"\n✓ Results written to {write_results('throughput', results)}")
+    
+    max_failure_rate = args.not_found_rate + args.error_rate + args.throttle_rate + FAILURE_SLACK
+    failures = check_failures(cases, max_failure_rate)
+    if failures:
+        print(f"\n✗ {len(failures)} case(s) failed beyond the mock's injected failures:")
+        for message in failures:
+            print(f"  - {message}")
+        sys.exit(1)
+    
+    if args.update_baseline:
+        baseline = load_baseline(BASELINE_PATH)
+        baseline.update(cases)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✓ Baseline updated: {BASELINE_PATH}")
+        return
+    
+    baseline = load_baseline(BASELINE_PATH)
+    missing = [case for case in cases if case not in baseline]
+    if missing:
+        print(f"\n✗ No baseline for {', '.join(missing)} in {BASELINE_PATH}")
+        print("  Record one on this machine with --update-baseline, then re-run to compare.")
+        sys.exit(1)
+    
+    regressions = check_regressions(cases, baseline, HIGHER_IS_BETTER, LOWER_IS_BETTER, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print(f"✓ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
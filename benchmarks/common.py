@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark scripts: result files, failure and baseline checks.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / 'results'
+
+# Benchmarks import the scraper modules from the repo root
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def environment_info() -> Dict:
+    """Machine and revision details stored with every result file."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(name: str, results: Dict) -> Path:
+    """Write a result file to benchmarks/results/<name>_<timestamp>.json."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def check_failures(current: Dict[str, Dict], max_failure_rate: float) -> List[str]:
+    """
+    Cases whose items failed beyond what the mock server injects (or that had no successes).
+    Checked with or without a baseline, so a broken run can't pass or become the baseline.
+    """
+    failures = []
+    for case, metrics in current.items():
+        attempted = metrics['success'] + metrics['failed']
+        if not metrics['success']:
+            failures.append(f"{case}: no successful items ({metrics['failed']:,} failed)")
+        elif metrics['failed'] > attempted * max_failure_rate:
+            failures.append(f"{case}: failure rate {metrics['failed'] / attempted:.1%} > {max_failure_rate:.1%} "
+                            f"({metrics['failed']:,} of {attempted:,})")
+    return failures
+
+
+def check_regressions(current: Dict[str, Dict], baseline: Dict[str, Dict],
+                      higher_is_better: List[str], lower_is_better: List[str], threshold: float) -> List[str]:
+    """
+    Compare metrics per case against a baseline.
+    Returns human-readable regression messages (empty list = pass).
+    """
+    regressions = []
+    for case, metrics in current.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric in higher_is_better:
+            if base.get(metric) and metrics.get(metric) is not None:
+                if metrics[metric] < base[metric] * (1 - threshold):
+                    regressions.append(f"{case}: {metric} {metrics[metric]:,.2f} < baseline {base[metric]:,.2f}")
+        for metric in lower_is_better:
+            if base.get(metric) and metrics.get(metric) is not None:
+                if metrics[metric] > base[metric] * (1 + threshold):
+                    regressions.append(f"{case}: {metric} {metrics[metric]:,.2f} > baseline {base[metric]:,.2f}")
+    return regressions
+
+
+def load_baseline(path: Path) -> Dict:
+    """Load a baseline file, or {} if there is none yet."""
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Regenerate the parser fixture corpus in this directory.
+
+Fixtures are synthetic but shaped like the live pages: product pages carry the
+navigation, inline script and style bulk that makes real pages 0.5-2 MB, and the
+Target API payloads include the large blocks _parse_api_response never reads.
+
+Recorded pages (python main.py --record DIR) can be added alongside these as
+<retailer>_<name>.html.gz; run bench_parsers.py --update-golden afterwards.
+"""
+
+import gzip
+import json
+import random
+import sys
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(FIXTURES_DIR.parent.parent))
+
+from mock_server import synthetic_pdp, synthetic_product_html  # noqa: E402
+
+
+def page_bulk(rng: random.Random, size_kb: int) -> str:
+    """Inline scripts, styles and menus that real product pages carry."""
+    chunks = []
+    size = 0
+    while size < size_kb * 1024:
+        kind = rng.random()
+        if kind < 0.4:
+            state = {f"k{i}": {'id': rng.getrandbits(32), 'label': f"item {i}", 'flags': [1, 0, 1]} for i in range(40)}
+            chunk = f'<script>window.__STATE_{rng.getrandbits(16)}__ = {json.dumps(state)};</script>'
+        elif kind < 0.6:
+            chunk = '<style>' + ''.join(f'.c{rng.getrandbits(20)}{{margin:{rng.randint(0, 9)}px;color:#{rng.getrandbits(24):06x}}}' for _ in range(60)) + '</style>'
+        else:
+            chunk = '<div class="tile-grid">' + ''.join(
+                f'<div class="tile"><a href="/c/{rng.getrandbits(24)}"><img src="https://cdn.example.com/{rng.getrandbits(32)}.jpg" alt="promo">'
+                f'<span class="tile-label">Shop {rng.choice(["Deals", "New", "Home", "Kitchen"])}</span></a></div>' for _ in range(30)) + '</div>'
+        chunks.append(chunk)
+        size += len(chunk)
+    return ''.join(chunks)
+
+
+def write_gz(name: str, text: str):
+    # mtime=0 so regenerating unchanged fixtures leaves the files byte-identical
+    with open(FIXTURES_DIR / name, 'wb') as f:
+        f.write(gzip.compress(text.encode('utf-8'), mtime=0))
+
+
+def write_json(name: str, data):
+    with open(FIXTURES_DIR / name, 'w') as f:
+        json.dump(data, f, indent=1)
+
+
+def target_api_fixtures():
+    """pdp and fulfillment responses as redsky returns them (_fetch_product_api merges the two)."""
+    simple = synthetic_pdp('87654321', padding_kb=60)
+    write_json('target_pdp_simple.json', simple)
+    write_json('target_fulfillment_simple.json', {'data': {'product': {
+        'tcin': '87654321',
+        'fulfillment': {'shipping_options': {
+            'availability_status': 'IN_STOCK',
+            'services': [{'min_delivery_date': '2025-10-24', 'max_delivery_date': '2025-10-27',
+                          'shipping_method_id': 'STANDARD', 'is_base_shipping_method': True}],
+            'loyalty_availability_status': 'IN_STOCK',
+        }, 'store_options': [{'location_id': str(1000 + i), 'order_pickup': {'availability_status': 'UNAVAILABLE'}}
+                             for i in range(20)]},
+        'pay_per_order_charges': {'one_day': 6.99, 'scheduled_delivery': 9.99},
+    }}})
+
+    # Variant parent: min/max prices, dict-form images, no fulfillment services
+    variants = synthetic_pdp('12345678', padding_kb=90)
+    product = variants['data']['product']
+    product['price'] = {'current_retail_min': 12.0, 'current_retail_max': 18.0, 'reg_retail_max': 20.0}
+    images = product['item']['enrichment']['images']
+    images['primary_image'] = {'url': 'https://target.scene7.com/is/image/Target/GUEST_variant_1'}
+    images['alternate_images'] = [{'url': f'GUEST_variant_{i}'} for i in range(2, 6)]
+    product['children'] = [synthetic_pdp(str(12345679 + i), padding_kb=4)['data']['product'] for i in range(12)]
+    write_json('target_pdp_variants.json', variants)
+    write_json('target_fulfillment_variants.json', {'data': {'product': {
+        'tcin': '12345678', 'fulfillment': {'shipping_options': {}}, 'pay_per_order_charges': {},
+    }}})
+
+
+def target_page_fixtures(rng: random.Random):
+    """__NEXT_DATA__ JSON for _parse_next_data and a marketplace page for the browser fallback."""
+    product = synthetic_pdp('55555555', padding_kb=30)['data']['product']
+
+    next_data = {'props': {'pageProps': {'product': {
+        'tcin': '55555555',
+        'title': 'Marketplace Lamp',
+        'brand': 'Lumen Co',
+        'price': {'current_retail': '$49.99', 'reg_retail': '$59.99'},
+        'images': [{'base_url': 'https://target.scene7.com/is/image/Target/GUEST_m1'},
+                   {'url': 'https://target.scene7.com/is/image/Target/GUEST_m2'}],
+        'description': 'Brass table lamp.',
+        'breadcrumbs': [{'name': 'Home'}, {'name': 'Lighting'}, {'name': 'Lamps'}],
+        'ratings_and_reviews': {'average_rating': 4.4, 'count': 87},
+        'available': True,
+    }}, 'bulk': product['promotions']}}
+    write_json('target_next_data.json', next_data)
+
+    product['item']['product_description']['downstream_description'] = '<p>Brass <b>table</b> lamp with linen shade.</p>'
+    page_data = {'props': {'pageProps': {'initialData': {'data': {'product': product}}}}}
+    html = (
+        '<!DOCTYPE html><html><head><title>Target</title>' + page_bulk(rng, 300) + '</head><body>'
+        '<h1 data-test="product-title">Marketplace Lamp</h1>'
+        '<span data-test="product-price">$49.99</span>'
+        '<div data-test="shipping-block">Arrives by Fri, Oct 24</div>'
+        + page_bulk(rng, 200) +
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(page_data)}</script>'
+        '</body></html>'
+    )
+    write_gz('target_marketplace.html.gz', html)
+
+
+def retailer_page_fixtures(rng: random.Random):
+    """JSON-LD and markup-only pages for Costco, HomeGoods and TJ Maxx."""
+    for retailer, product_id, size_kb in [('costco', '100012345', 1500), ('homegoods', '3000123456', 700),
+                                          ('tjmaxx', '1000987654', 900)]:
+        for style in ('jsonld', 'markup'):
+            page = synthetic_product_html(retailer, product_id, with_json_ld=(style == 'jsonld'))
+            # Bulk goes before and after the product block, as on live pages
+            head_end = page.index('</head>')
+            body_start = page.index('<body>') + len('<body>')
+            page = (page[:head_end] + page_bulk(rng, size_kb // 2) + page[head_end:body_start]
+                    + page_bulk(rng, size_kb // 2) + page[body_start:])
+            write_gz(f'{retailer}_{style}.html.gz', page)
+
+
+if __name__ == '__main__':
+    rng = random.Random(29)
+    target_api_fixtures()
+    target_page_fixtures(rng)
+    retailer_page_fixtures(rng)
+    print(f"✓ Fixtures written to {FIXTURES_DIR}")
@@ -5,7 +5,9 @@ Browser manager with Playwright and stealth patches.
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from typing import Optional, Dict
 import random
+import time
 from config import CONFIG
+from session_store import SessionStore
 
 
 class BrowserManager:
@@ -16,6 +18,10 @@ class BrowserManager:
         self.contexts = []
         self.user_agents = CONFIG['user_agents']
         
+        # Stored cookies/localStorage per retailer + proxy exit (CONFIG['session_store'])
+        self.session_store = SessionStore(CONFIG)
+        self._context_sessions = {}  # context -> (retailer, proxy_url, session or None, created)
+    
     async def initialize(self):
         """Initialize Playwright and browser."""
         self.playwright = await async_playwright().start()
@@ -37,12 +43,19 @@ class BrowserManager:
         print("[OK] Browser initialized")
     
     async def create_context(self, retailer: str = None) -> BrowserContext:
-        """Create a new browser context with stealth settings."""
+        """
+        Create a new browser context with stealth settings.
+        For retailers with a session store, the context starts from a stored session
+        (cookies, localStorage and the User-Agent they were earned with) when there is one.
+        """
         if not self.browser:
             await self.initialize()
         
-        # Get random user agent
-        user_agent = random.choice(self.user_agents)
+        proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager and self.proxy_manager.is_enabled() else None
+        session = await self.session_store.load(retailer, proxy_url)
+        
+        # Get random user agent (or the one the stored session was earned with)
+        user_agent = session.user_agent if session and session.user_agent else random.choice(self.user_agents)
         
         context_options = {
             'user_agent': user_agent,
@@ -55,12 +68,15 @@ class BrowserManager:
         }
         
         # Add proxy if enabled
-        if self.proxy_manager and self.proxy_manager.is_enabled():
-            proxy_dict = self.proxy_manager.get_proxy_dict()
-            if proxy_dict:
-                context_options['proxy'] = proxy_dict
+        if proxy_url:
+            context_options['proxy'] = {'server': proxy_url}
+        
+        if session:
+            context_options['storage_state'] = session.storage_state
         
         context = await self.browser.new_context(**context_options)
+        if self.session_store.enabled_for(retailer):
+            self._context_sessions[context] = (retailer, proxy_url, session, time.perf_counter())
         
         # Apply stealth patches to bypass detection
         await self._apply_stealth_patches(context)
@@ -117,8 +133,31 @@ class BrowserManager:
         
         return page
     
+    async def save_session(self, context: BrowserContext, page: Page):
+        """Store the context's cookies/localStorage after it got a product page (session-store retailers only)."""
+        entry = self._context_sessions.get(context)
+        if not entry:
+            return
+        retailer, proxy_url, session, _ = entry
+        try:
+            storage_state = await context.storage_state()
+            user_agent = await page.evaluate('navigator.userAgent')
+        except Exception as e:
+            print(f"  ⚠️  Could not read {retailer} session: {e}")
+            return
+        await self.session_store.save(retailer, proxy_url, session, storage_state, user_agent)
+    
+    def discard_session(self, context: BrowserContext):
+        """The context got a challenge - don't hand its stored session out again."""
+        entry = self._context_sessions.get(context)
+        if entry and entry[2]:
+            self.session_store.retire(entry[2])
+    
     async def close_context(self, context: BrowserContext):
         """Close a browser context."""
+        entry = self._context_sessions.pop(context, None)
+        if entry:
+            self.session_store.record_page(entry[2] is not None, time.perf_counter() - entry[3])
         try:
             await context.close()
             if context in self.contexts:
@@ -140,5 +179,7 @@ class BrowserManager:
         if self.playwright:
             await self.playwright.stop()
         
+        self._context_sessions.clear()
+        
         print("[OK] Browser cleanup complete")
 
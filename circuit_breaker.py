@@ -0,0 +1,184 @@
+"""
+Circuit breakers for scraper fetches, one per host and endpoint.
+
+A breaker is shared by every task hitting that endpoint:
+  - closed: requests go through; failure_threshold consecutive failures (HTTP 403/429/5xx,
+    timeouts, dropped connections) open it
+  - open: requests wait in acquire() instead of hammering a host that is blocking us, and
+    proxy escalation is triggered (ProxyManager.enable_proxy) if a proxy is configured
+  - half-open: after open_seconds one request goes through as a probe; success closes the
+    breaker and releases everyone waiting, failure reopens it for twice as long (up to
+    max_open_seconds)
+So one bad minute pauses dispatch once, centrally, and an unattended run resumes by itself.
+
+acquire() returns the breaker's generation, which changes on every state change, and
+record()/release() take it back. Outcomes from an older generation (requests still in
+flight when the breaker opened) are ignored, so only the probe decides a half-open breaker.
+
+Settings: CONFIG['circuit_breaker'].
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+def endpoint_key(url: str) -> Tuple[str, str]:
+    """
+    (host, endpoint) for a URL. APIs carry their IDs in the query, so the path is the
+    endpoint (redsky pdp and fulfillment are separate); product pages carry them in the
+    path, so only its first segment is kept (Target '/p', TJ Maxx '/store', Costco '/').
+    """
+    parts = urlsplit(url)
+    if parts.query:
+        return parts.netloc, parts.path
+    segments = [segment for segment in parts.path.split('/') if segment]
+    return parts.netloc, '/' + segments[0] if len(segments) > 1 else '/'
+
+
+def is_failure_status(status: int) -> bool:
+    """Answers that mean the endpoint is blocking or struggling (404 is a healthy answer)."""
+    return status in (403, 429) or status >= 500
+
+
+class CircuitBreaker:
+    """Closed / open / half-open state for one endpoint."""
+    
+    def __init__(self, name: str, settings: Dict, proxy_manager=None):
+        self.name = name
+        self.failure_threshold = settings.get('failure_threshold', 10)
+        self.open_seconds = settings.get('open_seconds', 30)
+        self.max_open_seconds = settings.get('max_open_seconds', 300)
+        self.escalate_proxy = settings.get('escalate_proxy', True)
+        self.proxy_manager = proxy_manager
+        
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = self.open_seconds
+        self.open_until = 0.0
+        self.opened_at = None
+        self.generation = 0  # Bumped on every state change
+        self._changed = asyncio.Event()  # Set (and replaced) on every state change
+        
+        self.stats = {'requests': 0, 'failures': 0, 'opens': 0, 'probes': 0, 'failed_probes': 0,
+                      'stale_outcomes': 0, 'paused_seconds': 0.0}
+    
+    def _notify(self):
+        self.generation += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def acquire(self) -> int:
+        """Wait until a request may go out (immediately while closed); returns the generation to record with."""
+        while self.state != CLOSED:
+            now = time.monotonic()
+            if self.state == OPEN and now >= self.open_until:
+                # This caller is the probe (the only holder of the new generation); everyone else keeps waiting
+                self.state = HALF_OPEN
+                self.generation += 1
+                self.stats['probes'] += 1
+                print(f"\n  [CIRCUIT] {self.name}: half-open, probing with one request")
+                break
+            changed = self._changed
+            timeout = self.open_until - now if self.state == OPEN else None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.stats['requests'] += 1
+        return self.generation
+    
+    def record(self, generation: int, success: bool):
+        """Outcome of a request that acquire() let through at generation."""
+        if generation != self.generation:
+            # Sent before the last state change (e.g. in flight when the breaker opened)
+            self.stats['stale_outcomes'] += 1
+            if not success:
+                self.stats['failures'] += 1
+            return
+        if success:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._close()
+            return
+        
+        self.stats['failures'] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.stats['failed_probes'] += 1
+            self.cooldown = min(self.cooldown * 2, self.max_open_seconds)
+            self._open(f"probe failed, reopening for {self.cooldown:.0f}s")
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open(f"{self.consecutive_failures} consecutive failures, pausing {self.cooldown:.0f}s")
+            self._escalate()
+    
+    def release(self, generation: int):
+        """A request was cancelled before it had an outcome (a cancelled probe lets another one go)."""
+        if self.state == HALF_OPEN and generation == self.generation:
+            self.state = OPEN
+            self.open_until = time.monotonic()
+            self._notify()
+    
+    def _open(self, reason: str):
+        if self.opened_at is None:
+            self.opened_at = time.monotonic()
+            self.stats['opens'] += 1
+        self.state = OPEN
+        self.open_until = time.monotonic() + self.cooldown
+        print(f"\n  [CIRCUIT] {self.name}: open ({reason})")
+        self._notify()
+    
+    def _close(self):
+        paused = time.monotonic() - self.opened_at
+        self.stats['paused_seconds'] += paused
+        self.state = CLOSED
+        self.opened_at = None
+        self.cooldown = self.open_seconds
+        print(f"\n  [CIRCUIT] {self.name}: closed after {paused:.0f}s, resuming")
+        self._notify()
+    
+    def _escalate(self):
+        proxy_manager = self.proxy_manager
+        if not self.escalate_proxy or proxy_manager is None or proxy_manager.is_enabled():
+            return
+        if proxy_manager.datacenter_pool or proxy_manager.isp_pool:
+            proxy_manager.enable_proxy(reason=f"Circuit opened for {self.name}")
+
+
+class CircuitBreakers:
+    """Per-scraper registry of breakers, keyed by (host, endpoint)."""
+    
+    def __init__(self, config: Dict, proxy_manager=None):
+        self.settings = config.get('circuit_breaker') or {}
+        self.enabled = self.settings.get('enabled', True)
+        self.proxy_manager = proxy_manager
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+    
+    def get(self, url: str) -> CircuitBreaker:
+        key = endpoint_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(''.join(key), self.settings, self.proxy_manager)
+        return breaker
+    
+    async def acquire(self, url: str) -> Tuple[Optional[CircuitBreaker], int]:
+        """(breaker, generation) for the URL once a request may go out; (None, 0) when breakers are disabled."""
+        if not self.enabled:
+            return None, 0
+        breaker = self.get(url)
+        return breaker, await breaker.acquire()
+    
+    def get_stats(self) -> Dict:
+        return {breaker.name: dict(breaker.stats, state=breaker.state, paused_seconds=round(breaker.stats['paused_seconds'], 1))
+                for breaker in self._breakers.values()}
+    
+    def print_stats(self):
+        for name, stats in self.get_stats().items():
+            if not stats['opens']:
+                continue
+            print(f"  Circuit {name}: opened {stats['opens']:,}x, paused {stats['paused_seconds']:,}s | "
+                  f"{stats['probes']:,} probes ({stats['failed_probes']:,} failed) | "
+                  f"{stats['failures']:,} failures in {stats['requests']:,} requests | now {stats['state']}")
@@ -0,0 +1,234 @@
+"""
+Clearance broker for the hybrid (HTTP-first) fetcher.
+
+Bot protection (Cloudflare cf_clearance, Akamai _abck/bm_sz, ...) only has to be
+solved once per session: the cookies a real browser earns, sent with the same
+User-Agent from the same proxy exit, let plain HTTP fetch product pages until
+they expire. The broker keeps one clearance (cookies + UA) per retailer and proxy
+exit:
+  - harvested from any browser context that got past the challenge (the
+    scraper's browser fallback page, or a refresh the broker runs itself), or
+    seeded from the latest stored browser session (session_store.py)
+  - handed to the pooled HTTP client as Cookie / User-Agent headers
+  - dropped when a response is a challenge again or after max_age_seconds, and
+    refreshed in the background (BrowserManager) once it is refresh_after_percent old
+
+Settings: CONFIG['hybrid_fetch'].
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Found in Cloudflare / Akamai interstitial challenge pages
+DEFAULT_CHALLENGE_MARKERS = [
+    'cf-browser-verification', 'cf_chl_opt', '/cdn-cgi/challenge-platform', 'Just a moment...',
+    'Checking your browser',
+]
+
+# Challenge pages are small; a full product page is not scanned for markers
+CHALLENGE_SCAN_BYTES = 64 * 1024
+
+# After the session store had nothing usable for a key, don't look again for this long
+STORE_MISS_SECONDS = 30
+
+
+class Clearance:
+    """Cookies and User-Agent one browser session earned on one proxy exit."""
+    
+    def __init__(self, cookies: Dict[str, str], user_agent: str, obtained_at: float = None, session=None):
+        self.cookies = cookies
+        self.user_agent = user_agent
+        self.obtained_at = obtained_at or time.time()
+        self.session = session  # Stored browser session it was seeded from (session_store.py), if any
+        self.uses = 0
+    
+    def cookie_header(self) -> str:
+        return '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+    
+    def age(self) -> float:
+        return time.time() - self.obtained_at
+
+
+class ClearanceBroker:
+    """Per-scraper clearance store plus the browser vs. HTTP split for the summary."""
+    
+    def __init__(self, config: Dict, browser_manager, proxy_manager):
+        self.settings = config.get('hybrid_fetch') or {}
+        self.browser_manager = browser_manager
+        self.proxy_manager = proxy_manager
+        self.session_store = getattr(browser_manager, 'session_store', None)
+        self.max_age = self.settings.get('max_age_seconds', 1200)
+        self.refresh_after = self.max_age * self.settings.get('refresh_after_percent', 80) / 100
+        self._clearances: Dict[Tuple[str, str], Clearance] = {}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._store_misses: Dict[Tuple[str, str], float] = {}  # key -> time the store had nothing
+        
+        self.stats = {
+            'http_pages': 0, 'http_seconds': 0.0,
+            'browser_pages': 0, 'browser_seconds': 0.0,
+            'challenges': 0,       # HTTP answers that were challenges (page went to the browser)
+            'unusable': 0,         # HTTP pages that didn't parse (page went to the browser)
+            'harvested': 0, 'harvest_failed': 0, 'refreshes': 0, 'expired': 0,
+            'from_store': 0,       # Clearances seeded from a stored browser session
+        }
+    
+    def enabled_for(self, retailer: str) -> bool:
+        return retailer in (self.settings.get('retailers') or [])
+    
+    def _key(self, retailer: str) -> Tuple[str, str]:
+        """(retailer, proxy exit) - cookies are only honoured from the exit that earned them."""
+        proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager and self.proxy_manager.is_enabled() else None
+        return retailer, proxy_url or 'direct'
+    
+    async def get(self, retailer: str, url: str, refresh_url: str = None) -> Optional[Clearance]:
+        """
+        Current clearance for this retailer and proxy exit (None if there is none or it expired).
+        Without one in memory, the latest stored browser session's cookies for url are used.
+        """
+        key = self._key(retailer)
+        clearance = self._clearances.get(key)
+        if clearance and clearance.age() > self.max_age:
+            del self._clearances[key]
+            self.stats['expired'] += 1
+            clearance = None
+        if clearance is None and self.session_store:
+            clearance = await self._from_store(key, url)
+        if clearance:
+            clearance.uses += 1
+            if refresh_url and clearance.age() > self.refresh_after and key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(self._refresh(key, refresh_url))
+        return clearance
+    
+    def has(self, retailer: str) -> bool:
+        clearance = self._clearances.get(self._key(retailer))
+        return clearance is not None and clearance.age() <= self.max_age
+    
+    async def _from_store(self, key: Tuple[str, str], url: str) -> Optional[Clearance]:
+        """Clearance from the latest stored session (read off the event loop; misses are cached briefly)."""
+        if time.time() - self._store_misses.get(key, 0) < STORE_MISS_SECONDS:
+            return None
+        retailer, proxy_url = key
+        session = await asyncio.to_thread(self.session_store.latest, retailer, None if proxy_url == 'direct' else proxy_url)
+        cookies = session.cookies_for(url) if session else None
+        clearance = None
+        if cookies and session.user_agent:
+            # Age from the last save - that's when these cookies were current
+            clearance = Clearance(cookies, session.user_agent, obtained_at=session.saved_at, session=session)
+        if clearance is None or clearance.age() > self.max_age:
+            self._store_misses[key] = time.time()
+            return None
+        self._store_misses.pop(key, None)
+        self._clearances[key] = clearance
+        self.stats['from_store'] += 1
+        return clearance
+    
+    def invalidate(self, retailer: str):
+        """Drop the clearance after a challenge (and the stored session it came from)."""
+        clearance = self._clearances.pop(self._key(retailer), None)
+        if clearance and clearance.session and self.session_store:
+            self.session_store.retire(clearance.session)
+    
+    def headers_for(self, clearance: Optional[Clearance], headers: Dict[str, str]) -> Dict[str, str]:
+        """Request headers with the clearance's cookies and matching User-Agent."""
+        if not clearance:
+            return headers
+        headers = dict(headers)
+        headers['User-Agent'] = clearance.user_agent
+        headers['Cookie'] = clearance.cookie_header()
+        return headers
+    
+    def challenge_markers(self, retailer: str) -> List[str]:
+        return (self.settings.get('challenge_markers') or {}).get(retailer) or DEFAULT_CHALLENGE_MARKERS
+    
+    def is_challenge(self, retailer: str, status: int, headers, body: str) -> bool:
+        """
+        True if an HTTP answer is a bot challenge or block page rather than the product
+        page (403/503 from the edge, or a small 200 interstitial carrying a marker).
+        """
+        if status in (403, 503) or headers.get('cf-mitigated') == 'challenge':
+            return True
+        if len(body) > CHALLENGE_SCAN_BYTES:
+            return False
+        return any(marker in body for marker in self.challenge_markers(retailer))
+    
+    async def harvest(self, retailer: str, context, page) -> Optional[Clearance]:
+        """Store the cookies and UA of a browser page that got past the challenge."""
+        try:
+            cookies = {cookie['name']: cookie['value'] for cookie in await context.cookies(page.url)}
+            user_agent = await page.evaluate('navigator.userAgent')
+        except Exception as e:
+            print(f"  ⚠️  Clearance harvest failed for {retailer}: {e}")
+            self.stats['harvest_failed'] += 1
+            return None
+        if not cookies:
+            self.stats['harvest_failed'] += 1
+            return None
+        clearance = Clearance(cookies, user_agent)
+        self._clearances[self._key(retailer)] = clearance
+        self.stats['harvested'] += 1
+        return clearance
+    
+    async def _refresh(self, key: Tuple[str, str], url: str):
+        """Earn a fresh clearance in a throwaway browser context before the current one expires."""
+        retailer = key[0]
+        context = None
+        try:
+            context = await self.browser_manager.create_context(retailer)
+            page = await self.browser_manager.new_page(context)
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            # Challenge pages clear themselves and reload - wait for the marker to go
+            markers = self.challenge_markers(retailer)
+            await page.wait_for_function(
+                '(markers) => document.readyState === "complete" && '
+                '!markers.some((m) => document.documentElement.outerHTML.includes(m))',
+                arg=markers, timeout=self.settings.get('refresh_timeout_ms', 20000), polling=250)
+            await self.browser_manager.save_session(context, page)
+            if await self.harvest(retailer, context, page):
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            print(f"  ⚠️  Clearance refresh failed for {retailer}: {e}")
+            self.stats['harvest_failed'] += 1
+        finally:
+            if context is not None:
+                await self.browser_manager.close_context(context)
+            self._refreshing.pop(key, None)
+    
+    def record_page(self, via: str, seconds: float):
+        """via: 'http' or 'browser'."""
+        self.stats[f'{via}_pages'] += 1
+        self.stats[f'{via}_seconds'] += seconds
+    
+    def get_stats(self) -> Dict:
+        stats = self.stats
+        pages = stats['http_pages'] + stats['browser_pages']
+        avg_ms = lambda via: round(stats[f'{via}_seconds'] / stats[f'{via}_pages'] * 1000) if stats[f'{via}_pages'] else 0
+        busy = stats['http_seconds'] + stats['browser_seconds']
+        return {
+            'pages': pages,
+            'http_pages': stats['http_pages'],
+            'browser_pages': stats['browser_pages'],
+            'http_percent': round(stats['http_pages'] / pages * 100, 1) if pages else 0.0,
+            'http_avg_ms': avg_ms('http'),
+            'browser_avg_ms': avg_ms('browser'),
+            # Pages per second of fetch time (per concurrent slot)
+            'pages_per_slot_second': round(pages / busy, 2) if busy else 0.0,
+            'challenges': stats['challenges'],
+            'unusable': stats['unusable'],
+            'harvested': stats['harvested'],
+            'harvest_failed': stats['harvest_failed'],
+            'refreshes': stats['refreshes'],
+            'expired': stats['expired'],
+            'from_store': stats['from_store'],
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['pages']:
+            return
+        print(f"  Hybrid fetch: HTTP {stats['http_pages']:,} ({stats['http_percent']}%, avg {stats['http_avg_ms']}ms) | "
+              f"browser {stats['browser_pages']:,} (avg {stats['browser_avg_ms']}ms; {stats['challenges']:,} challenges, "
+              f"{stats['unusable']:,} unusable) | {stats['pages_per_slot_second']} pages/s per slot | "
+              f"clearances: {stats['harvested']:,} harvested, {stats['from_store']:,} from stored sessions, "
+              f"{stats['refreshes']:,} refreshed, "
+              f"{stats['harvest_failed']:,} failed")
@@ -50,9 +50,152 @@ CONFIG = {
         'switch_threshold_count': 10  # Or 10+ consecutive failures
     },
     
+    # Fleet coordination - workers lease manifest ranges from a shared coordinator
+    'coordinator': {
+        'url': os.getenv('COORDINATOR_URL'),  # sqlite:///shared/coordinator.db or http://host:8765
+        'chunk_size': int(os.getenv('LEASE_CHUNK_SIZE', '10000')),  # Manifest rows per lease
+        'lease_seconds': int(os.getenv('LEASE_SECONDS', '1800')),  # Re-issued if not renewed in time
+        'poll_seconds': 30,  # Wait between attempts when all ranges are leased by other workers
+    },
+    
+    # Offline benchmarking (see replay.py / mock_server.py)
+    'record_dir': os.getenv('RECORD_HTTP_DIR'),  # Write every request/response pair to this corpus dir
+    'replay_base_url': os.getenv('REPLAY_BASE_URL'),  # e.g. http://127.0.0.1:8899 - route all fetches to mock server
+    
+    # Product page parsing: 'lxml' (fast, needs lxml + cssselect) or 'soup' (BeautifulSoup html.parser)
+    'html_backend': os.getenv('HTML_BACKEND', 'lxml'),
+    # Where page parsing runs: 'inline' (on the event loop) or 'process' (worker pool, one per core by default)
+    'parse_executor': os.getenv('PARSE_EXECUTOR', 'inline'),
+    'parse_workers': int(os.getenv('PARSE_WORKERS', '0')) or None,
+    
+    # Read browser pages with one in-page extraction (JSON-LD, __NEXT_DATA__ fields, price text)
+    # instead of shipping the whole DOM via page.content(); IN_PAGE_EXTRACT=false to turn off
+    'in_page_extract': os.getenv('IN_PAGE_EXTRACT', 'true').lower() == 'true',
+    
+    # Browser page readiness (scrapers/page_readiness.py): after domcontentloaded, proceed as soon
+    # as ANY condition holds - a JSON-LD block, one of the selectors, a response whose URL contains
+    # one of the patterns, or (with challenge_markers) the loaded page showing no challenge.
+    # Selectors/JSON-LD don't count while a challenge marker is on the page. timeout_ms caps the wait.
+    'page_readiness': {
+        'target': {
+            'selectors': ['span[data-test="product-price"]'],
+            'timeout_ms': 10000,
+        },
+        'costco': {
+            'json_ld': True,
+            'selectors': ['h1[itemprop="name"]'],
+            'challenge_markers': ['cf-browser-verification', 'Checking your browser'],
+            'timeout_ms': 15000,
+        },
+        'homegoods': {'json_ld': True, 'selectors': ['h1'], 'timeout_ms': 8000},
+        'tjmaxx': {'json_ld': True, 'selectors': ['h1'], 'timeout_ms': 8000},
+    },
+    
+    # Hybrid fetch (clearance_broker.py): product pages of these retailers go over plain HTTP with
+    # the cookies + User-Agent a browser earned on the same proxy exit; the browser is only used
+    # (and re-harvested) when HTTP gets a challenge. Clearances are dropped after max_age_seconds
+    # and refreshed in the background at refresh_after_percent of that. HYBRID_FETCH="" to turn off.
+    'hybrid_fetch': {
+        'retailers': [r for r in os.getenv('HYBRID_FETCH', 'costco,tjmaxx').split(',') if r],
+        'max_age_seconds': int(os.getenv('CLEARANCE_MAX_AGE', '1200')),
+        'refresh_after_percent': 80,
+        'refresh_timeout_ms': 20000,
+        'challenge_markers': {
+            'costco': ['cf-browser-verification', 'Checking your browser', 'cf_chl_opt', 'Just a moment...'],
+            'tjmaxx': ['Challenge Validation', 'Processing your request', '_Incapsula_Resource'],
+        },
+    },
+    
+    # Browser sessions (session_store.py): storage_state (cookies + localStorage) of contexts that got
+    # a product page is kept per retailer and proxy exit under dir and loaded into new contexts, so
+    # bot checks and consent flows aren't repeated every page/run. A session is retired after
+    # max_uses pages, max_age_seconds, or a challenge. SESSION_DIR="" to turn off.
+    'session_store': {
+        'dir': os.getenv('SESSION_DIR', 'sessions'),
+        'retailers': [r for r in os.getenv('SESSION_STORE', 'costco,tjmaxx').split(',') if r],
+        'max_age_seconds': int(os.getenv('SESSION_MAX_AGE', '21600')),
+        'max_uses': 500,
+        'sessions_per_identity': 4,
+    },
+    
+    # Raw product payloads (redsky JSON, page HTML, in-page JSON-LD) kept gzipped by content hash
+    # with a SQLite index by URL and fetch time (response_cache.py), so `main.py --reparse` can
+    # rebuild products after a parser fix without re-fetching. Off by default (roughly 5-10 KB per
+    # product, i.e. 12-24 GB for 2.4M); RESPONSE_CACHE_DIR=response_cache to turn on.
+    'response_cache': {
+        'dir': os.getenv('RESPONSE_CACHE_DIR', ''),
+        'keep_per_url': int(os.getenv('RESPONSE_CACHE_KEEP', '2')),  # Newest fetches kept per URL
+        'flush_every': 200,  # Index rows written per transaction
+    },
+    
+    # Change-aware refresh (refresh_scheduler.py, `main.py --refresh`): each scrape updates a
+    # per-product change rate; refresh manifests take the `budget` products most likely to have
+    # changed since their last scrape. REFRESH_BUDGET is requests per retailer per refresh run.
+    'refresh': {
+        'budget': {retailer: int(os.getenv('REFRESH_BUDGET', '100000'))
+                   for retailer in ('target', 'costco', 'homegoods', 'tjmaxx')},
+        'prior_changes': 1.0,     # New products start at one change per prior_days
+        'prior_days': 14.0,
+        'due_probability': 0.5,   # next_due_at = when P(changed) reaches this
+        'min_interval_hours': 12, # Never refresh sooner
+        'max_interval_days': 30,  # ...or later than this
+    },
+    
+    # Target location matrix: products rows use the first store (pricing) and first ZIP
+    # (shipping); any further ones are fetched per product into product_locations.
+    # e.g. LOCATION_STORES=2064,1375,3991 LOCATION_ZIPS=50000,10001,94103
+    'locations': {
+        'stores': [s.strip() for s in os.getenv('LOCATION_STORES', '2064').split(',') if s.strip()],
+        'zips': [z.strip() for z in os.getenv('LOCATION_ZIPS', '50000').split(',') if z.strip()],
+        'concurrency': int(os.getenv('LOCATION_CONCURRENCY', '32')),  # Location calls in flight (all products)
+    },
+    
+    # rescrape_incomplete.py: incomplete products are re-fetched concurrently (per-retailer
+    # concurrency above); anything that needs a browser page shares this many slots
+    'rescrape': {
+        'browser_lane': int(os.getenv('RESCRAPE_BROWSER_LANE', '4')),
+    },
+    
     # Retry and timeout settings
-    'retries': 3,
-    'timeout_seconds': 30,
+    'retries': 3,  # Delayed retries per failed product before it goes to dead_letters (retry_queue.py)
+    'retry_queue': {
+        'base_delay_seconds': 5,    # Backoff: base * 2^(attempt-1), upper half jittered
+        'max_delay_seconds': 120,
+        'budget_percent': int(os.getenv('RETRY_BUDGET_PERCENT', '10')),  # Retries <= this % of fresh requests
+        'budget_floor': 20,         # ...plus this many, so small runs can still retry
+    },
+    'browser_lane': {
+        'target': int(os.getenv('TARGET_BROWSER_LANE', '8')),  # Browser fallbacks, outside the API concurrency (0 = inline)
+    },
+    'tombstones': {
+        'ttl_days': float(os.getenv('TOMBSTONE_TTL_DAYS', '7')),  # Not-found products are skipped on resume this long
+    },
+    'hedging': {
+        'enabled': os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true',
+        'hosts': [h for h in os.getenv('HEDGE_HOSTS', 'redsky.target.com').split(',') if h],
+        'quantile': 95,             # Hedge a GET still unanswered at this percentile of recent latency
+        'min_samples': 100,         # Per endpoint, before any hedging
+        'min_delay_ms': 100,
+        'budget_percent': int(os.getenv('HEDGE_BUDGET_PERCENT', '5')),  # Hedges <= this % of requests
+        'holdout_percent': 10,      # Never hedged - the summary's unhedged p99
+        'other_exit': True,         # Send the hedge through the next proxy exit
+    },
+    'circuit_breaker': {
+        'enabled': True,
+        'failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '10')),  # Consecutive 403/429/5xx/timeouts per endpoint
+        'open_seconds': 30,         # Pause before the first probe; doubles after each failed probe
+        'max_open_seconds': 300,
+        'escalate_proxy': True,     # Enable the configured proxy when a breaker opens
+    },
+    'timeout_seconds': 30,          # HTTP read timeout until the endpoint's adapts (timeout_policy.py)
+    'timeouts': {
+        'connect_seconds': 5,
+        'write_seconds': 10,
+        'pool_seconds': 10,         # Waiting for a pooled connection
+        'min_samples': 200,         # Per endpoint, before its read/navigation timeouts adapt
+        'read': {'quantile': 99, 'multiplier': 3, 'floor_seconds': 5, 'ceiling_seconds': 30},
+        'navigation': {'quantile': 99, 'multiplier': 2, 'floor_seconds': 10, 'ceiling_seconds': 60},
+    },
     
     # Memory management for 32GB machine
     'max_memory_percent': 75,  # Use max 75% of RAM (~24GB)
@@ -61,10 +204,12 @@ CONFIG = {
     
     # Database settings (use env var for Render, local path otherwise)
     'database_path': os.getenv('DATABASE_PATH', 'scraper_data.db'),
+    'db_write_batch': int(os.getenv('DB_WRITE_BATCH', '200')),  # Scraped products per write transaction (product_writer.py)
     
     # Export settings (use env vars for Render, local paths otherwise)
     'export_dir': os.getenv('EXPORT_DIR', 'exports'),
     'manifests_dir': os.getenv('MANIFEST_DIR', 'manifests'),
+    'live_export_every': int(os.getenv('LIVE_EXPORT_EVERY', '1000')),  # Items between LIVE_* exports (0 = off)
     
     # User agents for requests (rotated)
     'user_agents': [
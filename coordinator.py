@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Lease-based work coordinator for running one manifest across a fleet of workers.
+
+The manifest is split into fixed row ranges (e.g. 10K ids). Workers lease a range
+for a bounded time, renew the lease while they work, and mark it complete when done.
+Leases that expire (Spot interruption, crashed worker) are handed out again.
+
+Backends:
+  - SQLiteLeaseBackend: a SQLite file on a volume shared by all workers
+  - HTTPLeaseBackend:   talks to `python coordinator.py serve` on one small node
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+import httpx
+
+
+class LeaseBackend(ABC):
+    """Storage for manifest ranges and their leases."""
+    
+    @abstractmethod
+    def register_job(self, job_id: str, total_items: int, chunk_size: int) -> int:
+        """
+        Create the ranges for a job (idempotent).
+        Returns the number of ranges the job has.
+        """
+        pass
+    
+    @abstractmethod
+    def acquire(self, job_id: str, worker_id: str, lease_seconds: int) -> Optional[Dict]:
+        """
+        Lease the next pending (or expired) range.
+        Returns lease dict or None if nothing is available right now.
+        """
+        pass
+    
+    @abstractmethod
+    def renew(self, lease: Dict, lease_seconds: int) -> bool:
+        """Extend a lease. Returns False if the lease was lost (expired and re-issued)."""
+        pass
+    
+    @abstractmethod
+    def complete(self, lease: Dict) -> bool:
+        """Mark a leased range as done."""
+        pass
+    
+    @abstractmethod
+    def release(self, lease: Dict) -> bool:
+        """Give a leased range back (it failed) so the next acquire can take it. False if the lease was lost."""
+        pass
+    
+    @abstractmethod
+    def get_progress(self, job_id: str) -> Dict:
+        """Get range counts for a job: total, pending, leased, expired, done."""
+        pass
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Lease store in a SQLite file (put it on a volume every worker can reach)."""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._init_database()
+    
+    def _init_database(self):
+        """Initialize lease table."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lease_ranges (
+                    job_id TEXT NOT NULL,
+                    range_start INTEGER NOT NULL,
+                    range_end INTEGER NOT NULL,
+                    status TEXT DEFAULT 'pending',  -- pending, leased, done
+                    worker_id TEXT,
+                    lease_token TEXT,
+                    lease_expires_at REAL,
+                    attempts INTEGER DEFAULT 0,
+                    completed_at REAL,
+                    PRIMARY KEY (job_id, range_start)
+                )
+            """)
+            conn.commit()
+    
+    @contextmanager
+    def get_connection(self):
+        """Context manager for database connections."""
+        # Long busy timeout - many workers contend for the same file
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def register_job(self, job_id: str, total_items: int, chunk_size: int) -> int:
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("""
+                INSERT OR IGNORE INTO lease_ranges (job_id, range_start, range_end)
+                VALUES (?, ?, ?)
+            """, [(job_id, start, min(start + chunk_size, total_items))
+                  for start in range(0, total_items, chunk_size)])
+            conn.execute("COMMIT")
+            row = conn.execute("SELECT COUNT(*) FROM lease_ranges WHERE job_id = ?", (job_id,)).fetchone()
+            return row[0]
+    
+    def acquire(self, job_id: str, worker_id: str, lease_seconds: int) -> Optional[Dict]:
+        now = time.time()
+        with self.get_connection() as conn:
+            # IMMEDIATE takes the write lock up front so two workers can't grab the same range
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("""
+                    SELECT range_start, range_end, attempts FROM lease_ranges
+                    WHERE job_id = ?
+                      AND (status = 'pending' OR (status = 'leased' AND lease_expires_at < ?))
+                    ORDER BY range_start
+                    LIMIT 1
+                """, (job_id, now)).fetchone()
+                
+                if not row:
+                    conn.execute("COMMIT")
+                    return None
+                
+                lease = {
+                    'job_id': job_id,
+                    'range_start': row['range_start'],
+                    'range_end': row['range_end'],
+                    'worker_id': worker_id,
+                    'lease_token': uuid.uuid4().hex,
+                    'expires_at': now + lease_seconds,
+                    'attempts': row['attempts'] + 1,
+                }
+                conn.execute("""
+                    UPDATE lease_ranges
+                    SET status = 'leased', worker_id = ?, lease_token = ?,
+                        lease_expires_at = ?, attempts = ?
+                    WHERE job_id = ? AND range_start = ?
+                """, (worker_id, lease['lease_token'], lease['expires_at'], lease['attempts'],
+                      job_id, lease['range_start']))
+                conn.execute("COMMIT")
+                return lease
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def renew(self, lease: Dict, lease_seconds: int) -> bool:
+        expires_at = time.time() + lease_seconds
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE lease_ranges SET lease_expires_at = ?
+                WHERE job_id = ? AND range_start = ? AND lease_token = ? AND status = 'leased'
+            """, (expires_at, lease['job_id'], lease['range_start'], lease['lease_token']))
+            if cursor.rowcount:
+                lease['expires_at'] = expires_at
+                return True
+            return False
+    
+    def complete(self, lease: Dict) -> bool:
+        # Completion is accepted even if the lease was re-issued meanwhile:
+        # the work is done, and product-level resume dedupes any overlap.
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE lease_ranges SET status = 'done', completed_at = ?, worker_id = ?
+                WHERE job_id = ? AND range_start = ? AND status != 'done'
+            """, (time.time(), lease['worker_id'], lease['job_id'], lease['range_start']))
+            return cursor.rowcount > 0
+    
+    def release(self, lease: Dict) -> bool:
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE lease_ranges SET status = 'pending', worker_id = NULL, lease_token = NULL, lease_expires_at = NULL
+                WHERE job_id = ? AND range_start = ? AND lease_token = ? AND status = 'leased'
+            """, (lease['job_id'], lease['range_start'], lease['lease_token']))
+            return cursor.rowcount > 0
+    
+    def get_progress(self, job_id: str) -> Dict:
+        now = time.time()
+        with self.get_connection() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS total,
+                       SUM(status = 'pending') AS pending,
+                       SUM(status = 'leased' AND lease_expires_at >= ?) AS leased,
+                       SUM(status = 'leased' AND lease_expires_at < ?) AS expired,
+                       SUM(status = 'done') AS done
+                FROM lease_ranges WHERE job_id = ?
+            """, (now, now, job_id)).fetchone()
+            return {key: row[key] or 0 for key in ('total', 'pending', 'leased', 'expired', 'done')}
+
+
+class HTTPLeaseBackend(LeaseBackend):
+    """Client for a coordinator started with `python coordinator.py serve`."""
+    
+    RETRIES = 3  # Attempts after a 503 (coordinator busy), 1s apart, doubling
+    
+    def __init__(self, base_url: str, timeout: float = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+    
+    def _send(self, method: str, path: str, **kwargs):
+        for attempt in range(self.RETRIES + 1):
+            response = httpx.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            if response.status_code != 503 or attempt == self.RETRIES:
+                break
+            time.sleep(2 ** attempt)
+        response.raise_for_status()
+        return response.json()
+    
+    def _post(self, path: str, payload: Dict):
+        return self._send('POST', path, json=payload)
+    
+    def register_job(self, job_id: str, total_items: int, chunk_size: int) -> int:
+        return self._post('/jobs', {'job_id': job_id, 'total_items': total_items, 'chunk_size': chunk_size})['ranges']
+    
+    def acquire(self, job_id: str, worker_id: str, lease_seconds: int) -> Optional[Dict]:
+        return self._post('/acquire', {'job_id': job_id, 'worker_id': worker_id, 'lease_seconds': lease_seconds})['lease']
+    
+    def renew(self, lease: Dict, lease_seconds: int) -> bool:
+        result = self._post('/renew', {'lease': lease, 'lease_seconds': lease_seconds})
+        if result['ok']:
+            lease['expires_at'] = result['expires_at']
+        return result['ok']
+    
+    def complete(self, lease: Dict) -> bool:
+        return self._post('/complete', {'lease': lease})['ok']
+    
+    def release(self, lease: Dict) -> bool:
+        return self._post('/release', {'lease': lease})['ok']
+    
+    def get_progress(self, job_id: str) -> Dict:
+        return self._send('GET', '/progress', params={'job_id': job_id})
+
+
+def get_lease_backend(url: str) -> LeaseBackend:
+    """Build a backend from a coordinator URL: sqlite:///path/to.db or http://host:port."""
+    if url.startswith('http://') or url.startswith('https://'):
+        return HTTPLeaseBackend(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteLeaseBackend(url[len('sqlite:///'):])
+    return SQLiteLeaseBackend(url)
+
+
+def default_worker_id() -> str:
+    """Worker identity: hostname + PID (unique per process across the fleet)."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def make_handler(backend: LeaseBackend):
+    """Build an HTTP request handler that serves the lease API from a local backend."""
+    
+    class LeaseRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, payload, status: int = 200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path != '/progress':
+                self._send_json({'error': 'not found'}, 404)
+                return
+            try:
+                job_id = parse_qs(parsed.query).get('job_id', [''])[0]
+                self._send_json(backend.get_progress(job_id))
+            except Exception as e:
+                print(f"[COORDINATOR] ⚠️  {self.path} failed: {type(e).__name__}: {e}")
+                self._send_json({'error': f'{type(e).__name__}: {e}'}, 503)
+        
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            
+            try:
+                if self.path == '/jobs':
+                    ranges = backend.register_job(payload['job_id'], payload['total_items'], payload['chunk_size'])
+                    self._send_json({'ranges': ranges})
+                elif self.path == '/acquire':
+                    lease = backend.acquire(payload['job_id'], payload['worker_id'], payload['lease_seconds'])
+                    self._send_json({'lease': lease})
+                elif self.path == '/renew':
+                    lease = payload['lease']
+                    ok = backend.renew(lease, payload['lease_seconds'])
+                    self._send_json({'ok': ok, 'expires_at': lease.get('expires_at')})
+                elif self.path == '/complete':
+                    self._send_json({'ok': backend.complete(payload['lease'])})
+                elif self.path == '/release':
+                    self._send_json({'ok': backend.release(payload['lease'])})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+            except KeyError as e:
+                self._send_json({'error': f'missing field {e}'}, 400)
+            except Exception as e:
+                # e.g. "database is locked" under contention - 503 tells the client to retry
+                print(f"[COORDINATOR] ⚠️  {self.path} failed: {type(e).__name__}: {e}")
+                self._send_json({'error': f'{type(e).__name__}: {e}'}, 503)
+        
+        def log_message(self, format, *args):
+            pass  # Keep worker logs readable - lease traffic is noisy
+    
+    return LeaseRequestHandler
+
+
+def serve(db_path: str, host: str = '0.0.0.0', port: int = 8765):
+    """Run the HTTP coordinator (backed by a local SQLite file for durability)."""
+    backend = SQLiteLeaseBackend(db_path)
+    server = ThreadingHTTPServer((host, port), make_handler(backend))
+    print(f"[COORDINATOR] Serving leases on http://{host}:{port} (state: {db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def print_status(url: str, job_id: str):
+    """Print range progress for a job."""
+    progress = get_lease_backend(url).get_progress(job_id)
+    total = progress['total'] or 1
+    print(f"Job: {job_id}")
+    print(f"  Ranges: {progress['total']:,}")
+    print(f"  Done: {progress['done']:,} ({progress['done'] / total * 100:.1f}%)")
+    print(f"  Leased: {progress['leased']:,}")
+    print(f"  Expired (will be re-issued): {progress['expired']:,}")
+    print(f"  Pending: {progress['pending']:,}")
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Lease coordinator for multi-node scraping')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    serve_parser = subparsers.add_parser('serve', help='Run the HTTP coordinator')
+    serve_parser.add_argument('--db', default='coordinator.db', help='SQLite file for lease state')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    
+    status_parser = subparsers.add_parser('status', help='Show job progress')
+    status_parser.add_argument('--coordinator', required=True, help='sqlite:///path.db or http://host:port')
+    status_parser.add_argument('--job', required=True, help='Job ID (retailer:manifest file name)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'serve':
+        serve(args.db, args.host, args.port)
+    elif args.command == 'status':
+        print_status(args.coordinator, args.job)
+    else:
+        parser.print_help()
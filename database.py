@@ -2,17 +2,33 @@
 Database schema and operations for SQLite storage.
 """
 
+import hashlib
 import sqlite3
 import json
+import time
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from contextlib import contextmanager
 
+from models import ProductRecord, PRODUCT_COLUMNS
+from refresh_scheduler import observe
+
 
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, refresh_settings: Dict = None):
         self.db_path = db_path
+        self.refresh_settings = refresh_settings or {}  # CONFIG['refresh'], for product_change_stats
+        self.write_stats = {
+            'products_written': 0,    # Full products rows written (new or changed content)
+            'products_unchanged': 0,  # Re-scrapes with identical content - row left as is
+            'fulfillment_updates': 0, # ...of which only shipping/availability changed and were updated
+            'observations': 0,        # product_observations rows appended
+            'content_bytes_written': 0,  # Hashed row content of the rows written...
+            'content_bytes_skipped': 0,  # ...and of the unchanged ones (a full-row rewrite would write both)
+        }
         self._init_database()
+        self.initial_bytes = self.storage_bytes()
     
     def _init_database(self):
         """Initialize database with schema."""
@@ -101,6 +117,94 @@ class Database:
                 )
             """)
             
+            # Hash of the row's content (all columns but scraped_at/scrape_run_id) - unchanged
+            # re-scrapes skip the products write
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(products)")}
+            if 'content_hash' not in columns:
+                cursor.execute("ALTER TABLE products ADD COLUMN content_hash TEXT")
+            
+            # Append-only price/availability/shipping history: a row per scrape that changed any of them
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS product_observations (
+                    product_id TEXT NOT NULL,
+                    scraped_at TIMESTAMP NOT NULL,
+                    retailer TEXT NOT NULL,
+                    price_current REAL,
+                    price_compare_at REAL,
+                    availability TEXT,
+                    shipping_cost REAL,
+                    shipping_estimate TEXT,
+                    scrape_run_id INTEGER,
+                    PRIMARY KEY (product_id, scraped_at)
+                ) WITHOUT ROWID
+            """)
+            
+            # Products that failed every retry (or that the retry budget couldn't cover) - retry_queue.py
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    retailer TEXT,
+                    product_id TEXT,
+                    product_url TEXT,
+                    error_class TEXT,
+                    error_message TEXT,
+                    attempts INTEGER,
+                    reason TEXT,  -- 'max_attempts' or 'retry_budget'
+                    scrape_run_id INTEGER,
+                    timestamp TIMESTAMP
+                )
+            """)
+            
+            # Known-dead product IDs (not found / empty payload), skipped on resume until the TTL runs out; epoch seconds
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tombstones (
+                    retailer TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    reason TEXT,
+                    first_seen_at REAL,
+                    last_seen_at REAL,
+                    hits INTEGER DEFAULT 1,
+                    PRIMARY KEY (retailer, product_id)
+                ) WITHOUT ROWID
+            """)
+            
+            # Location matrix (Target): one row per product and store (prices) or ZIP (shipping)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS product_locations (
+                    product_id TEXT NOT NULL,
+                    location_type TEXT NOT NULL,  -- 'store' or 'zip'
+                    location_id TEXT NOT NULL,
+                    price_current REAL,
+                    price_compare_at REAL,
+                    shipping_cost REAL,
+                    shipping_estimate TEXT,
+                    availability TEXT,
+                    scraped_at TIMESTAMP,
+                    PRIMARY KEY (product_id, location_type, location_id)
+                ) WITHOUT ROWID
+            """)
+            
+            # Per-product change history for refresh scheduling (refresh_scheduler.py); times are epoch seconds
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS product_change_stats (
+                    product_id TEXT PRIMARY KEY,
+                    retailer TEXT NOT NULL,
+                    observations INTEGER DEFAULT 0,
+                    changes INTEGER DEFAULT 0,
+                    price_changes INTEGER DEFAULT 0,
+                    availability_changes INTEGER DEFAULT 0,
+                    observed_days REAL DEFAULT 0,
+                    last_price REAL,
+                    last_availability TEXT,
+                    first_seen_at REAL,
+                    last_scraped_at REAL,
+                    last_changed_at REAL,
+                    change_rate REAL,
+                    next_due_at REAL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_stats_due ON product_change_stats (retailer, next_due_at)")
+            
             conn.commit()
     
     @contextmanager
@@ -133,32 +237,190 @@ class Database:
             cursor.execute(query, list(kwargs.values()) + [run_id])
             conn.commit()
     
-    def insert_product(self, product_data: Dict[str, Any]):
-        """Insert or update a product record."""
+    # Built once from the record's field order instead of from each product's keys
+    INSERT_PRODUCT_SQL = (
+        f"INSERT OR REPLACE INTO products ({', '.join(PRODUCT_COLUMNS)}, content_hash) "
+        f"VALUES ({', '.join('?' for _ in PRODUCT_COLUMNS)}, ?)"
+    )
+    _JSON_COLUMN_INDEXES = tuple(PRODUCT_COLUMNS.index(c) for c in ('specifications', 'image_urls', 'variants'))
+    _SCRAPED_AT_INDEX = PRODUCT_COLUMNS.index('scraped_at')
+    
+    # Shipping and stock move far more often than the rest of a product (Target's shipping_estimate
+    # is a delivery date that changes almost daily), so they are left out of the content hash and
+    # updated in place; product_observations keeps their history
+    FULFILLMENT_COLUMNS = ('shipping_cost', 'shipping_estimate', 'availability')
+    _HASHED_COLUMN_INDEXES = tuple(sorted(
+        PRODUCT_COLUMNS.index(c) for c in set(PRODUCT_COLUMNS).difference(('scraped_at', 'scrape_run_id'), FULFILLMENT_COLUMNS)
+    ))
+    UPDATE_FULFILLMENT_SQL = (
+        f"UPDATE products SET {', '.join(f'{c} = ?' for c in FULFILLMENT_COLUMNS)} WHERE product_id = ?"
+    )
+    # What the fulfillment API alone can refresh (update_fulfillment)
+    SHIPPING_COLUMNS = ('shipping_cost', 'shipping_estimate')
+    
+    # Fields whose changes are kept in product_observations
+    OBSERVED_COLUMNS = ('price_current', 'price_compare_at', 'availability', 'shipping_cost', 'shipping_estimate')
+    INSERT_OBSERVATION_SQL = (
+        f"INSERT OR REPLACE INTO product_observations "
+        f"(product_id, scraped_at, retailer, {', '.join(OBSERVED_COLUMNS)}, scrape_run_id) "
+        f"VALUES (?, ?, ?, {', '.join('?' for _ in OBSERVED_COLUMNS)}, ?)"
+    )
+    
+    UPSERT_CHANGE_STATS_SQL = """
+        INSERT OR REPLACE INTO product_change_stats (
+            product_id, retailer, observations, changes, price_changes, availability_changes, observed_days,
+            last_price, last_availability, first_seen_at, last_scraped_at, last_changed_at, change_rate, next_due_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    def insert_product(self, product: Union[ProductRecord, Dict[str, Any]]):
+        """Insert or update one product record (see insert_products)."""
+        self.insert_products([product])
+    
+    def insert_products(self, products: List[Union[ProductRecord, Dict[str, Any]]]):
+        """
+        Insert or update product records in one transaction, with their change history.
+        
+        The products row is only rewritten when its content hash changed (an unchanged
+        re-scrape keeps the earlier scraped_at/scrape_run_id; product_change_stats has the
+        latest scrape time). FULFILLMENT_COLUMNS aren't hashed: when only they changed, just
+        they are updated. A product_observations row is appended on first sight and
+        whenever an OBSERVED_COLUMNS value changed. The stored rows the batch is compared
+        with are read up front, a few hundred IDs per query.
+        """
+        products = [ProductRecord.from_dict(p) if isinstance(p, dict) else p for p in products]
+        ids = [product.product_id for product in products]
+        # A product scraped twice in one batch is compared with what its first write left
+        repeated = {product_id for product_id, count in Counter(ids).items() if count > 1}
+        now = time.time()
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Convert complex types to JSON strings
-            if 'specifications' in product_data and isinstance(product_data['specifications'], (dict, list)):
-                product_data['specifications'] = json.dumps(product_data['specifications'])
-            if 'image_urls' in product_data and isinstance(product_data['image_urls'], list):
-                product_data['image_urls'] = json.dumps(product_data['image_urls'])
-            if 'variants' in product_data and isinstance(product_data['variants'], (dict, list)):
-                product_data['variants'] = json.dumps(product_data['variants'])
-            
-            # Set scraped_at if not present
-            if 'scraped_at' not in product_data:
-                product_data['scraped_at'] = datetime.now()
-            
-            columns = ', '.join(product_data.keys())
-            placeholders = ', '.join(['?' for _ in product_data])
-            
-            cursor.execute(f"""
-                INSERT OR REPLACE INTO products ({columns})
-                VALUES ({placeholders})
-            """, list(product_data.values()))
+            stored, previous = self._stored_state(conn, ids)
+            for product in products:
+                product_id = product.product_id
+                self._write_product(conn, product, stored.get(product_id), previous.get(product_id), now)
+                if product_id in repeated:
+                    stored_now, previous_now = self._stored_state(conn, [product_id])
+                    stored.update(stored_now)
+                    previous.update(previous_now)
+            conn.commit()
+    
+    # IDs per IN (...) query (SQLite's variable limit is 999 on older builds)
+    STATE_QUERY_IDS = 500
+    
+    def _stored_state(self, conn, ids: List[str]) -> Tuple[Dict[str, sqlite3.Row], Dict[str, sqlite3.Row]]:
+        """({product_id: content_hash + OBSERVED_COLUMNS}, {product_id: product_change_stats row}) for ids."""
+        stored, previous = {}, {}
+        ids = list(dict.fromkeys(ids))
+        for i in range(0, len(ids), self.STATE_QUERY_IDS):
+            chunk = ids[i:i + self.STATE_QUERY_IDS]
+            marks = ', '.join('?' for _ in chunk)
+            for row in conn.execute(f"SELECT product_id, content_hash, {', '.join(self.OBSERVED_COLUMNS)} "
+                                    f"FROM products WHERE product_id IN ({marks})", chunk):
+                stored[row['product_id']] = row
+            for row in conn.execute(f"SELECT * FROM product_change_stats WHERE product_id IN ({marks})", chunk):
+                previous[row['product_id']] = row
+        return stored, previous
+    
+    def _write_product(self, conn, product: ProductRecord, stored: Optional[sqlite3.Row],
+                       previous: Optional[sqlite3.Row], now: float):
+        """One product's writes for insert_products, against its stored row and change stats."""
+        row = self._product_row(product)
+        content = self._row_content(row)
+        content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        
+        if stored is not None and stored['content_hash'] == content_hash:
+            self.write_stats['products_unchanged'] += 1
+            self.write_stats['content_bytes_skipped'] += len(content)
+            fulfillment = [getattr(product, column) for column in self.FULFILLMENT_COLUMNS]
+            if fulfillment != [stored[column] for column in self.FULFILLMENT_COLUMNS]:
+                conn.execute(self.UPDATE_FULFILLMENT_SQL, fulfillment + [product.product_id])
+                self.write_stats['fulfillment_updates'] += 1
+        else:
+            conn.execute(self.INSERT_PRODUCT_SQL, row + [content_hash])
+            self.write_stats['products_written'] += 1
+            self.write_stats['content_bytes_written'] += len(content)
+        
+        observed = [getattr(product, column) for column in self.OBSERVED_COLUMNS]
+        if stored is None or stored['content_hash'] is None or observed != [stored[column] for column in self.OBSERVED_COLUMNS]:
+            conn.execute(self.INSERT_OBSERVATION_SQL, [
+                product.product_id, row[self._SCRAPED_AT_INDEX], product.retailer,
+                *observed, product.scrape_run_id
+            ])
+            self.write_stats['observations'] += 1
+        
+        conn.execute(self.UPSERT_CHANGE_STATS_SQL, observe(previous, product, now, self.refresh_settings))
+    
+    # Re-parsed rows keep the scrape run that fetched them
+    UPSERT_REPARSED_SQL = (
+        f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}, content_hash) "
+        f"VALUES ({', '.join('?' for _ in PRODUCT_COLUMNS)}, ?) "
+        f"ON CONFLICT(product_id) DO UPDATE SET "
+        + ', '.join(f"{c} = excluded.{c}" for c in PRODUCT_COLUMNS + ('content_hash',)
+                    if c not in ('product_id', 'scrape_run_id'))
+    )
+    
+    def upsert_reparsed_products(self, products: List[ProductRecord]):
+        """Write re-parsed products in one transaction (main.py --reparse)."""
+        rows = [self._product_row(product) for product in products]
+        with self.get_connection() as conn:
+            conn.executemany(self.UPSERT_REPARSED_SQL, [row + [self._content_hash(row)] for row in rows])
             conn.commit()
     
+    @classmethod
+    def _product_row(cls, product: ProductRecord) -> list:
+        """Column values for the insert, with complex types as JSON strings."""
+        row = [getattr(product, column) for column in PRODUCT_COLUMNS]
+        for i in cls._JSON_COLUMN_INDEXES:
+            if isinstance(row[i], (dict, list)):
+                row[i] = json.dumps(row[i])
+        if row[cls._SCRAPED_AT_INDEX] is None:
+            row[cls._SCRAPED_AT_INDEX] = datetime.now()
+        return row
+    
+    @classmethod
+    def _row_content(cls, row: list) -> str:
+        """A products row's content as JSON, without when and by which run it was scraped."""
+        return json.dumps([row[i] for i in cls._HASHED_COLUMN_INDEXES], default=str)
+    
+    @classmethod
+    def _content_hash(cls, row: list) -> str:
+        """Hash of a products row's content, ignoring when and by which run it was scraped."""
+        return hashlib.sha1(cls._row_content(row).encode('utf-8')).hexdigest()
+    
+    def storage_bytes(self) -> int:
+        """Size of the database file (pages in use and free)."""
+        with self.get_connection() as conn:
+            return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    
+    def get_write_stats(self) -> Dict:
+        stats = self.write_stats
+        scrapes = stats['products_written'] + stats['products_unchanged']
+        content_bytes = stats['content_bytes_written'] + stats['content_bytes_skipped']
+        size = self.storage_bytes()
+        return dict(
+            stats,
+            unchanged_percent=round(stats['products_unchanged'] / scrapes * 100, 1) if scrapes else 0.0,
+            # Row content written vs. what rewriting every scraped row (INSERT OR REPLACE) would write
+            content_mb_written=round(stats['content_bytes_written'] / 1e6, 1),
+            content_mb_full_rewrite=round(content_bytes / 1e6, 1),
+            storage_mb=round(size / 1e6, 1),
+            storage_growth_mb=round((size - self.initial_bytes) / 1e6, 1),
+            growth_bytes_per_scrape=round((size - self.initial_bytes) / scrapes) if scrapes else 0,
+        )
+    
+    def print_write_stats(self):
+        stats = self.get_write_stats()
+        if not (stats['products_written'] or stats['products_unchanged']):
+            return
+        print(f"  DB writes: {stats['products_written']:,} product rows written | "
+              f"{stats['products_unchanged']:,} unchanged skipped ({stats['unchanged_percent']}%, "
+              f"{stats['fulfillment_updates']:,} with shipping/stock updated) | "
+              f"{stats['observations']:,} history rows")
+        print(f"  DB volume: {stats['content_mb_written']:,} MB of row content written "
+              f"(vs {stats['content_mb_full_rewrite']:,} MB rewriting every row) | "
+              f"file {stats['storage_mb']:,} MB, +{stats['storage_growth_mb']:,} MB since start "
+              f"({stats['growth_bytes_per_scrape']:,} bytes per scrape)")
+    
     def insert_enumeration_count(self, retailer: str, method: str, count: int, notes: str = None):
         """Record enumeration count for proof of completeness."""
         with self.get_connection() as conn:
@@ -182,6 +444,38 @@ class Database:
                   html_snapshot, datetime.now(), scrape_run_id))
             conn.commit()
     
+    def add_dead_letter(self, retailer: str, product_id: str, product_url: str, error_class: str,
+                        error_message: str, attempts: int, reason: str, scrape_run_id: int):
+        """Record a product that won't be retried again in this run."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO dead_letters
+                (retailer, product_id, product_url, error_class, error_message, attempts, reason, scrape_run_id, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (retailer, product_id, product_url, error_class, error_message, attempts, reason,
+                  scrape_run_id, datetime.now()))
+            conn.commit()
+    
+    def add_tombstone(self, retailer: str, product_id: str, reason: str):
+        """Record (or re-confirm) a product that doesn't exist any more."""
+        now = time.time()
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO tombstones (retailer, product_id, reason, first_seen_at, last_seen_at, hits)
+                VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT (retailer, product_id) DO UPDATE SET
+                    reason = excluded.reason, last_seen_at = excluded.last_seen_at, hits = hits + 1
+            """, (retailer, product_id, reason, now, now))
+            conn.commit()
+    
+    def get_tombstoned(self, retailer: str, ttl_days: float) -> set:
+        """Product IDs confirmed dead within the last ttl_days."""
+        with self.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT product_id FROM tombstones WHERE retailer = ? AND last_seen_at >= ?
+            """, (retailer, time.time() - ttl_days * 86400))
+            return {row[0] for row in rows}
+    
     def log_incomplete_product(self, product_id: str, retailer: str, product_url: str, 
                                missing_fields: List[str], scrape_run_id: int):
         """Track products with missing critical data for later re-scraping."""
@@ -215,6 +509,100 @@ class Database:
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
+    def upsert_product_locations(self, rows: List[Tuple]):
+        """Replace a product's location matrix rows (Target location fan-out)."""
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO product_locations
+                (product_id, location_type, location_id, price_current, price_compare_at,
+                 shipping_cost, shipping_estimate, availability, scraped_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+    
+    def mark_rescrape_attempted(self, product_id: str, missing_fields: List[str]):
+        """Record a re-scrape that left the product incomplete (skipped when rescrape_incomplete.py resumes)."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                UPDATE incomplete_products SET missing_fields = ?, rescrape_attempted = 1
+                WHERE product_id = ?
+            """, (json.dumps(missing_fields), product_id))
+            conn.commit()
+    
+    def resolve_incomplete_product(self, product_id: str):
+        """Drop a product from incomplete_products once it has all critical fields."""
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM incomplete_products WHERE product_id = ?", (product_id,))
+            conn.commit()
+    
+    def get_product(self, product_id: str) -> Optional[ProductRecord]:
+        """Stored products row as a ProductRecord (JSON columns left as stored strings)."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT * FROM products WHERE product_id = ?", (product_id,)).fetchone()
+        return ProductRecord.from_dict(dict(row)) if row else None
+    
+    def iter_product_keys(self, retailer: str, chunk_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """
+        (product_id, product_url) of a retailer's successfully scraped products, read in
+        short keyset-paged queries so no read transaction stays open between chunks.
+        """
+        last_id = ''
+        while True:
+            with self.get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT product_id, product_url FROM products
+                    WHERE retailer = ? AND status = 'success' AND product_id > ?
+                    ORDER BY product_id LIMIT ?
+                """, (retailer, last_id, chunk_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0], row[1]
+            last_id = rows[-1][0]
+    
+    def update_fulfillment(self, updates: List[Tuple[str, Dict]], scrape_run_id: int = None) -> int:
+        """
+        Write refreshed shipping values for a batch of products in one transaction. Only changed
+        rows are updated, and each change is appended to product_observations. Returns the
+        number of products changed.
+        
+        availability is left as stored: full scrapes take it from the pdp's store-level stock,
+        which the fulfillment API doesn't report, so refreshing it here would flip it between two
+        definitions. With price and availability untouched, product_change_stats has nothing new
+        to count, and content_hash doesn't cover shipping, so it stays valid (a later full scrape
+        compares the shipping columns directly).
+        """
+        if not updates:
+            return 0
+        scraped_at = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            stored = {row['product_id']: row for row in conn.execute(
+                f"SELECT product_id, retailer, {', '.join(self.OBSERVED_COLUMNS)} FROM products "
+                f"WHERE product_id IN ({', '.join('?' for _ in updates)})",
+                [product_id for product_id, _ in updates]
+            )}
+            changed = []
+            for product_id, fields in updates:
+                row = stored.get(product_id)
+                if row is None:
+                    continue
+                values = dict(row)
+                values.update({column: fields[column] for column in self.SHIPPING_COLUMNS})
+                if any(values[column] != row[column] for column in self.SHIPPING_COLUMNS):
+                    changed.append((product_id, values))
+            
+            conn.executemany(
+                self.UPDATE_FULFILLMENT_SQL,
+                [[values[c] for c in self.FULFILLMENT_COLUMNS] + [product_id] for product_id, values in changed]
+            )
+            conn.executemany(self.INSERT_OBSERVATION_SQL, [
+                [product_id, scraped_at, values['retailer'], *(values[c] for c in self.OBSERVED_COLUMNS), scrape_run_id]
+                for product_id, values in changed
+            ])
+            conn.commit()
+        self.write_stats['observations'] += len(changed)
+        return len(changed)
+    
     def get_products_by_retailer(self, retailer: str) -> List[Dict]:
         """Get all products for a retailer."""
         with self.get_connection() as conn:
@@ -265,3 +653,70 @@ class Database:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+    
+    # How merge_from combines rows that both databases have: the newer one wins (products,
+    # locations, change stats), tombstones add up, and history and logs are appended
+    MERGE_TABLES = (
+        ('products', 'product_id', 'scraped_at'),
+        ('product_locations', 'product_id, location_type, location_id', 'scraped_at'),
+        ('product_change_stats', 'product_id', 'last_scraped_at'),
+        ('incomplete_products', 'product_id', 'scraped_at'),
+        ('product_observations', None, None),
+        ('errors', None, None),
+        ('dead_letters', None, None),
+        ('enumeration_counts', None, None),
+    )
+    
+    def merge_from(self, source_path: str) -> Dict[str, int]:
+        """
+        Merge another scraper database (e.g. one fleet worker's DATABASE_PATH) into this one.
+        Its scrape runs get new IDs, and rows that point at them follow. Merge each source once:
+        appended tables (history, errors, dead letters) aren't de-duplicated.
+        Returns the number of source rows per table.
+        """
+        Database(source_path)  # Bring an older source up to the current schema
+        merged = {}
+        with self.get_connection() as conn:
+            conn.execute("ATTACH DATABASE ? AS src", (source_path,))
+            try:
+                run_offset = conn.execute("SELECT COALESCE(MAX(id), 0) FROM main.scrape_runs").fetchone()[0]
+                columns = self._table_columns(conn, 'scrape_runs')
+                conn.execute(f"INSERT INTO main.scrape_runs ({', '.join(columns)}) "
+                             f"SELECT {self._merge_select(columns, run_offset)} FROM src.scrape_runs")
+                merged['scrape_runs'] = conn.execute("SELECT COUNT(*) FROM src.scrape_runs").fetchone()[0]
+                
+                for table, key, newer in self.MERGE_TABLES:
+                    columns = [c for c in self._table_columns(conn, table) if not (key is None and c == 'id')]
+                    select = f"SELECT {self._merge_select(columns, run_offset)} FROM src.{table} WHERE true"
+                    if key is None:
+                        conn.execute(f"INSERT OR IGNORE INTO main.{table} ({', '.join(columns)}) {select}")
+                    else:
+                        updates = ', '.join(f"{c} = excluded.{c}" for c in columns if c not in key.split(', '))
+                        conn.execute(f"INSERT INTO main.{table} ({', '.join(columns)}) {select} "
+                                     f"ON CONFLICT ({key}) DO UPDATE SET {updates} "
+                                     f"WHERE excluded.{newer} >= {newer} OR {newer} IS NULL")
+                    merged[table] = conn.execute(f"SELECT COUNT(*) FROM src.{table}").fetchone()[0]
+                
+                conn.execute("""
+                    INSERT INTO main.tombstones (retailer, product_id, reason, first_seen_at, last_seen_at, hits)
+                    SELECT retailer, product_id, reason, first_seen_at, last_seen_at, hits FROM src.tombstones WHERE true
+                    ON CONFLICT (retailer, product_id) DO UPDATE SET
+                        first_seen_at = MIN(first_seen_at, excluded.first_seen_at),
+                        last_seen_at = MAX(last_seen_at, excluded.last_seen_at),
+                        reason = CASE WHEN excluded.last_seen_at > last_seen_at THEN excluded.reason ELSE reason END,
+                        hits = hits + excluded.hits
+                """)
+                merged['tombstones'] = conn.execute("SELECT COUNT(*) FROM src.tombstones").fetchone()[0]
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE src")
+        return merged
+    
+    @staticmethod
+    def _table_columns(conn, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+    
+    @staticmethod
+    def _merge_select(columns: List[str], run_offset: int) -> str:
+        """Select list for copying src rows, with scrape run IDs moved past this database's runs."""
+        return ', '.join(f"{c} + {run_offset}" if c in ('id', 'scrape_run_id') and run_offset else c for c in columns)
@@ -0,0 +1,200 @@
+"""
+Hedged requests for endpoints with a slow tail (redsky).
+
+Latencies are tracked per host and endpoint (circuit_breaker.endpoint_key). Once an
+endpoint has min_samples, a GET that hasn't answered by its recent p`quantile` latency
+gets a duplicate (through another proxy exit when there is one); the first answer
+wins and the other request is cancelled. Hedges are capped at budget_percent of
+requests, so a slow endpoint costs at most that much extra load.
+
+To report what hedging buys, a random holdout_percent of requests is never hedged:
+the summary compares their p99 with the p99 of the requests that ran with a hedge
+delay. Requests before min_samples, or over the budget, are in neither. The duplicate
+waits at the scraper's rate limiter like any other request.
+
+Settings: CONFIG['hedging'] (off unless HEDGE_REQUESTS=true).
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from circuit_breaker import endpoint_key
+
+# Histogram buckets grow 5% each, from 1ms
+BUCKET_GROWTH = 1.05
+LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+class LatencyHistogram:
+    """Fixed-memory latency distribution (5% resolution)."""
+    
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+    
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        bucket = int(math.log(ms) / LOG_GROWTH) + 1 if ms > 1 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+    
+    def quantile_ms(self, q: float) -> float:
+        """Upper edge of the bucket holding quantile q (0-1)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return BUCKET_GROWTH ** bucket
+        return BUCKET_GROWTH ** max(self.buckets)
+
+
+class RollingLatency:
+    """The last `window` latencies, with percentiles recomputed every RECOMPUTE_EVERY samples."""
+    
+    RECOMPUTE_EVERY = 50
+    
+    def __init__(self, window: int):
+        self.recent = deque(maxlen=window)
+        self._quantiles: Dict[float, float] = {}
+        self._since_recompute = 0
+    
+    def __len__(self) -> int:
+        return len(self.recent)
+    
+    def add(self, seconds: float):
+        self.recent.append(seconds)
+        self._since_recompute += 1
+        if self._since_recompute >= self.RECOMPUTE_EVERY:
+            self._quantiles.clear()
+            self._since_recompute = 0
+    
+    def quantile(self, q: float) -> float:
+        """Seconds at quantile q (0-1) of the window."""
+        value = self._quantiles.get(q)
+        if value is None:
+            ordered = sorted(self.recent)
+            value = self._quantiles[q] = ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+        return value
+
+
+class EndpointLatency:
+    """Recent latencies (for the hedge delay) and whole-run histograms for one endpoint."""
+    
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.recent = RollingLatency(window)
+        self.hedged = LatencyHistogram()   # Requests that ran with a hedge delay
+        self.holdout = LatencyHistogram()  # Requests held out once the endpoint had min_samples, for comparison
+        self.stats = {'requests': 0, 'hedges': 0, 'hedge_wins': 0}
+
+
+class Hedger:
+    """Per-scraper hedging for GETs to the configured hosts."""
+    
+    def __init__(self, config: Dict):
+        settings = config.get('hedging') or {}
+        self.enabled = settings.get('enabled', False)
+        self.hosts = set(settings.get('hosts') or [])
+        self.quantile = settings.get('quantile', 95) / 100
+        self.min_samples = settings.get('min_samples', 100)
+        self.min_delay = settings.get('min_delay_ms', 100) / 1000
+        self.budget_percent = settings.get('budget_percent', 5)
+        self.holdout_percent = settings.get('holdout_percent', 10)
+        self.other_exit = settings.get('other_exit', True)
+        self.window = settings.get('window', 1000)
+        self._endpoints: Dict[Tuple[str, str], EndpointLatency] = {}
+    
+    def applies_to(self, url: str) -> bool:
+        return self.enabled and (not self.hosts or urlsplit(url).netloc in self.hosts)
+    
+    def _endpoint(self, url: str) -> EndpointLatency:
+        key = endpoint_key(url)
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            endpoint = self._endpoints[key] = EndpointLatency(''.join(key), self.window)
+        return endpoint
+    
+    def _hedge_delay(self, endpoint: EndpointLatency) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this request can't be hedged."""
+        if len(endpoint.recent) < self.min_samples:
+            return None
+        if endpoint.stats['hedges'] >= endpoint.stats['requests'] * self.budget_percent / 100:
+            return None
+        return max(endpoint.recent.quantile(self.quantile), self.min_delay)
+    
+    async def request(self, url: str, send: Callable[[], Awaitable], send_hedge: Callable[[], Awaitable]):
+        """
+        Await send(); if it hasn't answered within the endpoint's hedge delay, also start
+        send_hedge() and return whichever answers first (the other is cancelled).
+        """
+        endpoint = self._endpoint(url)
+        endpoint.stats['requests'] += 1
+        # Only warmed-up endpoints are compared, so warm-up latencies land in neither histogram
+        holdout = len(endpoint.recent) >= self.min_samples and random.random() * 100 < self.holdout_percent
+        delay = None if holdout else self._hedge_delay(endpoint)
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(send())
+        pending = {primary}
+        try:
+            if delay is not None:
+                await asyncio.wait(pending, timeout=delay)
+            if delay is None or primary.done():
+                response = await primary
+                elapsed = time.perf_counter() - start
+                endpoint.recent.add(elapsed)
+                if holdout:
+                    endpoint.holdout.add(elapsed)
+                elif delay is not None:
+                    endpoint.hedged.add(elapsed)
+                return response
+            
+            endpoint.stats['hedges'] += 1
+            hedge = asyncio.ensure_future(send_hedge())
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if not task.exception()), None)
+                if winner is None:
+                    continue
+                elapsed = time.perf_counter() - start
+                endpoint.recent.add(elapsed)
+                endpoint.hedged.add(elapsed)
+                if winner is hedge:
+                    endpoint.stats['hedge_wins'] += 1
+                return winner.result()
+            # Both failed: surface the original request's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def get_stats(self) -> Dict:
+        stats = {}
+        for endpoint in self._endpoints.values():
+            if not endpoint.hedged.count:
+                continue
+            stats[endpoint.name] = dict(
+                endpoint.stats,
+                hedge_percent=round(endpoint.stats['hedges'] / endpoint.stats['requests'] * 100, 1),
+                p50_ms=round(endpoint.hedged.quantile_ms(0.50)),
+                p95_ms=round(endpoint.hedged.quantile_ms(0.95)),
+                p99_ms=round(endpoint.hedged.quantile_ms(0.99)),
+                holdout_requests=endpoint.holdout.count,
+                holdout_p99_ms=round(endpoint.holdout.quantile_ms(0.99)),
+            )
+        return stats
+    
+    def print_stats(self):
+        for name, stats in self.get_stats().items():
+            print(f"  Hedging {name}: {stats['hedges']:,} hedges ({stats['hedge_percent']}% of {stats['requests']:,} requests, "
+                  f"{stats['hedge_wins']:,} won) | p50 {stats['p50_ms']:,}ms, p95 {stats['p95_ms']:,}ms, "
+                  f"p99 {stats['p99_ms']:,}ms vs {stats['holdout_p99_ms']:,}ms unhedged "
+                  f"({stats['holdout_requests']:,} holdout requests)")
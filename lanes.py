@@ -0,0 +1,77 @@
+"""
+Bounded execution lanes.
+
+A lane is a semaphore that keeps track of how it was used: items through it, time
+waiting for a slot, time holding one, and the longest queue. Target products run in
+an API lane (the retailer's concurrency); the few that need a browser page are handed
+off to the scraper's own browser lane after their API slot is released, so slow
+browser fallbacks can't hold API slots.
+
+Utilisation is slot-seconds held / (slots x seconds the lane was in use).
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+
+class Lane:
+    """asyncio.Semaphore with utilisation stats (use as `async with lane:`)."""
+    
+    def __init__(self, name: str, slots: int):
+        self.name = name
+        self.slots = slots
+        self._semaphore = asyncio.Semaphore(slots)
+        self.waiting = 0
+        self.in_use = 0
+        self.stats = {'items': 0, 'wait_seconds': 0.0, 'busy_seconds': 0.0, 'max_waiting': 0}
+        self._first_used = None
+        self._last_released = None
+        self._held_since = []  # Acquire times of the slots in use (pairing doesn't change the total)
+    
+    async def __aenter__(self):
+        self.waiting += 1
+        self.stats['max_waiting'] = max(self.stats['max_waiting'], self.waiting)
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        now = time.perf_counter()
+        self.stats['wait_seconds'] += now - start
+        if self._first_used is None:
+            self._first_used = now
+        self.in_use += 1
+        self._held_since.append(now)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        self.stats['busy_seconds'] += now - self._held_since.pop(0)
+        self.stats['items'] += 1
+        self.in_use -= 1
+        self._last_released = now
+        self._semaphore.release()
+        return False
+    
+    def get_stats(self) -> Dict:
+        stats = self.stats
+        items = stats['items']
+        span = (self._last_released - self._first_used) if items else 0.0
+        return {
+            'name': self.name,
+            'slots': self.slots,
+            'items': items,
+            'utilisation_percent': round(stats['busy_seconds'] / (self.slots * span) * 100, 1) if span else 0.0,
+            'avg_held_ms': round(stats['busy_seconds'] / items * 1000) if items else 0,
+            'avg_wait_ms': round(stats['wait_seconds'] / items * 1000) if items else 0,
+            'max_waiting': stats['max_waiting'],
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['items']:
+            return
+        print(f"  {stats['name']} lane: {stats['items']:,} items | {stats['slots']} slots, "
+              f"{stats['utilisation_percent']}% utilised | avg {stats['avg_held_ms']:,}ms held, "
+              f"{stats['avg_wait_ms']:,}ms waiting | peak queue {stats['max_waiting']:,}")
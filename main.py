@@ -5,8 +5,9 @@ Runs enumeration, scraping, validation, and export.
 """
 
 import asyncio
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import sys
 import json
 import os
@@ -18,8 +19,15 @@ from browser_manager import BrowserManager
 from rate_limiter import RateLimiter
 from utils import ensure_directory, export_manifest, format_timestamp, ProgressTracker
 from exporter import Exporter
+from parse_executor import ParseExecutor
+from response_cache import open_cache
+from refresh_scheduler import RefreshScheduler
+from lanes import Lane
+from retry_queue import RetryQueue
+from product_writer import ProductWriter
 
 from scrapers import TargetScraper, CostcoScraper, HomeGoodsScraper, TJMaxxScraper
+from scrapers import page_extract
 
 # Import Spot monitoring if available (only on AWS)
 try:
@@ -28,24 +36,30 @@ try:
 except ImportError:
     SPOT_MONITORING_AVAILABLE = False
 
+# Manifest rows between seek points in a fleet worker's manifest index
+MANIFEST_INDEX_EVERY = 1000
+
 
 class RetailScraper:
     """Main scraper orchestrator."""
     
     def __init__(self):
         self.config = CONFIG
-        self.database = Database(CONFIG['database_path'])
+        self.database = Database(CONFIG['database_path'], CONFIG.get('refresh'))
         self.proxy_manager = ProxyManager(CONFIG)
         self.browser_manager = BrowserManager(self.proxy_manager)
         self.rate_limiter = RateLimiter(CONFIG)
         self.exporter = Exporter(CONFIG, self.database)
+        self.parse_executor = ParseExecutor(CONFIG)
+        self.product_writer = ProductWriter(self.database, CONFIG.get('db_write_batch', 200))
         
         # Initialize scrapers
+        deps = (CONFIG, self.database, self.browser_manager, self.rate_limiter, self.proxy_manager, self.parse_executor)
         self.scrapers = {
-            'target': TargetScraper(CONFIG, self.database, self.browser_manager, self.rate_limiter, self.proxy_manager),
-            'costco': CostcoScraper(CONFIG, self.database, self.browser_manager, self.rate_limiter, self.proxy_manager),
-            'homegoods': HomeGoodsScraper(CONFIG, self.database, self.browser_manager, self.rate_limiter, self.proxy_manager),
-            'tjmaxx': TJMaxxScraper(CONFIG, self.database, self.browser_manager, self.rate_limiter, self.proxy_manager),
+            'target': TargetScraper(*deps),
+            'costco': CostcoScraper(*deps),
+            'homegoods': HomeGoodsScraper(*deps),
+            'tjmaxx': TJMaxxScraper(*deps),
         }
         
         self.retailer_runs = {}  # Track scrape run IDs
@@ -56,6 +70,8 @@ class RetailScraper:
         try:
             await self.browser_manager.cleanup()
             print("[CLEANUP] Browser manager closed")
+            await self.close_scrapers()
+            self.parse_executor.shutdown()
             
             # Export current data
             print("[CLEANUP] Exporting current progress...")
@@ -70,6 +86,13 @@ class RetailScraper:
         except Exception as e:
             print(f"[CLEANUP] Error during cleanup: {e}")
     
+    async def close_scrapers(self):
+        """Close the scrapers' pooled HTTP clients and flush the response cache."""
+        for scraper in self.scrapers.values():
+            await scraper.close()
+            if scraper.response_cache:
+                scraper.response_cache.close()
+    
     def _get_already_scraped(self, retailer: str) -> set:
         """Get set of product IDs already scraped for this retailer."""
         with self.database.get_connection() as conn:
@@ -80,6 +103,22 @@ class RetailScraper:
             """, (retailer,))
             return {row[0] for row in cursor.fetchall()}
     
+    def _get_tombstoned(self, retailer: str) -> set:
+        """Product IDs that were not found within CONFIG['tombstones']['ttl_days'] (skipped on resume)."""
+        ttl_days = self.config['tombstones']['ttl_days']
+        tombstoned = self.database.get_tombstoned(retailer, ttl_days) if ttl_days > 0 else set()
+        if tombstoned:
+            print(f"✓ Resume mode: {len(tombstoned):,} known-dead products skipped (tombstones < {ttl_days:g} days old)")
+        return tombstoned
+    
+    def _print_tombstone_stats(self, tombstoned: set, skipped: int, stats: Dict):
+        if not tombstoned and not stats['not_found']:
+            return
+        # A dead product costs one request (pdp call or page load) before it shows as not found
+        saved_percent = skipped / (skipped + stats['completed']) * 100 if skipped else 0.0
+        print(f"  Tombstones: {skipped:,} known-dead products skipped ({skipped:,} requests, "
+              f"{saved_percent:.1f}% of this run's products) | {stats['not_found']:,} recorded this run")
+    
     async def run_enumeration(self, retailer: str) -> str:
         """Run enumeration for a retailer using streaming (memory-efficient).
         Returns path to manifest file instead of products list to save memory."""
@@ -123,104 +162,148 @@ class RetailScraper:
         
         return str(manifest_path)
     
-    async def scrape_products_from_manifest(self, retailer: str, manifest_path: str, resume: bool = True, skip_count: int = 0, max_items: int = None):
-        """Scrape products from manifest in batches to avoid OOM."""
-        import csv
-        import re
-        
-        BATCH_SIZE = 10000  # Process 10K products at a time
+    async def scrape_products_from_manifest(self, retailer: str, manifest_path: str, resume: bool = True, skip_count: int = 0, max_items: int = None, stop_index: int = None):
+        """Scrape products from manifest in batches to avoid OOM.
         
+        Args:
+            skip_count: Skip manifest rows before this index
+            max_items: Stop after processing this many products
+            stop_index: Stop at this manifest row index (exclusive)
+        """
         # Count total products in manifest
-        with open(manifest_path, 'r') as f:
-            total_count = sum(1 for _ in csv.reader(f)) - 1  # Subtract header
+        total_count = self._count_manifest_rows(manifest_path)
         
         print(f"✓ Total products in manifest: {total_count:,}")
+        if stop_index is not None:
+            total_count = min(total_count, stop_index)
         
-        # Get already scraped products for resume
+        run = self._start_manifest_run(retailer, resume, total_count - skip_count)
+        await self._scrape_manifest_rows(run, self._iter_manifest(manifest_path, skip_count, stop_index), max_items)
+        self._finish_manifest_run(run)
+    
+    def _start_manifest_run(self, retailer: str, resume: bool, total: int) -> Dict:
+        """
+        Resume sets, scrape run, progress, retry queue and API lane for scraping manifest rows.
+        A fleet worker starts one per retailer and feeds it every range it leases.
+        """
+        # Get already scraped (and known-dead) products for resume
         already_scraped = set()
+        tombstoned = set()
         if resume:
             already_scraped = self._get_already_scraped(retailer)
             if already_scraped:
                 print(f"✓ Resume mode: {len(already_scraped):,} products already scraped")
+            tombstoned = self._get_tombstoned(retailer)
         
         # Create scrape run
         run_id = self.database.create_scrape_run(retailer, self.proxy_manager.is_enabled())
         self.retailer_runs[retailer] = run_id
         
-        scraper = self.scrapers[retailer]
-        progress = ProgressTracker(total_count - skip_count, retailer)
-        
         # Get concurrency limit for this retailer
         concurrency = self.config['concurrency'].get(retailer, 10)
         
-        # Process manifest in batches
-        batch_num = 0
-        total_processed = 0
+        return {
+            'retailer': retailer,
+            'scraper': self.scrapers[retailer],
+            'run_id': run_id,
+            'resume': resume,
+            'already_scraped': already_scraped,
+            'tombstoned': tombstoned,
+            'progress': ProgressTracker(total, retailer),
+            'retry_queue': RetryQueue(self.config, self.database, retailer, run_id),
+            'api_lane': Lane(f'{retailer} api', concurrency),
+            'batch_num': 0,
+            'total_processed': 0,
+            'tombstones_skipped': 0,
+        }
+    
+    async def _scrape_manifest_rows(self, run: Dict, rows, max_items: int = None):
+        """Scrape (index, row) manifest rows in batches, then wait out their delayed retries."""
+        import re
+        
+        BATCH_SIZE = 10000  # Process 10K products at a time
         
-        with open(manifest_path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
+        retailer = run['retailer']
+        scraper = run['scraper']
+        retry_queue = run['retry_queue']
+        batch_args = (run['run_id'], run['progress'], run['api_lane'], retailer, retry_queue)
+        processed = 0
+        
+        batch = []
+        for idx, row in rows:
+            # Stop if max_items reached
+            if max_items and processed >= max_items:
+                break
             
-            batch = []
-            for idx, row in enumerate(reader):
-                # Skip if before skip_count
-                if idx < skip_count:
-                    continue
-                
-                # Stop if max_items reached
-                if max_items and total_processed >= max_items:
-                    break
-                
-                if not row or not row[0]:
-                    continue
-                
-                url = row[0]
-                
-                # Extract product ID from URL
-                if retailer == 'target':
-                    match = re.search(r'/A-(\d+)', url)
-                elif retailer == 'costco':
-                    match = re.search(r'\.product\.(\d+)\.html', url)
-                else:
-                    match = None
-                
-                product_id = match.group(1) if match else url.split('/')[-1]
-                
-                # Skip if already scraped
-                if resume and product_id in already_scraped:
-                    continue
-                
-                batch.append({
-                    'product_id': product_id,
-                    'product_url': url,
-                    'method': 'manifest'
-                })
-                
-                # Process batch when it reaches BATCH_SIZE
-                if len(batch) >= BATCH_SIZE:
-                    batch_num += 1
-                    print(f"\n{'='*60}")
-                    print(f"Processing batch {batch_num} ({len(batch):,} products)")
-                    print(f"{'='*60}")
-                    
-                    await self._scrape_batch(scraper, batch, run_id, progress, concurrency, retailer)
-                    total_processed += len(batch)
-                    batch = []  # Clear batch from memory
+            if not row or not row[0]:
+                continue
+            
+            url = row[0]
+            
+            # Extract product ID from URL
+            if retailer == 'target':
+                match = re.search(r'/A-(\d+)', url)
+            elif retailer == 'costco':
+                match = re.search(r'\.product\.(\d+)\.html', url)
+            else:
+                match = None
+            
+            product_id = match.group(1) if match else url.split('/')[-1]
             
-            # Process remaining products in last batch
-            if batch:
-                batch_num += 1
+            # Skip if already scraped
+            if run['resume'] and product_id in run['already_scraped']:
+                continue
+            
+            # Skip if it didn't exist last time (until its tombstone expires)
+            if product_id in run['tombstoned']:
+                run['tombstones_skipped'] += 1
+                continue
+            
+            batch.append({
+                'product_id': product_id,
+                'product_url': url,
+                'method': 'manifest'
+            })
+            
+            # Process batch when it reaches BATCH_SIZE
+            if len(batch) >= BATCH_SIZE:
+                run['batch_num'] += 1
                 print(f"\n{'='*60}")
-                print(f"Processing final batch {batch_num} ({len(batch):,} products)")
+                print(f"Processing batch {run['batch_num']} ({len(batch):,} products)")
                 print(f"{'='*60}")
                 
-                await self._scrape_batch(scraper, batch, run_id, progress, concurrency)
-                total_processed += len(batch)
+                await self._scrape_batch(scraper, batch, *batch_args)
+                processed += len(batch)
+                batch = []  # Clear batch from memory
+        
+        # Process remaining products in last batch
+        if batch:
+            run['batch_num'] += 1
+            print(f"\n{'='*60}")
+            print(f"Processing final batch {run['batch_num']} ({len(batch):,} products)")
+            print(f"{'='*60}")
+            
+            await self._scrape_batch(scraper, batch, *batch_args)
+            processed += len(batch)
+        run['total_processed'] += processed
+        
+        # Retries still waiting once the rows are done
+        if retry_queue:
+            print(f"\n  Waiting on {len(retry_queue):,} delayed retries...")
+        while retry_queue:
+            await asyncio.sleep(retry_queue.seconds_until_due())
+            await self._scrape_batch(scraper, retry_queue.pop_due(), *batch_args)
+    
+    def _finish_manifest_run(self, run: Dict):
+        """Record the scrape run's totals and print its stats."""
+        retailer = run['retailer']
+        scraper = run['scraper']
+        api_lane = run['api_lane']
         
         # Update run stats
-        stats = progress.get_stats()
+        stats = run['progress'].get_stats()
         self.database.update_scrape_run(
-            run_id,
+            run['run_id'],
             completed_at=datetime.now(),
             total_attempted=stats['completed'],
             total_success=stats['success'],
@@ -229,35 +312,244 @@ class RetailScraper:
         )
         
         print(f"\n\n✓ Scraping complete for {retailer}")
-        print(f"  Total processed: {total_processed:,}")
+        print(f"  Total processed: {run['total_processed']:,}")
         print(f"  Success: {stats['success']:,}")
         print(f"  Failed: {stats['failed']}")
         print(f"  Blocked: {stats['blocked']}")
         print(f"  Not Found: {stats['not_found']}")
+        self._print_tombstone_stats(run['tombstoned'], run['tombstones_skipped'], stats)
+        self.parse_executor.print_stats()
+        page_extract.print_stats()
+        scraper.readiness.print_stats()
+        scraper.clearance.print_stats()
+        scraper.breakers.print_stats()
+        scraper.hedger.print_stats()
+        scraper.timeouts.print_stats()
+        api_lane.print_stats()
+        if scraper.browser_lane:
+            scraper.browser_lane.print_stats()
+        self.browser_manager.session_store.print_stats()
+        self.database.print_write_stats()
+        self.product_writer.print_stats()
+        if retailer == 'target':
+            scraper.print_location_stats()
+        if scraper.response_cache:
+            scraper.response_cache.print_stats()
+        run['retry_queue'].print_stats()
+    
+    def _count_manifest_rows(self, manifest_path: str) -> int:
+        """Count product rows in a manifest (excluding header)."""
+        import csv
+        with open(manifest_path, 'r') as f:
+            return sum(1 for _ in csv.reader(f)) - 1  # Subtract header
+    
+    def _index_manifest(self, manifest_path: str) -> Tuple[int, List[int]]:
+        """
+        Product row count, plus the byte offset of every MANIFEST_INDEX_EVERY-th row, in one pass
+        (so a fleet worker can seek to each leased range instead of reading up to it).
+        """
+        offsets = []
+        count = 0
+        with open(manifest_path, 'rb') as f:
+            offset = len(f.readline())  # Header
+            for line in f:
+                if count % MANIFEST_INDEX_EVERY == 0:
+                    offsets.append(offset)
+                offset += len(line)
+                count += 1
+        return count, offsets
+    
+    def _iter_manifest(self, manifest_path: str, start: int = 0, stop: int = None, offsets: List[int] = None):
+        """(index, row) for manifest rows [start, stop); offsets from _index_manifest let it seek near start."""
+        import csv
+        import io
+        
+        with open(manifest_path, 'rb') as raw:
+            if offsets:
+                block = min(start // MANIFEST_INDEX_EVERY, len(offsets) - 1)
+                raw.seek(offsets[block])
+                idx = block * MANIFEST_INDEX_EVERY
+            else:
+                raw.readline()  # Skip header
+                idx = 0
+            for row in csv.reader(io.TextIOWrapper(raw, encoding='utf-8', newline='')):
+                if stop is not None and idx >= stop:
+                    break
+                if idx >= start:
+                    yield idx, row
+                idx += 1
+    
+    async def run_worker(self, retailers: List[str] = None, resume: bool = True, coordinator_url: str = None, worker_id: str = None):
+        """Run as one node of a fleet: lease manifest ranges from the coordinator until all are done.
+        
+        Every worker must see the same manifest file (shared volume), since ranges are row indexes.
+        Expired leases (e.g. Spot interruption) are picked up by whichever worker asks next.
+        """
+        from coordinator import get_lease_backend, default_worker_id
+        from pathlib import Path
+        import glob
+        
+        if retailers is None:
+            retailers = ['target', 'costco', 'homegoods', 'tjmaxx']
+        
+        coordinator_config = self.config['coordinator']
+        coordinator_url = coordinator_url or coordinator_config['url']
+        if not coordinator_url:
+            print("✗ No coordinator configured. Set COORDINATOR_URL or pass --coordinator")
+            return
+        
+        backend = get_lease_backend(coordinator_url)
+        worker_id = worker_id or default_worker_id()
+        lease_seconds = coordinator_config['lease_seconds']
+        
+        print(f"\n{'='*80}")
+        print("RETAIL SCRAPER - FLEET WORKER")
+        print(f"{'='*80}")
+        print(f"Worker: {worker_id}")
+        print(f"Coordinator: {coordinator_url}")
+        print(f"Lease: {coordinator_config['chunk_size']:,} rows / {lease_seconds}s")
+        print(f"{'='*80}\n")
+        
+        await self.browser_manager.initialize()
+        
+        for retailer in retailers:
+            manifests = sorted(glob.glob(f"{self.config['manifests_dir']}/manifest_{retailer}_*.csv"))
+            if not manifests:
+                print(f"✗ No manifest found for {retailer}, run enumeration first")
+                continue
+            
+            manifest_path = manifests[-1]
+            job_id = f"{retailer}:{Path(manifest_path).name}"
+            # One pass over the manifest per worker: leases seek to their rows through this index
+            total_items, offsets = await asyncio.to_thread(self._index_manifest, manifest_path)
+            run = None
+            ranges = await asyncio.to_thread(backend.register_job, job_id, total_items, coordinator_config['chunk_size'])
+            print(f"[WORKER] Job {job_id}: {total_items:,} products in {ranges:,} ranges")
+            
+            while True:
+                lease = await asyncio.to_thread(backend.acquire, job_id, worker_id, lease_seconds)
+                
+                if not lease:
+                    progress = await asyncio.to_thread(backend.get_progress, job_id)
+                    if progress['done'] >= progress['total']:
+                        print(f"[WORKER] ✓ All {progress['total']:,} ranges done for {retailer}")
+                        if run:
+                            self._finish_manifest_run(run)
+                        break
+                    # Other workers hold the remaining leases - wait in case one expires
+                    print(f"[WORKER] {progress['leased']:,} ranges leased by other workers, waiting {coordinator_config['poll_seconds']}s...")
+                    await asyncio.sleep(coordinator_config['poll_seconds'])
+                    continue
+                
+                print(f"\n[WORKER] Leased rows {lease['range_start']:,}-{lease['range_end']:,} (attempt {lease['attempts']})")
+                
+                # Resume sets, scrape run and stats are per worker, not per lease
+                if run is None:
+                    print(f"✓ Total products in manifest: {total_items:,}")
+                    run = self._start_manifest_run(retailer, resume, 0)
+                run['progress'].total += lease['range_end'] - lease['range_start']
+                
+                # Keep the lease alive while this range is being scraped
+                heartbeat = asyncio.create_task(self._renew_lease(backend, lease, lease_seconds))
+                try:
+                    rows = self._iter_manifest(manifest_path, lease['range_start'], lease['range_end'], offsets)
+                    await self._scrape_manifest_rows(run, rows)
+                except Exception as e:
+                    # Hand the range straight back instead of letting it wait out the TTL
+                    print(f"\n[WORKER] ✗ Rows {lease['range_start']:,}-{lease['range_end']:,} failed: {type(e).__name__}: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    await self._release_lease(backend, lease)
+                    await asyncio.sleep(coordinator_config['poll_seconds'])
+                    continue
+                finally:
+                    heartbeat.cancel()
+                
+                await asyncio.to_thread(backend.complete, lease)
+                print(f"[WORKER] ✓ Completed rows {lease['range_start']:,}-{lease['range_end']:,}")
+        
+        await self.browser_manager.cleanup()
+        await self.close_scrapers()
+        self.parse_executor.shutdown()
     
-    async def _scrape_batch(self, scraper, batch: List[Dict[str, str]], run_id: int, progress: ProgressTracker, concurrency: int, retailer: str):
-        """Scrape a single batch of products."""
-        semaphore = asyncio.Semaphore(concurrency)
+    async def run_merge(self, database_paths: List[str]):
+        """Combine fleet workers' databases (each worker writes its own DATABASE_PATH) into this one and export."""
+        print(f"\n{'='*80}")
+        print(f"MERGING {len(database_paths)} WORKER DATABASES INTO {self.config['database_path']}")
+        print(f"{'='*80}\n")
+        
+        for path in database_paths:
+            if not os.path.exists(path):
+                print(f"✗ {path}: not found, skipped")
+                continue
+            merged = await asyncio.to_thread(self.database.merge_from, path)
+            print(f"✓ {path}: {merged['products']:,} products, {merged['product_observations']:,} history rows, "
+                  f"{merged['tombstones']:,} tombstones, {merged['scrape_runs']:,} runs")
         
+        self.exporter.export_all_retailers()
+        await self.close_scrapers()
+        self.parse_executor.shutdown()
+    
+    async def _release_lease(self, backend, lease: Dict):
+        """Return a failed range to the pool (if this fails too, the lease expires after its TTL)."""
+        try:
+            if await asyncio.to_thread(backend.release, lease):
+                print(f"[WORKER] Released rows {lease['range_start']:,}-{lease['range_end']:,} for another attempt")
+        except Exception as e:
+            print(f"[WORKER] ⚠️  Lease release failed: {e}")
+    
+    async def _renew_lease(self, backend, lease: Dict, lease_seconds: int):
+        """Renew a lease periodically until cancelled."""
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(backend.renew, lease, lease_seconds)
+                if not renewed:
+                    # Range was re-issued to another worker - finish anyway, resume dedupes products
+                    print(f"\n[WORKER] ⚠️  Lease lost for rows {lease['range_start']:,}-{lease['range_end']:,}")
+                    return
+            except Exception as e:
+                print(f"\n[WORKER] ⚠️  Lease renewal failed: {e}")
+    
+    async def _scrape_batch(self, scraper, batch: List[Dict[str, str]], run_id: int, progress: ProgressTracker, lane: Lane, retailer: str, retry_queue: RetryQueue = None):
+        """Scrape a single batch of products (and any retries that fall due meanwhile)."""
         async def scrape_with_limit(product_info):
-            async with semaphore:
-                return await self._scrape_single_product(
-                    scraper, 
-                    product_info, 
-                    run_id, 
-                    progress
-                )
+            return await self._scrape_single_product(
+                scraper, 
+                product_info, 
+                run_id, 
+                progress,
+                lane,
+                retry_queue
+            )
+        
+        # Due retries share the lane with fresh products
+        retry_tasks = []
         
+        async def pump_retries():
+            while True:
+                await asyncio.sleep(min(retry_queue.seconds_until_due(), 1.0))
+                retry_tasks.extend(asyncio.create_task(scrape_with_limit(p)) for p in retry_queue.pop_due())
+        
+        pump = asyncio.create_task(pump_retries()) if retry_queue is not None else None
         tasks = [scrape_with_limit(p) for p in batch]
         await asyncio.gather(*tasks, return_exceptions=True)
+        if pump:
+            pump.cancel()
+            await asyncio.gather(*retry_tasks, return_exceptions=True)
+        await self.product_writer.flush()
         
         # Export progress every 1000 items (live update - overwrites same file)
+        live_export_every = self.config.get('live_export_every', 1000)
+        if not live_export_every:
+            return
+        
         if not hasattr(self, '_items_since_export'):
             self._items_since_export = 0
         
         self._items_since_export += len(batch)
         
-        if self._items_since_export >= 1000:
+        if self._items_since_export >= live_export_every:
             self.exporter.export_retailer_data(retailer, live_update=True)
             self._items_since_export = 0
     
@@ -268,6 +560,8 @@ class RetailScraper:
         print(f"{'='*80}\n")
         
         # Check for already scraped products (resume capability)
+        tombstoned = set()
+        tombstones_skipped = 0
         if resume:
             already_scraped = self._get_already_scraped(retailer)
             if already_scraped:
@@ -277,6 +571,11 @@ class RetailScraper:
                 if skipped > 0:
                     print(f"✓ Resume mode: Skipping {skipped:,} already scraped products")
                     print(f"  Remaining to scrape: {len(products):,}\n")
+            tombstoned = self._get_tombstoned(retailer)
+            if tombstoned:
+                original_count = len(products)
+                products = [p for p in products if p['product_id'] not in tombstoned]
+                tombstones_skipped = original_count - len(products)
         
         # Apply max_items limit if specified (for testing)
         if max_items:
@@ -298,20 +597,21 @@ class RetailScraper:
         concurrency = self.config['concurrency'].get(retailer, 10)
         
         # Scrape with concurrency limit
-        semaphore = asyncio.Semaphore(concurrency)
+        api_lane = Lane(f'{retailer} api', concurrency)
         
         async def scrape_with_limit(product_info):
-            async with semaphore:
-                return await self._scrape_single_product(
-                    scraper, 
-                    product_info, 
-                    run_id, 
-                    progress
-                )
+            return await self._scrape_single_product(
+                scraper, 
+                product_info, 
+                run_id, 
+                progress,
+                api_lane
+            )
         
         # Process all products
         tasks = [scrape_with_limit(p) for p in products]
         await asyncio.gather(*tasks, return_exceptions=True)
+        await self.product_writer.flush()
         
         # Update run stats
         stats = progress.get_stats()
@@ -329,36 +629,36 @@ class RetailScraper:
         print(f"  Failed: {stats['failed']}")
         print(f"  Blocked: {stats['blocked']}")
         print(f"  Not Found: {stats['not_found']}")
+        self._print_tombstone_stats(tombstoned, tombstones_skipped, stats)
+        self.parse_executor.print_stats()
+        page_extract.print_stats()
+        scraper.readiness.print_stats()
+        scraper.clearance.print_stats()
+        scraper.breakers.print_stats()
+        scraper.hedger.print_stats()
+        scraper.timeouts.print_stats()
+        api_lane.print_stats()
+        if scraper.browser_lane:
+            scraper.browser_lane.print_stats()
+        self.browser_manager.session_store.print_stats()
+        self.database.print_write_stats()
+        self.product_writer.print_stats()
+        if retailer == 'target':
+            scraper.print_location_stats()
+        if scraper.response_cache:
+            scraper.response_cache.print_stats()
     
-    async def _scrape_single_product(self, scraper, product_info: Dict, run_id: int, progress: ProgressTracker):
-        """Scrape a single product with error handling."""
+    async def _scrape_single_product(self, scraper, product_info: Dict, run_id: int, progress: ProgressTracker,
+                                     lane: Lane, retry_queue: RetryQueue = None):
+        """
+        Scrape a single product with error handling (failures go to retry_queue for a delayed retry).
+        The fetch runs in lane; browser fallbacks are handed off to the scraper's browser_lane, if it has one.
+        """
         product_url = product_info['product_url']
         product_id = product_info['product_id']
         retailer = scraper.retailer_name
         
         try:
-            # Check if we're getting blocked too much - STOP if no proxy configured
-            if self.proxy_manager.consecutive_failures >= 10:
-                print(f"\n\n{'='*80}")
-                print(f"⚠️  STOPPING: Too many consecutive failures ({self.proxy_manager.consecutive_failures})")
-                print(f"{'='*80}")
-                print(f"This usually means we're getting blocked by Target.")
-                print(f"")
-                print(f"Options:")
-                print(f"  1. Add proxies to config.py and restart")
-                print(f"  2. Wait 30-60 minutes and try lower concurrency")
-                print(f"")
-                print(f"Progress saved! Run again to resume.")
-                print(f"{'='*80}\n")
-                # Exit gracefully - scraper will resume from database on restart
-                sys.exit(1)
-            
-            # Pause on moderate failures
-            if self.proxy_manager.consecutive_failures >= 5:
-                backoff_seconds = min(60, 5 * (2 ** (self.proxy_manager.consecutive_failures - 5)))
-                print(f"\n[WARNING] High failure rate ({self.proxy_manager.consecutive_failures} consecutive)! Pausing {backoff_seconds}s...\n")
-                await asyncio.sleep(backoff_seconds)
-            
             # Check if we should enable proxy (only if proxy is configured)
             if self.proxy_manager.should_enable_proxy() and CONFIG['proxy'].get('datacenter_pool'):
                 print(f"\n\n[SWITCHING] Block rate threshold exceeded! Switching to proxy mode...")
@@ -366,27 +666,38 @@ class RetailScraper:
                 print(f"[OK] Now using proxy. Resuming scraping...\n")
             
             # Scrape product
-            product_data = await scraper.scrape_product(product_url, product_id)
+            if retry_queue is not None:
+                retry_queue.record_attempt(product_info)
+            browser_lane = scraper.browser_lane
+            async with lane:
+                if browser_lane:
+                    product_data = await scraper.scrape_product(product_url, product_id, browser_handoff=True)
+                else:
+                    product_data = await scraper.scrape_product(product_url, product_id)
+            if product_data and product_data.get('status') == 'needs_browser':
+                async with browser_lane:
+                    product_data = await scraper.scrape_handoff(product_url, product_id, product_data)
             
             if not product_data:
                 # Failed to scrape
-                progress.record_failure('failed')
                 self.database.log_error(
                     retailer, product_url, 'scrape_failed', 
                     'Failed to fetch or parse product', run_id
                 )
+                self._retry_or_fail(progress, retry_queue, product_info, 'scrape_failed', 'Failed to fetch or parse product')
             elif product_data.get('status') == 'not_found':
-                # 404
+                # 404 - skipped by resume until the tombstone expires
+                self.database.add_tombstone(retailer, product_id, product_data.get('reason', 'not_found'))
                 progress.record_failure('not_found')
             else:
                 # Success
-                product_data['scrape_run_id'] = run_id
-                self.database.insert_product(product_data)
+                product_data.scrape_run_id = run_id
+                await self.product_writer.add(product_data)
                 
                 # Print sample product every 100 items to verify data quality
-                if progress.successful % 100 == 1:  # Print first and every 100th
+                if progress.success % 100 == 1:  # Print first and every 100th
                     print(f"\n{'='*80}")
-                    print(f"SAMPLE PRODUCT #{progress.successful}")
+                    print(f"SAMPLE PRODUCT #{progress.success}")
                     print(f"{'='*80}")
                     print(f"ID: {product_data.get('product_id')}")
                     print(f"Title: {product_data.get('title', 'MISSING')[:80]}")
@@ -396,7 +707,7 @@ class RetailScraper:
                     print(f"Category: {product_data.get('category', 'MISSING')}")
                     print(f"Availability: {product_data.get('availability', 'MISSING')}")
                     print(f"Shipping: ${product_data.get('shipping_cost', 'MISSING')} - {product_data.get('shipping_estimate', 'MISSING')}")
-                    print(f"Images: {len(product_data.get('image_urls', '[]').split(',')) if product_data.get('image_urls') else 0} images")
+                    print(f"Images: {len(product_data.image_urls or [])} images")
                     print(f"Rating: {product_data.get('ratings_average', 'N/A')} ({product_data.get('ratings_count', 0)} reviews)")
                     print(f"Description: {(product_data.get('description', 'MISSING') or '')[:100]}...")
                     print(f"{'='*80}\n")
@@ -426,19 +737,27 @@ class RetailScraper:
                     )
                 
                 progress.record_success()
+                if retry_queue is not None:
+                    retry_queue.record_success(product_info)
             
             # Print progress
             mode = "Proxy Mode" if self.proxy_manager.is_enabled() else "Home Network"
             progress.print_progress(mode)
             
         except Exception as e:
-            progress.record_failure('failed')
             self.database.log_error(
                 retailer, product_url, 'exception', 
                 str(e), run_id
             )
-            # CRITICAL: Add delay to prevent runaway error loops
-            await asyncio.sleep(1)
+            # TransientFetchError carries its own class (http_503, ReadTimeout, ...)
+            error_class = getattr(e, 'error_class', type(e).__name__)
+            self._retry_or_fail(progress, retry_queue, product_info, error_class, str(e))
+    
+    def _retry_or_fail(self, progress: ProgressTracker, retry_queue: RetryQueue, product_info: Dict,
+                       error_class: str, message: str):
+        """Queue a failed product for a delayed retry; it only counts as failed once it can't be retried."""
+        if retry_queue is None or not retry_queue.schedule(product_info, error_class, message):
+            progress.record_failure('failed')
     
     async def run_enumeration_only(self, retailers: List[str] = None):
         """Run enumeration only (no scraping) to prove completeness."""
@@ -476,6 +795,7 @@ class RetailScraper:
         
         # Cleanup
         await self.browser_manager.cleanup()
+        await self.close_scrapers()
         
         # Export completeness package
         print(f"\n{'='*80}")
@@ -504,6 +824,197 @@ class RetailScraper:
         print("  3. Run full scrape: python main.py")
         print()
     
+    async def run_reparse(self, retailers: List[str] = None, workers: int = None, batch_size: int = 500):
+        """
+        Rebuild products rows from the response cache with the current parsers.
+        Makes no network calls: the newest cached payloads of each product are parsed in
+        a process pool and upserted (rows keep their scrape run; scraped_at = fetch time).
+        """
+        cache = open_cache(self.config)
+        if not cache:
+            print("✗ Response cache is off (RESPONSE_CACHE_DIR) - nothing to re-parse")
+            return
+        if retailers is None:
+            retailers = ['target', 'costco', 'homegoods', 'tjmaxx']
+        
+        total = cache.count_products(retailers)
+        executor = ParseExecutor(dict(self.config, parse_workers=workers or self.config.get('parse_workers')), mode='process')
+        print(f"\n{'='*80}")
+        print(f"RE-PARSE FROM RESPONSE CACHE ({cache.dir})")
+        print(f"{'='*80}")
+        print(f"Retailers: {', '.join(retailers)} | {total:,} cached products | {executor.workers} parse workers\n")
+        
+        counts = {'written': 0, 'empty': 0, 'missing_payload': 0, 'errors': 0}
+        batch = []
+        window = asyncio.Semaphore(executor.workers * 4)  # Payloads in flight
+        start = time.perf_counter()
+        
+        async def write_batch():
+            nonlocal batch
+            rows, batch = batch, []
+            if rows:
+                await asyncio.to_thread(self.database.upsert_reparsed_products, rows)
+                counts['written'] += len(rows)
+        
+        async def reparse_one(retailer: str, product_id: str, product_url: str, payloads: Dict):
+            try:
+                kwargs = {}
+                if 'pdp' in payloads:
+                    method, (sha256, fetched_at) = '_parse_cached_api', payloads['pdp']
+                    if 'fulfillment' in payloads:
+                        fulfillment = cache.read(payloads['fulfillment'][0])
+                        kwargs['fulfillment'] = fulfillment.decode('utf-8', errors='replace') if fulfillment else None
+                else:
+                    # Newest of the page HTML and the in-page JSON-LD
+                    kind = max((k for k in ('page', 'json_ld') if k in payloads), key=lambda k: payloads[k][1], default=None)
+                    if kind is None:
+                        counts['missing_payload'] += 1
+                        return
+                    method = '_parse_html' if kind == 'page' else '_parse_cached_json_ld'
+                    sha256, fetched_at = payloads[kind]
+                
+                body = cache.read(sha256)
+                if body is None:
+                    counts['missing_payload'] += 1
+                    return
+                product = await executor.parse(retailer, method, body, product_url, product_id, **kwargs)
+                if not product:
+                    counts['empty'] += 1
+                    return
+                product.scraped_at = datetime.fromtimestamp(fetched_at).isoformat()
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    await write_batch()
+            except Exception as e:
+                counts['errors'] += 1
+                print(f"  ⚠️  Re-parse failed for {retailer} {product_id}: {e}")
+            finally:
+                window.release()
+        
+        tasks = set()
+        for done, item in enumerate(cache.iter_products(retailers), 1):
+            await window.acquire()
+            task = asyncio.create_task(reparse_one(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            if done % 10000 == 0:
+                rate = done / (time.perf_counter() - start)
+                print(f"  {done:,}/{total:,} products ({rate:,.0f}/s)")
+        await asyncio.gather(*tasks)
+        await write_batch()
+        executor.print_stats()
+        executor.shutdown()
+        
+        elapsed = time.perf_counter() - start
+        print(f"\n✓ Re-parsed {counts['written']:,} products in {elapsed:,.1f}s "
+              f"({counts['written'] / elapsed if elapsed else 0:,.0f}/s) | {counts['empty']:,} without a product, "
+              f"{counts['missing_payload']:,} missing payloads, {counts['errors']:,} errors")
+    
+    async def run_refresh(self, retailers: List[str] = None, budget: int = None):
+        """
+        Re-scrape the products most likely to have changed since their last scrape,
+        up to the refresh budget per retailer (see refresh_scheduler.py).
+        """
+        if retailers is None:
+            retailers = ['target', 'costco', 'homegoods', 'tjmaxx']
+        
+        print(f"\n{'='*80}")
+        print("RETAIL SCRAPER - CHANGE-AWARE REFRESH")
+        print(f"{'='*80}")
+        print(f"Retailers: {', '.join(retailers)}")
+        print(f"{'='*80}\n")
+        
+        scheduler = RefreshScheduler(self.config, self.database)
+        await self.browser_manager.initialize()
+        
+        for retailer in retailers:
+            try:
+                manifest_path, summary = scheduler.build_manifest(retailer, budget)
+                scheduler.print_summary(retailer, manifest_path, summary)
+                if not manifest_path:
+                    continue
+                await self.scrape_products_from_manifest(retailer, manifest_path, resume=False)
+            except Exception as e:
+                print(f"\n✗ Error refreshing {retailer}: {e}")
+                import traceback
+                traceback.print_exc()
+        
+        await self.browser_manager.cleanup()
+        await self.close_scrapers()
+        self.parse_executor.shutdown()
+        
+        self.exporter.export_all_retailers()
+        self.exporter.print_summary(self.retailer_runs)
+    
+    async def run_fulfillment_refresh(self, batch_size: int = 500):
+        """
+        Refresh Target shipping_cost/shipping_estimate from the fulfillment API
+        alone: one request per stored product (no pdp call), written in batches that only
+        touch those columns of rows that changed.
+        """
+        scraper = self.scrapers['target']
+        with self.database.get_connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM products WHERE retailer = 'target' AND status = 'success'").fetchone()[0]
+        
+        print(f"\n{'='*80}")
+        print("TARGET FULFILLMENT REFRESH (shipping only)")
+        print(f"{'='*80}")
+        print(f"{total:,} stored products | concurrency {self.config['concurrency']['target']}\n")
+        
+        run_id = self.database.create_scrape_run('target', self.proxy_manager.is_enabled())
+        self.retailer_runs['target'] = run_id
+        progress = ProgressTracker(total, 'target')
+        counts = {'changed': 0, 'unchanged': 0}
+        batch = []
+        window = asyncio.Semaphore(self.config['concurrency']['target'])
+        
+        async def write_batch():
+            nonlocal batch
+            updates, batch = batch, []
+            if updates:
+                changed = await asyncio.to_thread(self.database.update_fulfillment, updates, run_id)
+                counts['changed'] += changed
+                counts['unchanged'] += len(updates) - changed
+        
+        async def refresh_one(product_id: str, product_url: str):
+            try:
+                fields = await scraper.fetch_fulfillment(product_id, product_url)
+                if fields is None:
+                    progress.record_failure('failed')
+                    return
+                progress.record_success()
+                batch.append((product_id, fields))
+                if len(batch) >= batch_size:
+                    await write_batch()
+            finally:
+                window.release()
+                progress.print_progress(mode="Fulfillment")
+        
+        tasks = set()
+        for product_id, product_url in self.database.iter_product_keys('target'):
+            await window.acquire()
+            task = asyncio.create_task(refresh_one(product_id, product_url))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        await write_batch()
+        await self.close_scrapers()
+        
+        stats = progress.get_stats()
+        self.database.update_scrape_run(
+            run_id,
+            completed_at=datetime.now(),
+            total_attempted=stats['completed'],
+            total_success=stats['success'],
+            total_failed=stats['failed']
+        )
+        print(f"\n\n✓ Fulfillment refresh: {stats['success']:,} fetched in {stats['elapsed_seconds']:,.1f}s "
+              f"({stats['items_per_min']:,.0f}/min) | {counts['changed']:,} changed, {counts['unchanged']:,} unchanged, "
+              f"{stats['failed']:,} failed")
+        scraper.breakers.print_stats()
+        scraper.hedger.print_stats()
+        scraper.timeouts.print_stats()
+    
     async def run_full_scrape(self, retailers: List[str] = None, resume: bool = True):
         """Run full scrape for specified retailers."""
         if retailers is None:
@@ -564,6 +1075,8 @@ class RetailScraper:
         
         # Cleanup
         await self.browser_manager.cleanup()
+        await self.close_scrapers()
+        self.parse_executor.shutdown()
         
         # Export data
         print(f"\n{'='*80}")
@@ -628,6 +1141,27 @@ async def main():
                         help='Skip enumeration, use last manifest (for testing scraping only)')
     parser.add_argument('--skip', type=int, default=0,
                         help='Skip first N products from manifest (for testing different products)')
+    parser.add_argument('--record', default=None, metavar='DIR',
+                        help='Record every HTTP response to a corpus directory (for offline replay)')
+    parser.add_argument('--replay', default=None, metavar='URL',
+                        help='Route all fetches to a mock server, e.g. http://127.0.0.1:8899')
+    parser.add_argument('--worker', action='store_true',
+                        help='Run as a fleet worker: lease manifest ranges from the coordinator')
+    parser.add_argument('--coordinator', default=None,
+                        help='Coordinator URL for --worker (sqlite:///path.db or http://host:8765)')
+    parser.add_argument('--worker-id', default=None,
+                        help='Worker identity for leases (default: hostname-pid)')
+    parser.add_argument('--merge', nargs='+', default=None, metavar='DB',
+                        help="Merge fleet workers' databases into DATABASE_PATH, then export")
+    parser.add_argument('--reparse', action='store_true',
+                        help='Rebuild products from the response cache with the current parsers (no network)')
+    parser.add_argument('--reparse-workers', type=int, default=None,
+                        help='Parse processes for --reparse (default: PARSE_WORKERS or one per core)')
+    parser.add_argument('--refresh', nargs='?', const='changes', choices=['changes', 'fulfillment'], default=None,
+                        help='Re-scrape the products most likely to have changed (change-aware refresh), or '
+                             '"fulfillment": refresh Target shipping from the fulfillment API only')
+    parser.add_argument('--budget', type=int, default=None,
+                        help='Products per retailer for --refresh (default: REFRESH_BUDGET)')
     
     args = parser.parse_args()
     
@@ -638,6 +1172,10 @@ async def main():
         CONFIG['skip_enum'] = True
     if args.skip:
         CONFIG['skip_products'] = args.skip
+    if args.record:
+        CONFIG['record_dir'] = args.record
+    if args.replay:
+        CONFIG['replay_base_url'] = args.replay
     
     scraper = RetailScraper()
     
@@ -655,8 +1193,23 @@ async def main():
     
     # Define the main scraping task
     async def scraping_task():
-        if args.enumerate_only:
+        if args.merge:
+            await scraper.run_merge(args.merge)
+        elif args.reparse:
+            await scraper.run_reparse(retailers=args.retailers, workers=args.reparse_workers)
+        elif args.refresh == 'fulfillment':
+            await scraper.run_fulfillment_refresh()
+        elif args.refresh:
+            await scraper.run_refresh(retailers=args.retailers, budget=args.budget)
+        elif args.enumerate_only:
             await scraper.run_enumeration_only(retailers=args.retailers)
+        elif args.worker:
+            await scraper.run_worker(
+                retailers=args.retailers,
+                resume=not args.no_resume,
+                coordinator_url=args.coordinator,
+                worker_id=args.worker_id
+            )
         else:
             resume = not args.no_resume
             await scraper.run_full_scrape(retailers=args.retailers, resume=resume)
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Local mock retailer server for offline benchmarking.
+
+Serves requests routed as http://127.0.0.1:8899/<host>/<path>?<query> (see replay.py).
+Answers come from a recorded corpus when one matches, otherwise from synthetic
+payloads shaped like the real ones:
+  - redsky pdp_client_v1 and product_fulfillment_and_variation_hierarchy_v1 JSON
+  - Target (gzipped) and Costco sitemap indexes and sitemaps
+  - Target product pages (__NEXT_DATA__), Costco / HomeGoods / TJ Maxx product HTML
+
+Latency, 5xx errors, 429 throttles and not-found products are injected per request.
+With --challenge-rate, Costco / HomeGoods / TJ Maxx product pages requested without a
+cf_clearance cookie are answered with a 403 Cloudflare-style challenge page instead.
+
+Usage:
+  python mock_server.py --port 8899 --latency-ms 120 --latency-sigma 0.6 --throttle-rate 0.01
+  REPLAY_BASE_URL=http://127.0.0.1:8899 python main.py --retailers target --skip-enum
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from aiohttp import web
+
+from replay import iter_corpus, load_entry_body
+
+
+class FaultProfile:
+    """Latency and failure distribution applied to every response."""
+    
+    def __init__(self, latency_ms: float = 0, latency_sigma: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, not_found_rate: float = 0.0, seed: int = None,
+                 challenge_rate: float = 0.0):
+        self.latency_ms = latency_ms  # Median latency
+        self.latency_sigma = latency_sigma  # Lognormal spread (0 = fixed latency)
+        self.error_rate = error_rate  # Fraction answered with 503
+        self.throttle_rate = throttle_rate  # Fraction answered with 429
+        self.not_found_rate = not_found_rate  # Fraction of product IDs that don't exist
+        self.challenge_rate = challenge_rate  # Fraction of product pages without cf_clearance that get a challenge
+        self.rng = random.Random(seed)
+    
+    def sample_latency(self) -> float:
+        """Latency in seconds for one response."""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return self.rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma) / 1000
+    
+    def sample_failure(self) -> Optional[int]:
+        """HTTP status to fail with, or None to answer normally."""
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+    
+    def sample_challenge(self) -> bool:
+        return self.challenge_rate > 0 and self.rng.random() < self.challenge_rate
+    
+    def is_missing(self, product_id: str) -> bool:
+        """Deterministic per ID, so a product stays missing across retries and runs."""
+        if self.not_found_rate <= 0:
+            return False
+        digest = hashlib.md5(str(product_id).encode()).digest()
+        return int.from_bytes(digest[:4], 'big') / 2**32 < self.not_found_rate
+
+
+CHALLENGE_PAGE = (
+    '<!DOCTYPE html><html><head><title>Just a moment...</title></head><body>'
+    '<div id="cf-browser-verification">Checking your browser before accessing the site.</div>'
+    '<script>window._cf_chl_opt = {cType: "managed"};</script></body></html>'
+)
+
+
+def _product_rng(product_id: str) -> random.Random:
+    """Per-product RNG so synthetic data is identical on every request."""
+    return random.Random(int(hashlib.md5(str(product_id).encode()).hexdigest()[:12], 16))
+
+
+def _padding(rng: random.Random, size_kb: int):
+    """Fields the parsers never read, sized like the bulk of a real pdp payload."""
+    blocks = []
+    while len(blocks) * 200 < size_kb * 1024:
+        blocks.append({
+            'promotion_id': f"{rng.getrandbits(40):x}",
+            'plp_message': 'Save 20% on select items with Target Circle' + ' ' * rng.randint(0, 20),
+            'legal_disclaimer': 'Offer valid in stores and online. Limit one per guest.',
+            'threshold_value': rng.randint(10, 100),
+        })
+    return blocks
+
+
+def synthetic_pdp(tcin: str, padding_kb: int = 40, store_id: str = '2064') -> Dict:
+    """Synthetic redsky pdp_client_v1 payload (prices vary a little by pricing store)."""
+    rng = _product_rng(tcin)
+    price = round(rng.uniform(3, 400), 2)
+    if store_id != '2064':
+        price = round(price * _product_rng(f"{tcin}:{store_id}").choice([0.9, 1, 1, 1.05]), 2)
+    return {
+        'data': {
+            'product': {
+                'tcin': tcin,
+                '__typename': 'Product',
+                'category': {'name': rng.choice(['Kitchen', 'Bedding', 'Toys', 'Home Decor', 'Storage'])},
+                'price': {
+                    'current_retail': price,
+                    'reg_retail': round(price * rng.choice([1, 1, 1.25]), 2),
+                    'formatted_current_price': f"${price:.2f}",
+                },
+                'fulfillment_fiats': {'is_out_of_stock_in_all_store_locations': rng.random() < 0.1},
+                'ratings_and_reviews': {
+                    'statistics': {'rating': {'average': round(rng.uniform(1, 5), 1), 'count': rng.randint(0, 5000)}},
+                },
+                'item': {
+                    'product_description': {
+                        'title': f"Synthetic Product {tcin} - {rng.choice(['Blue', 'Gray', 'White'])}",
+                        'downstream_description': 'A synthetic product used for offline benchmarks. ' * 6,
+                        'soft_bullets': {'bullets': [f"Feature {i}: detail text for bullet {i}" for i in range(6)]},
+                    },
+                    'primary_brand': {'name': rng.choice(['Threshold', 'Room Essentials', 'Brightroom', 'Hearth & Hand'])},
+                    'enrichment': {
+                        'images': {
+                            'primary_image_url': f"https://target.scene7.com/is/image/Target/GUEST_{tcin}_1",
+                            'primary_image': f"GUEST_{tcin}_1",
+                            'alternate_images': [f"GUEST_{tcin}_{i}" for i in range(2, 2 + rng.randint(1, 8))],
+                        },
+                    },
+                    'dpci': f"{rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}",
+                    'handling': {'buy_unit_of_measure': 'EACH'},
+                },
+                'promotions': _padding(rng, padding_kb),
+            }
+        }
+    }
+
+
+def synthetic_fulfillment(tcin: str, zip_code: str = '50000') -> Dict:
+    """Synthetic redsky product_fulfillment_and_variation_hierarchy_v1 payload."""
+    rng = _product_rng(f"{tcin}:{zip_code}")
+    arrival = datetime.now() + timedelta(days=rng.randint(1, 6))
+    return {
+        'data': {
+            'product': {
+                'tcin': tcin,
+                'fulfillment': {
+                    'shipping_options': {
+                        'availability_status': rng.choice(['IN_STOCK', 'IN_STOCK', 'OUT_OF_STOCK']),
+                        'services': [{
+                            'min_delivery_date': arrival.strftime('%Y-%m-%d'),
+                            'max_delivery_date': (arrival + timedelta(days=2)).strftime('%Y-%m-%d'),
+                            'shipping_method_short_description': 'Standard',
+                        }],
+                    },
+                },
+                'pay_per_order_charges': {'one_day': rng.choice([5.99, 6.99, 9.99]), 'scheduled_delivery': 9.99},
+            }
+        }
+    }
+
+
+def synthetic_target_page(tcin: str) -> str:
+    """Target product page with __NEXT_DATA__ (browser fallback path)."""
+    product = synthetic_pdp(tcin, padding_kb=10)['data']['product']
+    price = product['price']['current_retail']
+    next_data = {'props': {'pageProps': {'initialData': {'data': {'product': product}}}}}
+    return (
+        '<!DOCTYPE html><html><head><title>Target</title></head><body>'
+        f'<h1 data-test="product-title">{product["item"]["product_description"]["title"]}</h1>'
+        f'<span data-test="product-price">${price:.2f}</span>'
+        '<div data-test="shipping-block">Arrives by Fri, Oct 24</div>'
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        '</body></html>'
+    )
+
+
+def synthetic_product_html(retailer: str, product_id: str, with_json_ld: bool = True) -> str:
+    """Costco / HomeGoods / TJ Maxx style product page."""
+    rng = _product_rng(f"{retailer}:{product_id}")
+    title = f"{retailer.title()} Synthetic Item {product_id}"
+    price = round(rng.uniform(5, 900), 2)
+    image = f"https://images.example.com/{retailer}/{product_id}.jpg"
+    head = '<meta charset="utf-8"><title>' + title + '</title>'
+    if with_json_ld:
+        json_ld = {
+            '@context': 'https://schema.org',
+            '@type': 'Product',
+            'name': title,
+            'sku': product_id,
+            'brand': {'@type': 'Brand', 'name': rng.choice(['Kirkland Signature', 'Nautica', 'Cuisinart'])},
+            'image': image,
+            'description': 'Synthetic description for offline benchmarking.',
+            'category': 'Home > Kitchen',
+            'offers': {'@type': 'Offer', 'price': f"{price:.2f}", 'priceCurrency': 'USD',
+                       'availability': 'https://schema.org/InStock'},
+            'aggregateRating': {'ratingValue': round(rng.uniform(1, 5), 1), 'reviewCount': rng.randint(0, 900)},
+        }
+        head += f'<script type="application/ld+json">{json.dumps(json_ld)}</script>'
+    # Navigation / footer bulk so pages are sized like real ones
+    filler = ''.join(f'<li><a href="/category/{i}">Category {i}</a></li>' for i in range(400))
+    return (
+        f'<!DOCTYPE html><html><head>{head}</head><body>'
+        f'<nav class="breadcrumb"><a href="/">Home</a><a href="/kitchen">Kitchen</a></nav>'
+        f'<ul class="mega-menu">{filler}</ul>'
+        f'<h1 class="product-title" itemprop="name">{title}</h1>'
+        f'<span class="brand-name">Synthetic Brand</span>'
+        f'<span class="product-price value">${price:.2f}</span>'
+        f'<div class="product-images"><img class="product-image" itemprop="image" src="{image}"></div>'
+        f'<div class="product-description" itemprop="description">Synthetic description for {product_id}.</div>'
+        '</body></html>'
+    )
+
+
+def synthetic_sitemap_index(host: str, files: int) -> bytes:
+    """Sitemap index listing `files` product sitemaps."""
+    # Target serves gzipped sitemaps, Costco plain XML
+    name, ext = ('sitemap_pdp', '.xml.gz') if 'target' in host else ('sitemap_lw_products', '.xml')
+    locs = ''.join(f'<sitemap><loc>https://{host}/{name}-{i}{ext}</loc></sitemap>' for i in range(files))
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex>{locs}</sitemapindex>'.encode('utf-8')
+
+
+def synthetic_sitemap(host: str, file_index: int, per_file: int) -> bytes:
+    """Product sitemap with `per_file` product URLs."""
+    start = 10000000 + file_index * per_file
+    if 'target' in host:
+        urls = (f'https://{host}/p/synthetic-product/-/A-{start + i}' for i in range(per_file))
+    else:
+        urls = (f'https://{host}/synthetic-item.product.{start + i}.html' for i in range(per_file))
+    locs = ''.join(f'<url><loc>{url}</loc></url>' for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset>{locs}</urlset>'.encode('utf-8')
+
+
+class MockRetailerServer:
+    """aiohttp app serving corpus entries and synthetic retailer responses."""
+    
+    def __init__(self, profile: FaultProfile = None, corpus_dir: str = None, sitemap_files: int = 4,
+                 sitemap_urls_per_file: int = 1000, pdp_padding_kb: int = 40):
+        self.profile = profile or FaultProfile()
+        self.sitemap_files = sitemap_files
+        self.sitemap_urls_per_file = sitemap_urls_per_file
+        self.pdp_padding_kb = pdp_padding_kb
+        self.corpus = {}
+        self.stats = defaultdict(int)
+        
+        if corpus_dir:
+            for entry in iter_corpus(corpus_dir):
+                parts = urlsplit(entry['url'])
+                self.corpus[(parts.netloc, parts.path, parts.query)] = entry
+            print(f"[MOCK] Loaded {len(self.corpus):,} recorded responses from {corpus_dir}")
+    
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/__stats', self.handle_stats)
+        app.router.add_route('*', '/{host}/{tail:.*}', self.handle)
+        return app
+    
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        host = request.match_info['host']
+        path = '/' + request.match_info['tail']
+        query = request.query_string
+        
+        await asyncio.sleep(self.profile.sample_latency())
+        
+        failure = self.profile.sample_failure()
+        if failure:
+            self.stats[str(failure)] += 1
+            return web.Response(status=failure, text='Too Many Requests' if failure == 429 else 'Service Unavailable')
+        
+        entry = self.corpus.get((host, path, query))
+        if entry:
+            self.stats['corpus'] += 1
+            return web.Response(status=entry['status'], body=load_entry_body(entry),
+                                content_type=(entry.get('content_type') or 'text/html').split(';')[0])
+        
+        if (any(name in host for name in ('costco', 'homegoods', 'tjmaxx')) and 'sitemap' not in path
+                and 'cf_clearance' not in request.cookies and self.profile.sample_challenge()):
+            self.stats['challenge'] += 1
+            return web.Response(status=403, text=CHALLENGE_PAGE, content_type='text/html', headers={'cf-mitigated': 'challenge'})
+        
+        response = self._synthetic(host, path, dict(parse_qsl(query)))
+        self.stats[str(response.status)] += 1
+        return response
+    
+    def _synthetic(self, host: str, path: str, params: Dict[str, str]) -> web.Response:
+        """Synthetic answer by host and path shape."""
+        if host.startswith('redsky'):
+            tcin = params.get('tcin', '')
+            if 'pdp_client' in path:
+                if self.profile.is_missing(tcin):
+                    return web.json_response({'data': {'product': None}})
+                return web.json_response(synthetic_pdp(tcin, self.pdp_padding_kb, params.get('pricing_store_id', '2064')))
+            if 'fulfillment' in path:
+                return web.json_response(synthetic_fulfillment(tcin, params.get('zip', '50000')))
+            return web.json_response({'errors': [{'message': 'unknown aggregation'}]}, status=404)
+        
+        if 'sitemap' in path:
+            if 'index' in path:
+                body = synthetic_sitemap_index(host, self.sitemap_files)
+            else:
+                digits = ''.join(ch for ch in path.rsplit('-', 1)[-1] if ch.isdigit())
+                body = synthetic_sitemap(host, int(digits or 0), self.sitemap_urls_per_file)
+            if path.endswith('.gz'):
+                body = gzip.compress(body)
+            return web.Response(body=body, content_type='application/xml')
+        
+        if 'target.com' in host:
+            tcin = path.rsplit('A-', 1)[-1]
+            if self.profile.is_missing(tcin):
+                return web.Response(status=404, text='Not Found')
+            return web.Response(text=synthetic_target_page(tcin), content_type='text/html')
+        
+        retailer = next((name for name in ('costco', 'homegoods', 'tjmaxx') if name in host), None)
+        if retailer:
+            product_id = ''.join(ch for ch in path if ch.isdigit()) or path
+            if self.profile.is_missing(product_id):
+                return web.Response(status=404, text='Not Found')
+            # HomeGoods / TJ Maxx pages often lack JSON-LD - serve both shapes
+            with_json_ld = retailer == 'costco' or int(hashlib.md5(product_id.encode()).hexdigest(), 16) % 2 == 0
+            return web.Response(text=synthetic_product_html(retailer, product_id, with_json_ld),
+                                content_type='text/html')
+        
+        return web.Response(status=404, text='Not Found')
+
+
+async def start_mock_server(server: MockRetailerServer, host: str = '127.0.0.1', port: int = 8899):
+    """Start the server inside the current event loop. Returns (runner, base_url)."""
+    runner = web.AppRunner(server.build_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    # Port 0 picks a free port - read back the real one
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+async def _serve_forever(server: MockRetailerServer, host: str, port: int):
+    runner, base_url = await start_mock_server(server, host, port)
+    print(f"[MOCK] Serving on {base_url}  (set REPLAY_BASE_URL={base_url})")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Mock retailer server for offline benchmarking')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--corpus', default=None, help='Recorded corpus directory (from --record)')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Lognormal latency spread (0 = fixed)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 503 responses')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of 429 responses')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='Fraction of product IDs that 404')
+    parser.add_argument('--challenge-rate', type=float, default=0.0,
+                        help='Fraction of Costco/HomeGoods/TJ Maxx product pages without a cf_clearance cookie that get a 403 challenge')
+    parser.add_argument('--sitemap-files', type=int, default=4)
+    parser.add_argument('--sitemap-urls-per-file', type=int, default=1000)
+    parser.add_argument('--pdp-padding-kb', type=int, default=40, help='Unread bulk added to each pdp payload')
+    parser.add_argument('--seed', type=int, default=None)
+    
+    args = parser.parse_args()
+    
+    profile = FaultProfile(args.latency_ms, args.latency_sigma, args.error_rate,
+                           args.throttle_rate, args.not_found_rate, args.seed, args.challenge_rate)
+    server = MockRetailerServer(profile, args.corpus, args.sitemap_files,
+                                args.sitemap_urls_per_file, args.pdp_padding_kb)
+    try:
+        asyncio.run(_serve_forever(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,53 @@
+"""
+Product record passed from the scrapers through the pipeline to the database.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Union
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """
+    One scraped product. Field order matches the products table columns,
+    so a record maps directly onto the precompiled insert in Database.
+    """
+    product_id: str
+    retailer: str
+    product_url: str
+    title: Optional[str] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    price_current: Optional[float] = None
+    price_compare_at: Optional[float] = None
+    currency: str = 'USD'
+    availability: Optional[str] = None
+    description: Optional[str] = None
+    specifications: Union[str, Dict, List, None] = None  # Stored as JSON
+    image_urls: Union[List[str], str, None] = None  # Stored as JSON
+    ratings_average: Optional[float] = None
+    ratings_count: Optional[int] = None
+    shipping_cost: Optional[float] = None
+    shipping_estimate: Optional[str] = None
+    variants: Union[str, Dict, List, None] = None  # Stored as JSON
+    seller: Optional[str] = None
+    scraped_at: Optional[str] = None
+    scrape_run_id: Optional[int] = None
+    status: str = 'success'
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """dict-style access for callers that check optional fields; unset (None) fields return default."""
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PRODUCT_COLUMNS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProductRecord':
+        """Build a record from a product dict; keys that aren't products columns are ignored."""
+        return cls(**{key: value for key, value in data.items() if key in _COLUMN_SET})
+
+
+PRODUCT_COLUMNS = tuple(f.name for f in fields(ProductRecord))
+_COLUMN_SET = frozenset(PRODUCT_COLUMNS)
@@ -0,0 +1,158 @@
+"""
+Parse executor: runs CPU-bound page parsing off the asyncio loop.
+
+Scrapers hand raw page bytes to ParseExecutor.parse(), which runs the named
+scraper parse method either inline (on the loop) or in a process pool sized to
+the machine's cores. While a 1-2 MB page is being parsed in a worker, the loop
+keeps servicing every other in-flight request.
+
+Modes (CONFIG['parse_executor'] / PARSE_EXECUTOR):
+  - 'inline':  parse on the loop (default; no extra processes)
+  - 'process': ProcessPoolExecutor with CONFIG['parse_workers'] workers (default: cores)
+
+Stats: parses, queue wait (submit -> worker start) and parse time, plus the
+script-block fast-path stats (scrapers/script_extract.py) counted in the workers.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from utils import percentile_ms
+
+# Per-worker-process scraper instances (parsers only need config and helpers)
+_WORKER_SCRAPERS: Dict[str, Any] = {}
+_WORKER_CONFIG: Dict[str, Any] = {}
+
+
+def _init_worker(parse_config: Dict[str, Any]):
+    _WORKER_CONFIG.update(parse_config)
+
+
+def _get_scraper(retailer: str):
+    scraper = _WORKER_SCRAPERS.get(retailer)
+    if scraper is None:
+        from config import CONFIG
+        from scrapers import TargetScraper, CostcoScraper, HomeGoodsScraper, TJMaxxScraper
+        
+        classes = {'target': TargetScraper, 'costco': CostcoScraper,
+                   'homegoods': HomeGoodsScraper, 'tjmaxx': TJMaxxScraper}
+        # No recording/replay/caching in workers - parsing never fetches
+        config = dict(CONFIG, record_dir=None, replay_base_url=None, response_cache=None, **_WORKER_CONFIG)
+        scraper = classes[retailer](config, None, None, None, None)
+        _WORKER_SCRAPERS[retailer] = scraper
+    return scraper
+
+
+def parse_payload(retailer: str, method: str, payload: bytes, product_url: str, product_id: str,
+                  kwargs: Dict[str, Any], submitted_at: float) -> tuple:
+    """
+    Worker entry point: decode the page and run scraper.<method>(html, url, id, **kwargs).
+    Returns (result, queue_wait_seconds, parse_seconds, script_stats_delta).
+    """
+    from scrapers import script_extract
+    
+    started_at = time.time()
+    start = time.perf_counter()
+    stats_before = script_extract.stats_snapshot()
+    scraper = _get_scraper(retailer)
+    result = getattr(scraper, method)(payload.decode('utf-8', errors='replace'), product_url, product_id, **kwargs)
+    return result, started_at - submitted_at, time.perf_counter() - start, script_extract.stats_delta(stats_before)
+
+
+class ParseExecutor:
+    """Runs scraper parse methods inline or in a process pool, with timing stats."""
+    
+    def __init__(self, config: Dict, mode: str = None):
+        self.mode = (mode or config.get('parse_executor') or 'inline').lower()
+        if self.mode not in ('inline', 'process'):
+            print(f"  ⚠️  Unknown parse_executor '{self.mode}', using inline")
+            self.mode = 'inline'
+        self.workers = config.get('parse_workers') or os.cpu_count() or 1
+        # Settings the worker processes need (they re-import config under spawn)
+        self.parse_config = {'html_backend': config.get('html_backend')}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        self.parsed = 0
+        self.failed = 0
+        self.queue_waits = deque(maxlen=10000)
+        self.parse_times = deque(maxlen=10000)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the parent runs Playwright and asyncio threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.parse_config,),
+            )
+        return self._pool
+    
+    async def parse(self, retailer: str, method: str, html: str, product_url: str, product_id: str,
+                    **kwargs) -> Any:
+        """Parse a page with scraper.<method>; returns whatever the parser returns."""
+        payload = html.encode('utf-8') if isinstance(html, str) else html
+        
+        if self.mode == 'process':
+            try:
+                result, queue_wait, parse_time, script_stats = await asyncio.get_running_loop().run_in_executor(
+                    self._get_pool(), parse_payload,
+                    retailer, method, payload, product_url, product_id, kwargs, time.time(),
+                )
+                # Script-block stats were counted in the worker process
+                from scrapers import script_extract
+                script_extract.merge_stats(script_stats)
+                self._record(result, queue_wait, parse_time)
+                return result
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM) - start a fresh pool next time, parse this one inline
+                print(f"  ⚠️  Parse worker pool broke, restarting (parsing {product_id} inline)")
+                self._pool = None
+        
+        result, _, parse_time, _ = parse_payload(retailer, method, payload, product_url, product_id, kwargs, time.time())
+        self._record(result, 0.0, parse_time)
+        return result
+    
+    def _record(self, result: Any, queue_wait: float, parse_time: float):
+        self.parsed += 1
+        if result is None:
+            self.failed += 1
+        self.queue_waits.append(queue_wait)
+        self.parse_times.append(parse_time)
+    
+    def get_stats(self) -> Dict:
+        queue_waits = sorted(self.queue_waits)
+        parse_times = sorted(self.parse_times)
+        return {
+            'mode': self.mode,
+            'workers': self.workers if self.mode == 'process' else 0,
+            'parsed': self.parsed,
+            'parse_failed': self.failed,
+            'queue_wait_p50_ms': percentile_ms(queue_waits, 50),
+            'queue_wait_p95_ms': percentile_ms(queue_waits, 95),
+            'parse_p50_ms': percentile_ms(parse_times, 50),
+            'parse_p95_ms': percentile_ms(parse_times, 95),
+        }
+    
+    def print_stats(self):
+        if not self.parsed:
+            return
+        stats = self.get_stats()
+        print(f"  Parsing ({stats['mode']}{', ' + str(stats['workers']) + ' workers' if stats['workers'] else ''}): "
+              f"{stats['parsed']:,} pages | parse p50 {stats['parse_p50_ms']}ms p95 {stats['parse_p95_ms']}ms | "
+              f"queue wait p50 {stats['queue_wait_p50_ms']}ms p95 {stats['queue_wait_p95_ms']}ms")
+        
+        from scrapers import script_extract
+        script_extract.print_stats()
+    
+    def shutdown(self):
+        """Stop worker processes (a later parse() starts a new pool)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,79 @@
+"""
+Batched product writes for the scrape loop.
+
+Writing each successful scrape with its own connection, reads and commit on the
+event loop stalls every fetch in flight. The writer collects scraped products and
+hands batch_size of them at a time to Database.insert_products in a worker thread:
+one transaction per batch, and the loop keeps scheduling fetches meanwhile. One
+batch is written at a time.
+
+The scrape loop flushes at the end of every batch (before live exports read the
+table), so a crash loses at most the products scraped since; resume re-scrapes them.
+A batch that fails to write is kept and tried again with the next one.
+
+Settings: CONFIG['db_write_batch'].
+"""
+
+import asyncio
+import time
+from typing import Dict, List
+
+from models import ProductRecord
+
+
+class ProductWriter:
+    """Buffer of scraped products, written in batches off the event loop."""
+    
+    def __init__(self, database, batch_size: int = 200):
+        self.database = database
+        self.batch_size = max(batch_size, 1)
+        self._pending: List[ProductRecord] = []
+        self._lock = asyncio.Lock()
+        self.stats = {'batches': 0, 'products': 0, 'write_seconds': 0.0, 'failed_batches': 0}
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    async def add(self, product: ProductRecord):
+        """Queue a product; writes the batch once batch_size are waiting."""
+        self._pending.append(product)
+        if len(self._pending) >= self.batch_size and not self._lock.locked():
+            await self.flush()
+    
+    async def flush(self):
+        """Write everything queued so far."""
+        async with self._lock:
+            products, self._pending = self._pending, []
+            if not products:
+                return
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.database.insert_products, products)
+            except Exception as e:
+                # Keep them for the next flush rather than losing scraped products
+                print(f"\n  ⚠️  DB write of {len(products):,} products failed, will retry: {e}")
+                self._pending[:0] = products
+                self.stats['failed_batches'] += 1
+                return
+            self.stats['batches'] += 1
+            self.stats['products'] += len(products)
+            self.stats['write_seconds'] += time.perf_counter() - start
+    
+    def get_stats(self) -> Dict:
+        stats = self.stats
+        return {
+            'batches': stats['batches'],
+            'products': stats['products'],
+            'failed_batches': stats['failed_batches'],
+            'avg_batch_size': round(stats['products'] / stats['batches'], 1) if stats['batches'] else 0.0,
+            'avg_batch_ms': round(stats['write_seconds'] / stats['batches'] * 1000, 1) if stats['batches'] else 0.0,
+            'products_per_second': round(stats['products'] / stats['write_seconds']) if stats['write_seconds'] else 0,
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['batches']:
+            return
+        print(f"  DB batches: {stats['batches']:,} of avg {stats['avg_batch_size']:,} products "
+              f"(avg {stats['avg_batch_ms']:,}ms, {stats['products_per_second']:,} products/s written off the event loop)"
+              + (f" | {stats['failed_batches']:,} failed and retried" if stats['failed_batches'] else ""))
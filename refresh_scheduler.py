@@ -0,0 +1,168 @@
+"""
+Change-aware refresh scheduling.
+
+Each successful scrape is an observation of a product's price and availability
+(Database.insert_product updates product_change_stats). From those, every product
+gets an estimated change rate (changes/day):
+
+    rate = (changes + prior_changes) / (observed_days + prior_days)
+
+a Poisson rate with a gamma prior, so new products start at roughly one change
+per prior_days and volatile ones move up as changes are seen. The chance that a
+product has changed since it was last scraped is then
+
+    P(changed) = 1 - exp(-rate * days_since_scrape)
+
+and next_due_at is when that reaches due_probability. A refresh manifest lists
+the `budget` products with the highest P(changed): with a fixed number of
+requests per day, that ordering maximises the expected number of changes found.
+
+Settings: CONFIG['refresh'], passed in by the caller (RefreshScheduler, Database).
+"""
+
+import csv
+import heapq
+import math
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from utils import ensure_directory, format_timestamp
+
+SECONDS_PER_DAY = 86400.0
+
+
+def change_rate(changes: int, observed_days: float, settings: Dict) -> float:
+    """Estimated changes per day (gamma-Poisson posterior mean)."""
+    return (changes + settings.get('prior_changes', 1.0)) / (observed_days + settings.get('prior_days', 14.0))
+
+
+def change_probability(rate: float, age_days: float) -> float:
+    """Chance a product with this change rate changed in the last age_days."""
+    return 1.0 - math.exp(-rate * max(age_days, 0.0))
+
+
+def next_due(last_scraped_at: float, rate: float, settings: Dict) -> float:
+    """Time (epoch seconds) when P(changed) reaches due_probability, within the interval bounds."""
+    interval_days = -math.log(1.0 - settings.get('due_probability', 0.5)) / rate
+    interval_days = min(max(interval_days, settings.get('min_interval_hours', 12) / 24),
+                        settings.get('max_interval_days', 30))
+    return last_scraped_at + interval_days * SECONDS_PER_DAY
+
+
+def observe(previous: Optional[Dict], product, now: float, settings: Dict) -> Tuple:
+    """
+    New product_change_stats row for one scrape of product, given its previous row
+    (None on first sight). Column order matches Database.UPSERT_CHANGE_STATS_SQL.
+    """
+    price = product.price_current
+    availability = product.availability
+    if previous is None:
+        observations, changes, price_changes, availability_changes, observed_days = 1, 0, 0, 0, 0.0
+        first_seen_at, last_changed_at = now, None
+    else:
+        price_changed = _price_changed(previous['last_price'], price)
+        availability_changed = (previous['last_availability'] or None) != (availability or None)
+        observations = previous['observations'] + 1
+        # A scrape detects at most one change however many fields moved
+        changes = previous['changes'] + (price_changed or availability_changed)
+        price_changes = previous['price_changes'] + price_changed
+        availability_changes = previous['availability_changes'] + availability_changed
+        observed_days = previous['observed_days'] + max(now - (previous['last_scraped_at'] or now), 0) / SECONDS_PER_DAY
+        first_seen_at = previous['first_seen_at']
+        last_changed_at = now if (price_changed or availability_changed) else previous['last_changed_at']
+    
+    rate = change_rate(changes, observed_days, settings)
+    return (product.product_id, product.retailer, observations, changes, price_changes, availability_changes,
+            observed_days, price, availability, first_seen_at, now, last_changed_at, rate, next_due(now, rate, settings))
+
+
+def _price_changed(old: Optional[float], new: Optional[float]) -> bool:
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    return abs(old - new) >= 0.005
+
+
+def _epoch(value) -> Optional[float]:
+    """products.scraped_at (ISO string or 'YYYY-MM-DD HH:MM:SS') as epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+class RefreshScheduler:
+    """Builds refresh manifests from product_change_stats."""
+    
+    def __init__(self, config: Dict, database):
+        self.config = config
+        self.database = database
+        self.settings = config.get('refresh') or {}
+    
+    def _candidates(self, retailer: str, now: float) -> Iterator[Tuple[float, str, float]]:
+        """(P(changed), url, next_due_at) for every stored product not scraped within min_interval_hours."""
+        min_age_days = self.settings.get('min_interval_hours', 12) / 24
+        prior_rate = change_rate(0, 0.0, self.settings)
+        with self.database.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT p.product_url, p.scraped_at, s.last_scraped_at, s.change_rate, s.next_due_at
+                FROM products p LEFT JOIN product_change_stats s ON s.product_id = p.product_id
+                WHERE p.retailer = ?
+            """, (retailer,))
+            for url, scraped_at, last_scraped_at, rate, due_at in rows:
+                # Products scraped before change tracking: prior rate, age from products.scraped_at
+                last = last_scraped_at or _epoch(scraped_at)
+                age_days = (now - last) / SECONDS_PER_DAY if last else self.settings.get('max_interval_days', 30)
+                if age_days < min_age_days:
+                    continue
+                rate = rate or prior_rate
+                yield change_probability(rate, age_days), url, due_at or (next_due(last, rate, self.settings) if last else now)
+    
+    def build_manifest(self, retailer: str, budget: int = None, now: float = None) -> Tuple[Optional[str], Dict]:
+        """
+        Write manifests/refresh_<retailer>_<timestamp>.csv with the `budget` products most
+        likely to have changed, most likely first. Returns (path, summary).
+        """
+        now = now or time.time()
+        budget = budget or (self.settings.get('budget') or {}).get(retailer, 100000)
+        
+        eligible = 0
+        probability_total = 0.0
+        overdue = 0
+        
+        def counted():
+            nonlocal eligible, probability_total, overdue
+            for candidate in self._candidates(retailer, now):
+                eligible += 1
+                probability_total += candidate[0]
+                overdue += candidate[2] <= now
+                yield candidate
+        
+        selected = heapq.nlargest(budget, counted(), key=lambda candidate: candidate[0])
+        summary = {
+            'eligible': eligible,
+            'overdue': overdue,
+            'selected': len(selected),
+            # Expected changes found by this manifest vs. the same budget spent without priorities
+            'expected_changes': round(sum(candidate[0] for candidate in selected), 1),
+            'expected_changes_unordered': round(probability_total / eligible * len(selected), 1) if eligible else 0.0,
+        }
+        if not selected:
+            return None, summary
+        
+        path = ensure_directory(self.config['manifests_dir']) / f"refresh_{retailer}_{format_timestamp()}.csv"
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url', 'change_probability', 'next_due_at'])
+            for probability, url, due_at in selected:
+                writer.writerow([url, round(probability, 4), datetime.fromtimestamp(due_at).isoformat(timespec='minutes')])
+        return str(path), summary
+    
+    def print_summary(self, retailer: str, path: Optional[str], summary: Dict):
+        print(f"[{retailer}] Refresh: {summary['selected']:,} of {summary['eligible']:,} products "
+              f"({summary['overdue']:,} overdue) | expected changes found: {summary['expected_changes']:,} "
+              f"(vs {summary['expected_changes_unordered']:,} unprioritised)")
+        if path:
+            print(f"  ✓ Manifest: {path}")
@@ -0,0 +1,87 @@
+"""
+Record/replay support for offline benchmarking.
+
+Recording: the shared fetch path writes each request/response pair to a corpus
+directory (one JSON file per URL, grouped by host).
+
+Replay: fetches are routed to mock_server.py as http://<replay>/<host>/<path>?<query>,
+which answers from the corpus (or synthetic payloads) with injected latency and errors.
+"""
+
+import base64
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from utils import ensure_directory
+
+
+def corpus_key(method: str, url: str) -> str:
+    """Stable file name for a request."""
+    return hashlib.sha1(f"{method.upper()} {url}".encode('utf-8')).hexdigest()[:20]
+
+
+def replay_url(base_url: str, url: str) -> str:
+    """Map https://host/path?query to <base_url>/host/path?query."""
+    parts = urlsplit(url)
+    routed = f"{base_url.rstrip('/')}/{parts.netloc}{parts.path or '/'}"
+    if parts.query:
+        routed += f"?{parts.query}"
+    return routed
+
+
+class ResponseRecorder:
+    """Write request/response pairs to an on-disk corpus."""
+    
+    def __init__(self, corpus_dir: str):
+        self.corpus_dir = ensure_directory(corpus_dir)
+        self.recorded = 0
+    
+    def record(self, method: str, url: str, status: int, content_type: Optional[str],
+               body: bytes, elapsed_seconds: float = None):
+        """Store one response. Later recordings of the same URL overwrite earlier ones."""
+        host = urlsplit(url).netloc or 'unknown'
+        entry = {
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            'content_type': content_type,
+            'elapsed_ms': round(elapsed_seconds * 1000, 1) if elapsed_seconds is not None else None,
+            'recorded_at': time.time(),
+        }
+        try:
+            entry['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            # Gzipped sitemaps and other binary payloads
+            entry['body_b64'] = base64.b64encode(body).decode('ascii')
+        
+        try:
+            host_dir = ensure_directory(str(self.corpus_dir / host))
+            with open(host_dir / f"{corpus_key(method, url)}.json", 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            self.recorded += 1
+        except OSError as e:
+            print(f"  ⚠️  Failed to record {url[:80]}: {e}")
+
+
+def load_entry_body(entry: Dict) -> bytes:
+    """Get the raw body bytes of a corpus entry."""
+    if 'body_b64' in entry:
+        return base64.b64decode(entry['body_b64'])
+    return (entry.get('body') or '').encode('utf-8')
+
+
+def iter_corpus(corpus_dir: str) -> Iterator[Dict]:
+    """Yield every recorded entry in a corpus directory."""
+    root = Path(corpus_dir)
+    if not root.exists():
+        return
+    for path in sorted(root.glob('*/*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"  ⚠️  Skipping corrupt corpus entry {path}: {e}")
@@ -1,125 +1,213 @@
 """
 Re-scrape products that were missing critical data fields.
-This script uses browser fallback to get missing shipping estimates and other data.
+
+Incomplete products are re-fetched concurrently (all retailers at once), each with the
+cheapest fetch that can supply what it is missing:
+  - Target, only shipping_estimate missing: the fulfillment API alone (one request)
+  - Target, other fields missing: the redsky API (pdp + fulfillment)
+  - still missing after that, or a retailer scraped from product pages: a browser page,
+    in a lane of CONFIG['rescrape']['browser_lane'] slots shared by all retailers
+New values are merged into the stored row. Products that are now complete leave
+incomplete_products; the rest are marked rescrape_attempted, so a rerun resumes with
+the products not tried yet.
+
+Usage:
+  python rescrape_incomplete.py                               # All retailers
+  python rescrape_incomplete.py --retailer target --max-items 500
+  python rescrape_incomplete.py --include-attempted           # Also retry ones already re-scraped
 """
 import asyncio
 import argparse
-from database import Database
-from browser_manager import BrowserManager
-from rate_limiter import RateLimiter
-from proxy_manager import ProxyManager
-from config import CONFIG
-from scrapers.target import TargetScraper
 import json
+from datetime import datetime
+from typing import Dict, List
 
-async def rescrape_incomplete(retailer: str, max_items: int = None):
-    """Re-scrape incomplete products for a retailer."""
-    
-    database = Database(CONFIG['database_path'])
-    browser_manager = BrowserManager(CONFIG)
-    rate_limiter = RateLimiter(CONFIG)
-    proxy_manager = ProxyManager(CONFIG)
-    
-    # Get incomplete products
-    incomplete = database.get_incomplete_products(retailer=retailer, rescrape_attempted=False)
-    
-    if not incomplete:
-        print(f"No incomplete products found for {retailer}")
-        return
-    
-    print(f"\n{'='*80}")
-    print(f"RE-SCRAPING INCOMPLETE PRODUCTS: {retailer.upper()}")
-    print(f"{'='*80}")
-    print(f"Total incomplete: {len(incomplete):,} products")
-    
-    if max_items:
-        incomplete = incomplete[:max_items]
-        print(f"Limited to: {max_items} products\n")
+from config import CONFIG
+from main import RetailScraper
+from models import ProductRecord, PRODUCT_COLUMNS
+from utils import ProgressTracker
+
+# Critical fields as main.py records them in missing_fields -> products column
+CRITICAL_FIELDS = {
+    'price': 'price_current',
+    'title': 'title',
+    'brand': 'brand',
+    'shipping_estimate': 'shipping_estimate',
+    'description': 'description',
+}
+SHIPPING_FIELDS = {'shipping_estimate'}
+BATCH_SIZE = 10000  # Products in flight per retailer
+
+
+def get_missing_fields(product: ProductRecord) -> List[str]:
+    return [name for name, column in CRITICAL_FIELDS.items() if not product.get(column)]
+
+
+class IncompleteRescraper:
+    """Concurrent re-scrape of incomplete_products with per-product fetch plans."""
     
-    # Initialize scraper
-    if retailer == 'target':
-        scraper = TargetScraper(CONFIG, database, browser_manager, rate_limiter, proxy_manager)
-    else:
-        print(f"Scraper for {retailer} not yet implemented")
-        return
+    def __init__(self, config: Dict):
+        self.config = config
+        self.app = RetailScraper()
+        self.database = self.app.database
+        self.browser_lane = asyncio.Semaphore(config['rescrape']['browser_lane'])
+        
+        self.stats = {
+            # Fetches by tier
+            'fulfillment': 0,
+            'api': 0,
+            'page': 0,
+            'browser': 0,
+            # Outcomes
+            'attempted': 0,
+            'complete': 0,
+            'still_incomplete': 0,
+            'not_found': 0,
+            'failed': 0,
+        }
     
-    await browser_manager.initialize()
+    def plan(self, retailer: str, missing: List[str]) -> List[str]:
+        """Fetch tiers to try in order, cheapest first, until nothing is missing."""
+        if retailer == 'target':
+            return ['fulfillment' if set(missing) <= SHIPPING_FIELDS else 'api', 'browser']
+        return ['page']
     
-    success = 0
-    still_incomplete = 0
+    async def fetch(self, tier: str, scraper, product_id: str, product_url: str, retailer_lane: asyncio.Semaphore):
+        """Run one tier: a ProductRecord, a dict of fields, {'status': 'not_found'} or None."""
+        if tier == 'fulfillment':
+            async with retailer_lane:
+                return await scraper.fetch_fulfillment(product_id, product_url)
+        if tier == 'api':
+            # Marketplace products and API failures need a page: that runs in the browser lane, not here
+            async with retailer_lane:
+                result = await scraper.scrape_product(product_url, product_id, browser_handoff=True)
+            if result and result.get('status') == 'needs_browser':
+                async with self.browser_lane:
+                    result = await scraper.scrape_handoff(product_url, product_id, result)
+            return result
+        if tier == 'browser':
+            async with self.browser_lane:
+                return await scraper._scrape_in_browser(product_url, product_id)
+        # 'page': hybrid-fetch retailers go over HTTP first, the others open a browser page
+        lane = retailer_lane if scraper.clearance.enabled_for(scraper.retailer_name) else self.browser_lane
+        async with lane:
+            return await scraper.scrape_product(product_url, product_id)
     
-    for i, item in enumerate(incomplete, 1):
+    async def rescrape_one(self, item: Dict, retailer_lane: asyncio.Semaphore, progress: ProgressTracker):
+        retailer = item['retailer']
         product_id = item['product_id']
         product_url = item['product_url']
-        missing_fields = json.loads(item['missing_fields'])
-        
-        print(f"\n[{i}/{len(incomplete)}] {product_id}")
-        print(f"  Missing: {', '.join(missing_fields)}")
-        print(f"  URL: {product_url}")
+        # Older runs of this script recorded 'price_current' rather than 'price'
+        missing = ['price' if field == 'price_current' else field for field in json.loads(item['missing_fields'])]
+        scraper = self.app.scrapers[retailer]
+        self.stats['attempted'] += 1
         
-        try:
-            # Force browser scraping for these products
-            context = await browser_manager.create_context(retailer)
-            page = await browser_manager.new_page(context)
-            await page.goto(product_url, wait_until='networkidle', timeout=30000)
-            
-            # Use browser fallback parser
-            result = await scraper._parse_browser_fallback_live(page, product_url, product_id)
+        product = self.database.get_product(product_id) or ProductRecord(product_id, retailer, product_url)
+        updated = not_found = False
+        for tier in self.plan(retailer, missing):
+            self.stats[tier] += 1
+            try:
+                result = await self.fetch(tier, scraper, product_id, product_url, retailer_lane)
+            except Exception as e:
+                print(f"\n  [ERROR] {retailer} {product_id} ({tier}): {e}")
+                continue
+            if not result:
+                continue
+            if result.get('status') == 'not_found':
+                not_found = True
+                break
             
-            await browser_manager.close_context(context)
-            
-            if result:
-                # Update database
-                result['scrape_run_id'] = item['scrape_run_id']
-                database.insert_product(result)
-                
-                # Check if still incomplete
-                still_missing = []
-                for field in ['price_current', 'title', 'brand', 'shipping_estimate', 'description']:
-                    if not result.get(field):
-                        still_missing.append(field)
-                
-                if still_missing:
-                    print(f"  [PARTIAL] Still missing: {', '.join(still_missing)}")
-                    still_incomplete += 1
-                    # Update incomplete record
-                    database.log_incomplete_product(product_id, retailer, product_url, still_missing, item['scrape_run_id'])
-                else:
-                    print(f"  [SUCCESS] All fields captured!")
-                    success += 1
-                    # Remove from incomplete table
-                    with database.get_connection() as conn:
-                        conn.execute("DELETE FROM incomplete_products WHERE product_id = ?", (product_id,))
-                        conn.commit()
+            # Keep stored values for anything this fetch didn't return
+            values = result.to_dict() if isinstance(result, ProductRecord) else result
+            for column, value in values.items():
+                if column in PRODUCT_COLUMNS and column != 'scrape_run_id' and value not in (None, '', []):
+                    setattr(product, column, value)
+            updated = True
+            missing = get_missing_fields(product)
+            if not missing:
+                break
+        
+        if updated:
+            product.scrape_run_id = item['scrape_run_id']
+            product.scraped_at = datetime.now().isoformat()
+            self.database.insert_product(product)
+        
+        if updated and not missing:
+            self.database.resolve_incomplete_product(product_id)
+            self.stats['complete'] += 1
+            progress.record_success()
+        else:
+            self.database.mark_rescrape_attempted(product_id, missing)
+            if not_found:
+                self.stats['not_found'] += 1
+                progress.record_failure('not_found')
             else:
-                print(f"  [FAILED] No result")
-                still_incomplete += 1
-                
-        except Exception as e:
-            print(f"  [ERROR] {e}")
-            still_incomplete += 1
+                self.stats['still_incomplete' if updated else 'failed'] += 1
+                progress.record_failure('failed')
+        progress.print_progress(mode=f"Re-scrape {retailer}")
+    
+    async def rescrape_retailer(self, retailer: str, max_items: int = None, include_attempted: bool = False):
+        items = self.database.get_incomplete_products(retailer=retailer, rescrape_attempted=False)
+        if include_attempted:
+            items += self.database.get_incomplete_products(retailer=retailer, rescrape_attempted=True)
+        if max_items:
+            items = items[:max_items]
+        if not items:
+            print(f"No incomplete products found for {retailer}")
+            return
         
-        await asyncio.sleep(2)  # Rate limit
+        print(f"[{retailer}] Re-scraping {len(items):,} incomplete products "
+              f"(concurrency {self.config['concurrency'].get(retailer, 10)})")
+        retailer_lane = asyncio.Semaphore(self.config['concurrency'].get(retailer, 10))
+        progress = ProgressTracker(len(items), retailer)
+        for start in range(0, len(items), BATCH_SIZE):
+            await asyncio.gather(*(self.rescrape_one(item, retailer_lane, progress)
+                                   for item in items[start:start + BATCH_SIZE]))
+        print(f"\n[{retailer}] ✓ Done")
     
-    await browser_manager.cleanup()
+    async def run(self, retailers: List[str], max_items: int = None, include_attempted: bool = False):
+        print(f"\n{'='*80}")
+        print(f"RE-SCRAPING INCOMPLETE PRODUCTS: {', '.join(retailers).upper()}")
+        print(f"{'='*80}")
+        print(f"Browser lane: {self.config['rescrape']['browser_lane']} pages at a time\n")
+        
+        await self.app.browser_manager.initialize()
+        try:
+            await asyncio.gather(*(self.rescrape_retailer(retailer, max_items, include_attempted)
+                                   for retailer in retailers))
+        finally:
+            await self.app.browser_manager.cleanup()
+            await self.app.close_scrapers()
+            self.app.parse_executor.shutdown()
+        
+        self.print_stats()
     
-    # Summary
-    print(f"\n{'='*80}")
-    print("RE-SCRAPE SUMMARY")
-    print(f"{'='*80}")
-    print(f"Attempted: {len(incomplete):,}")
-    print(f"Now Complete: {success:,}")
-    print(f"Still Incomplete: {still_incomplete:,}")
-    print(f"{'='*80}\n")
+    def print_stats(self):
+        stats = self.stats
+        print(f"\n{'='*80}")
+        print("RE-SCRAPE SUMMARY")
+        print(f"{'='*80}")
+        print(f"Attempted: {stats['attempted']:,}")
+        print(f"Now Complete: {stats['complete']:,}")
+        print(f"Still Incomplete: {stats['still_incomplete']:,}")
+        print(f"Not Found: {stats['not_found']:,}")
+        print(f"Failed: {stats['failed']:,}")
+        print(f"Fetches: {stats['fulfillment']:,} fulfillment API | {stats['api']:,} full API | "
+              f"{stats['page']:,} product page | {stats['browser']:,} browser fallback")
+        print(f"{'='*80}\n")
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Re-scrape incomplete products')
-    parser.add_argument('--retailer', required=True, choices=['target', 'costco', 'homegoods', 'tjmaxx'],
-                        help='Retailer to re-scrape')
+    parser.add_argument('--retailer', '--retailers', dest='retailers', nargs='+',
+                        choices=['target', 'costco', 'homegoods', 'tjmaxx'],
+                        default=['target', 'costco', 'homegoods', 'tjmaxx'],
+                        help='Retailers to re-scrape (default: all)')
     parser.add_argument('--max-items', type=int, default=None,
-                        help='Maximum number of products to re-scrape (for testing)')
+                        help='Maximum number of products to re-scrape per retailer (for testing)')
+    parser.add_argument('--include-attempted', action='store_true',
+                        help='Also retry products a previous run already re-scraped')
     
     args = parser.parse_args()
-    
-    asyncio.run(rescrape_incomplete(args.retailer, args.max_items))
 
+    asyncio.run(IncompleteRescraper(CONFIG).run(args.retailers, args.max_items, args.include_attempted))
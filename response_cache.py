@@ -0,0 +1,217 @@
+"""
+Content-addressed cache of raw product payloads, for re-parsing without re-fetching.
+
+Every product payload a scraper fetches (redsky pdp / fulfillment JSON, product page
+HTML, JSON-LD read in the browser) is stored gzipped under its SHA-256, and indexed
+by URL and fetch time:
+
+  <dir>/index.db                 responses(url, fetched_at, retailer, product_id,
+                                           product_url, kind, sha256, size)
+  <dir>/blobs/<sha[:2]>/<sha>.gz
+
+Identical payloads (unchanged products re-fetched) share one blob. Only the newest
+keep_per_url fetches of a URL stay indexed; blobs nothing refers to are deleted.
+
+`main.py --reparse` rebuilds the products table from the newest payloads of each
+product (see iter_products) with the current parsers - no network calls.
+
+Settings: CONFIG['response_cache'].
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils import ensure_directory
+
+_CACHES: Dict[str, 'ResponseCache'] = {}
+
+
+def open_cache(config: Dict) -> Optional['ResponseCache']:
+    """Shared cache for CONFIG['response_cache']['dir'] (None when caching is off)."""
+    settings = config.get('response_cache') or {}
+    cache_dir = settings.get('dir')
+    if not cache_dir:
+        return None
+    if cache_dir not in _CACHES:
+        _CACHES[cache_dir] = ResponseCache(cache_dir, settings.get('keep_per_url', 2),
+                                           settings.get('flush_every', 200))
+    return _CACHES[cache_dir]
+
+
+class ResponseCache:
+    """Gzipped blobs by content hash plus a SQLite index of fetches."""
+    
+    def __init__(self, cache_dir: str, keep_per_url: int = 2, flush_every: int = 200):
+        self.dir = ensure_directory(cache_dir)
+        self.blob_dir = ensure_directory(str(self.dir / 'blobs'))
+        self.keep_per_url = keep_per_url
+        self.flush_every = flush_every
+        self._pending: List[Tuple] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        self.stats = {
+            'stored': 0,        # Payloads indexed
+            'new_blobs': 0,     # ...of which needed a new blob (others matched an existing one)
+            'raw_bytes': 0,
+            'stored_bytes': 0,  # Compressed bytes written for new blobs
+            'pruned': 0,        # Old fetches dropped from the index
+            'errors': 0,
+        }
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.dir / 'index.db'))
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    retailer TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    product_url TEXT,
+                    kind TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_url ON responses (url, fetched_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_product "
+                               "ON responses (retailer, product_id, kind, fetched_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_sha ON responses (sha256)")
+            self._conn.commit()
+        return self._conn
+    
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256[:2], f'{sha256}.gz')
+    
+    def store(self, retailer: str, product_id: str, product_url: str, kind: str, url: str, body: bytes):
+        """Cache one payload (blob written now, index rows flushed in batches)."""
+        if not body or not product_id:
+            return
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(sha256)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                compressed = gzip.compress(body, compresslevel=6)
+                tmp_path = f'{path}.{uuid.uuid4().hex[:6]}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path)
+                self.stats['new_blobs'] += 1
+                self.stats['stored_bytes'] += len(compressed)
+        except OSError as e:
+            print(f"  ⚠️  Response cache write failed for {url[:80]}: {e}")
+            self.stats['errors'] += 1
+            return
+        
+        self._pending.append((url, time.time(), retailer, str(product_id), product_url, kind, sha256, len(body)))
+        self.stats['stored'] += 1
+        self.stats['raw_bytes'] += len(body)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Write pending index rows and prune fetches beyond keep_per_url."""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            conn = self._connection()
+            conn.executemany("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            
+            dropped = set()
+            for url in {row[0] for row in rows}:
+                old = conn.execute("""
+                    SELECT rowid, sha256 FROM responses WHERE url = ?
+                    ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                """, (url, self.keep_per_url)).fetchall()
+                if old:
+                    conn.executemany("DELETE FROM responses WHERE rowid = ?", [(rowid,) for rowid, _ in old])
+                    dropped.update(sha for _, sha in old)
+                    self.stats['pruned'] += len(old)
+            conn.commit()
+            
+            for sha256 in dropped:
+                if not conn.execute("SELECT 1 FROM responses WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+                    try:
+                        os.remove(self._blob_path(sha256))
+                    except OSError:
+                        pass
+        except sqlite3.Error as e:
+            print(f"  ⚠️  Response cache index write failed ({len(rows)} rows): {e}")
+            self.stats['errors'] += 1
+    
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def read(self, sha256: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(sha256), 'rb') as f:
+                return gzip.decompress(f.read())
+        except OSError:
+            return None
+    
+    def iter_products(self, retailers: List[str] = None) -> Iterator[Tuple[str, str, str, Dict[str, Tuple[str, float]]]]:
+        """
+        Yield (retailer, product_id, product_url, {kind: (sha256, fetched_at)}) with the
+        newest payload of each kind, one product at a time.
+        """
+        self.flush()
+        conn = self._connection()
+        query = """
+            SELECT retailer, product_id, product_url, kind, sha256, MAX(fetched_at)
+            FROM responses {where}
+            GROUP BY retailer, product_id, kind
+            ORDER BY retailer, product_id
+        """
+        params = list(retailers or [])
+        where = f"WHERE retailer IN ({', '.join('?' for _ in params)})" if params else ''
+        
+        current, product_url, payloads = None, None, {}
+        for retailer, product_id, url, kind, sha256, fetched_at in conn.execute(query.format(where=where), params):
+            if (retailer, product_id) != current:
+                if current:
+                    yield current[0], current[1], product_url, payloads
+                current, product_url, payloads = (retailer, product_id), url, {}
+            payloads[kind] = (sha256, fetched_at)
+            product_url = product_url or url
+        if current:
+            yield current[0], current[1], product_url, payloads
+    
+    def count_products(self, retailers: List[str] = None) -> int:
+        self.flush()
+        params = list(retailers or [])
+        where = f"WHERE retailer IN ({', '.join('?' for _ in params)})" if params else ''
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM responses {where} GROUP BY retailer, product_id)", params
+        ).fetchone()[0]
+    
+    def get_stats(self) -> Dict:
+        stats = self.stats
+        return {
+            'stored': stats['stored'],
+            'new_blobs': stats['new_blobs'],
+            'dedup_percent': round((1 - stats['new_blobs'] / stats['stored']) * 100, 1) if stats['stored'] else 0.0,
+            'raw_mb': round(stats['raw_bytes'] / 1024 / 1024, 1),
+            'stored_mb': round(stats['stored_bytes'] / 1024 / 1024, 1),
+            'pruned': stats['pruned'],
+            'errors': stats['errors'],
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['stored']:
+            return
+        print(f"  Response cache: {stats['stored']:,} payloads ({stats['raw_mb']:,} MB) | "
+              f"{stats['new_blobs']:,} new blobs ({stats['stored_mb']:,} MB gzipped, {stats['dedup_percent']}% deduplicated) | "
+              f"{stats['pruned']:,} old fetches pruned")
@@ -0,0 +1,126 @@
+"""
+Delayed retries for products whose scrape failed.
+
+A failed product goes on a time-ordered heap with its attempt count and is retried
+after a jittered exponential backoff (base * 2^(attempt-1), capped, with the upper
+half randomised so failures from one bad minute don't all come back together).
+Retries run alongside fresh products, under a global retry budget: at most
+budget_percent of fresh requests (plus a small floor) may be retries, so a burst of
+failures can't crowd out new work. Products that run out of attempts, or that the
+budget can't cover, go to the dead_letters table.
+
+Settings: CONFIG['retries'] (retries per product) and CONFIG['retry_queue'].
+"""
+
+import heapq
+import itertools
+import random
+import time
+from typing import Dict, List
+
+
+class RetryQueue:
+    """Failed products waiting for a retry, ordered by due time."""
+    
+    def __init__(self, config: Dict, database, retailer: str, run_id: int):
+        settings = config.get('retry_queue') or {}
+        self.max_retries = config.get('retries', 3)
+        self.base_delay = settings.get('base_delay_seconds', 5)
+        self.max_delay = settings.get('max_delay_seconds', 120)
+        self.budget_percent = settings.get('budget_percent', 10)
+        self.budget_floor = settings.get('budget_floor', 20)
+        self.database = database
+        self.retailer = retailer
+        self.run_id = run_id
+        
+        self._heap = []  # (due_at, seq, product_info)
+        self._seq = itertools.count()
+        self.fresh_requests = 0
+        self.retries_scheduled = 0
+        
+        # Per error class: scheduled, recovered (a retry succeeded), dead_lettered
+        self.class_stats: Dict[str, Dict[str, int]] = {}
+        self.budget_denied = 0
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def _class_stats(self, error_class: str) -> Dict[str, int]:
+        if error_class not in self.class_stats:
+            self.class_stats[error_class] = {'scheduled': 0, 'recovered': 0, 'dead_lettered': 0}
+        return self.class_stats[error_class]
+    
+    def record_attempt(self, product_info: Dict):
+        """Count a scrape attempt; only first attempts earn retry budget."""
+        if not product_info.get('attempt'):
+            self.fresh_requests += 1
+    
+    def record_success(self, product_info: Dict):
+        if product_info.get('attempt'):
+            self._class_stats(product_info['error_class'])['recovered'] += 1
+    
+    def backoff_seconds(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def schedule(self, product_info: Dict, error_class: str, message: str) -> bool:
+        """Queue a failed product for retry. False (and dead-lettered) when it can't be retried."""
+        attempt = product_info.get('attempt', 0) + 1
+        stats = self._class_stats(error_class)
+        
+        if attempt > self.max_retries:
+            reason = 'max_attempts'
+        elif self.retries_scheduled >= self.budget_floor + self.fresh_requests * self.budget_percent / 100:
+            reason = 'retry_budget'
+            self.budget_denied += 1
+        else:
+            stats['scheduled'] += 1
+            self.retries_scheduled += 1
+            item = dict(product_info, attempt=attempt, error_class=error_class)
+            heapq.heappush(self._heap, (time.monotonic() + self.backoff_seconds(attempt), next(self._seq), item))
+            return True
+        
+        stats['dead_lettered'] += 1
+        self.database.add_dead_letter(self.retailer, product_info['product_id'], product_info['product_url'],
+                                      error_class, message, attempt, reason, self.run_id)
+        return False
+    
+    def seconds_until_due(self) -> float:
+        """Seconds until the next retry is due (0 if one is due now, inf if the queue is empty)."""
+        if not self._heap:
+            return float('inf')
+        return max(0.0, self._heap[0][0] - time.monotonic())
+    
+    def pop_due(self) -> List[Dict]:
+        """Products whose retry is due now."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+    
+    def get_stats(self) -> Dict:
+        classes = {}
+        for error_class, stats in self.class_stats.items():
+            classes[error_class] = dict(
+                stats,
+                recovery_percent=round(stats['recovered'] / stats['scheduled'] * 100, 1) if stats['scheduled'] else 0.0
+            )
+        return {
+            'fresh_requests': self.fresh_requests,
+            'retries': self.retries_scheduled,
+            'retry_percent': round(self.retries_scheduled / self.fresh_requests * 100, 1) if self.fresh_requests else 0.0,
+            'budget_denied': self.budget_denied,
+            'pending': len(self._heap),
+            'classes': classes,
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['classes']:
+            return
+        print(f"  Retries: {stats['retries']:,} ({stats['retry_percent']}% of {stats['fresh_requests']:,} fresh requests) | "
+              f"{stats['budget_denied']:,} denied by the retry budget")
+        for error_class, class_stats in sorted(stats['classes'].items()):
+            print(f"    {error_class}: {class_stats['scheduled']:,} retried, {class_stats['recovered']:,} recovered "
+                  f"({class_stats['recovery_percent']}%), {class_stats['dead_lettered']:,} dead-lettered")
@@ -3,17 +3,38 @@ Base scraper class with common functionality.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Awaitable, Callable, Tuple, Union
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 import httpx
 from bs4 import BeautifulSoup
 import json
 import re
+import time
+
+from circuit_breaker import CircuitBreakers, is_failure_status
+from clearance_broker import ClearanceBroker
+from hedging import Hedger
+from timeout_policy import TimeoutPolicy, timeout_phase
+from parse_executor import ParseExecutor
+from replay import ResponseRecorder, replay_url
+from response_cache import open_cache
+from . import page_extract, script_extract
+from .page_readiness import PageReadiness
+from .html_backend import HtmlDocument, parse_document, resolve_backend
+
+
+class TransientFetchError(Exception):
+    """A fetch that failed in a way worth retrying later (HTTP 403/407/429/5xx, proxy error, timeout, dropped connection)."""
+    
+    def __init__(self, error_class: str, url: str):
+        super().__init__(f"{error_class} from {url[:80]}")
+        self.error_class = error_class
 
 
 class BaseScraper(ABC):
     """Abstract base class for all retailer scrapers."""
     
-    def __init__(self, config: Dict, database, browser_manager, rate_limiter, proxy_manager):
+    def __init__(self, config: Dict, database, browser_manager, rate_limiter, proxy_manager, parse_executor=None):
         self.config = config
         self.database = database
         self.browser_manager = browser_manager
@@ -21,6 +42,40 @@ class BaseScraper(ABC):
         self.proxy_manager = proxy_manager
         self.retailer_name = None  # Set by subclass
         
+        # Offline benchmarking: record responses to a corpus and/or route fetches to mock_server.py
+        self.recorder = ResponseRecorder(config['record_dir']) if config.get('record_dir') else None
+        self.replay_base_url = config.get('replay_base_url')
+        
+        # Raw product payloads kept for `main.py --reparse` (CONFIG['response_cache'])
+        self.response_cache = open_cache(config)
+        
+        # Product page parser ('lxml' or 'soup'; soup if lxml/cssselect aren't installed)
+        self.html_backend = resolve_backend(config.get('html_backend'))
+        
+        # Browser pages are read once the retailer's readiness condition holds (CONFIG['page_readiness'])
+        self.readiness = PageReadiness(config)
+        
+        # Page parsing runs inline unless the orchestrator shares a process-pool executor
+        self.parse_executor = parse_executor or ParseExecutor(config, mode='inline')
+        
+        # Keep-alive HTTP clients, one per proxy exit (see _http_client)
+        self._http_clients: Dict[Optional[str], httpx.AsyncClient] = {}
+        
+        # Browser-earned bot-protection cookies for HTTP-first product pages (CONFIG['hybrid_fetch'])
+        self.clearance = ClearanceBroker(config, browser_manager, proxy_manager)
+        
+        # Shared pause per host/endpoint when it starts failing (CONFIG['circuit_breaker'])
+        self.breakers = CircuitBreakers(config, proxy_manager)
+        
+        # Duplicate GETs that outlast the endpoint's p95 (CONFIG['hedging'], opt-in)
+        self.hedger = Hedger(config)
+        
+        # Connect/read/pool and navigation timeouts, adapted per endpoint (CONFIG['timeouts'])
+        self.timeouts = TimeoutPolicy(config)
+        
+        # Scrapers that hand browser fallbacks off to their own lane set this (see TargetScraper.scrape_handoff)
+        self.browser_lane = None
+    
     @abstractmethod
     async def enumerate_products(self) -> List[Dict[str, str]]:
         """
@@ -33,7 +88,7 @@ class BaseScraper(ABC):
     async def scrape_product(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Scrape a single product page.
-        Returns product data dict or None if failed.
+        Returns a ProductRecord, {'status': 'not_found'} or None if failed.
         """
         pass
     
@@ -45,44 +100,43 @@ class BaseScraper(ABC):
             if use_browser:
                 context = await self.browser_manager.create_context(self.retailer_name)
                 page = await self.browser_manager.new_page(context)
-                await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                response = await self.goto(page, url)
                 html = await page.content()
                 await self.browser_manager.close_context(context)
+                self.record_page(url, response.status if response else 0, html)
                 return html
             else:
                 # Use httpx for lighter requests (HTTP/1.1 to avoid protocol errors)
-                proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager.is_enabled() else None
-                client_kwargs = {'timeout': 30, 'follow_redirects': True, 'http2': False}
-                if proxy_url:
-                    client_kwargs['proxy'] = proxy_url
+                response = await self._request('GET', url, self._get_headers())
                 
-                async with httpx.AsyncClient(**client_kwargs) as client:
-                    response = await client.get(url, headers=self._get_headers())
-                    
-                    if response.status_code == 200:
-                        return response.text
-                    elif response.status_code in [403, 429]:
-                        print(f"  ⚠️  fetch_html blocked: HTTP {response.status_code}")
-                        # Record as blocked
-                        self.proxy_manager.record_request(success=False, is_block=True)
-                        return None
-                    else:
-                        print(f"  ⚠️  fetch_html HTTP {response.status_code} from {url[:60]}")
-                        return None
+                if response.status_code == 200:
+                    return response.text
+                elif response.status_code in [403, 429]:
+                    print(f"  ⚠️  fetch_html blocked: HTTP {response.status_code}")
+                    # Record as blocked
+                    self.proxy_manager.record_request(success=False, is_block=True)
+                    return None
+                else:
+                    print(f"  ⚠️  fetch_html HTTP {response.status_code} from {url[:60]}")
+                    return None
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
     
-    async def fetch_json(self, url: str, headers: Dict = None) -> Optional[Dict]:
-        """Fetch JSON data via httpx."""
+    async def fetch_json(self, url: str, headers: Dict = None,
+                         decoder: Callable[[bytes], Any] = None,
+                         cache_as: Tuple[str, str, str] = None, transient: bool = False) -> Optional[Dict]:
+        """
+        Fetch JSON data via httpx.
+        decoder: optional bytes -> object function (e.g. a typed projection) used instead of response.json().
+        cache_as: (product_id, product_url, kind) to keep the raw response in the response cache.
+        transient: raise TransientFetchError for retryable failures (blocks, proxy errors, 5xx, timeouts)
+        and return {'status': 'not_found'} for a 404, instead of returning None for both.
+        """
         await self.rate_limiter.wait(self.retailer_name)
         
+        proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager.is_enabled() else None
         try:
-            proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager.is_enabled() else None
-            client_kwargs = {'timeout': 30, 'follow_redirects': True, 'http2': False}
-            if proxy_url:
-                client_kwargs['proxy'] = proxy_url
-            
             request_headers = self._get_headers()
             if headers:
                 # Merge headers, with custom headers taking precedence
@@ -95,38 +149,49 @@ class BaseScraper(ABC):
                     # Add the new header
                     request_headers[key] = value
             
-            async with httpx.AsyncClient(**client_kwargs) as client:
-                response = await client.get(url, headers=request_headers)
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 407:
-                    # Proxy authentication error - log details
-                    proxy_used = client_kwargs.get('proxy', 'None')
-                    if proxy_used and isinstance(proxy_used, str):
-                        # Sanitize password from proxy URL for logging
-                        import re
-                        sanitized = re.sub(r'://([^:]+):([^@]+)@', r'://\1:***@', proxy_used)
-                    else:
-                        sanitized = str(proxy_used)
-                    print(f"\n{'='*80}")
-                    print(f"🚨 PROXY AUTH ERROR (407)")
-                    print(f"{'='*80}")
-                    print(f"Proxy: {sanitized}")
-                    print(f"URL: {url[:100]}")
-                    print(f"Response: {response.text[:200] if response.text else 'No body'}")
-                    print(f"{'='*80}\n")
-                    self.proxy_manager.record_request(success=False, is_block=True)
-                    return None
-                elif response.status_code in [403, 429]:
-                    print(f"  ⚠️  Blocked: HTTP {response.status_code} from {url[:80]}")
-                    self.proxy_manager.record_request(success=False, is_block=True)
-                    return None
+            response = await self._request('GET', url, request_headers, proxy_url=proxy_url)
+            
+            if response.status_code == 200:
+                if cache_as:
+                    self.cache_payload(cache_as[0], cache_as[1], cache_as[2], url, response.content)
+                if decoder:
+                    return decoder(response.content)
+                return response.json()
+            elif response.status_code == 407:
+                # Proxy authentication error - log details
+                proxy_used = proxy_url
+                if proxy_used and isinstance(proxy_used, str):
+                    # Sanitize password from proxy URL for logging
+                    import re
+                    sanitized = re.sub(r'://([^:]+):([^@]+)@', r'://\1:***@', proxy_used)
                 else:
-                    print(f"  ⚠️  HTTP {response.status_code} from {url[:80]}")
-                    return None
+                    sanitized = str(proxy_used)
+                print(f"\n{'='*80}")
+                print(f"🚨 PROXY AUTH ERROR (407)")
+                print(f"{'='*80}")
+                print(f"Proxy: {sanitized}")
+                print(f"URL: {url[:100]}")
+                print(f"Response: {response.text[:200] if response.text else 'No body'}")
+                print(f"{'='*80}\n")
+                self.proxy_manager.record_request(success=False, is_block=True)
+                if transient:
+                    raise TransientFetchError('http_407', url)
+                return None
+            elif response.status_code in [403, 429]:
+                print(f"  ⚠️  Blocked: HTTP {response.status_code} from {url[:80]}")
+                self.proxy_manager.record_request(success=False, is_block=True)
+                if transient:
+                    raise TransientFetchError(f'http_{response.status_code}', url)
+                return None
+            else:
+                print(f"  ⚠️  HTTP {response.status_code} from {url[:80]}")
+                if transient and response.status_code == 404:
+                    return {'status': 'not_found', 'reason': 'http_404'}
+                if transient and response.status_code >= 500:
+                    raise TransientFetchError(f'http_{response.status_code}', url)
+                return None
         except httpx.ProxyError as e:
-            proxy_used = client_kwargs.get('proxy', 'None')
+            proxy_used = proxy_url
             if proxy_used and isinstance(proxy_used, str):
                 import re
                 sanitized = re.sub(r'://([^:]+):([^@]+)@', r'://\1:***@', proxy_used)
@@ -140,6 +205,15 @@ class BaseScraper(ABC):
             print(f"URL: {url[:100]}")
             print(f"{'='*80}\n")
             self.proxy_manager.record_request(success=False, is_block=True)
+            if transient:
+                raise TransientFetchError(type(e).__name__, url)
+            return None
+        except TransientFetchError:
+            raise
+        except httpx.TransportError as e:
+            print(f"  ⚠️  {type(e).__name__} fetching JSON from {url[:80]}: {e}")
+            if transient:
+                raise TransientFetchError(type(e).__name__, url)
             return None
         except Exception as e:
             print(f"  ⚠️  Exception fetching JSON from {url[:80]}: {e}")
@@ -152,30 +226,216 @@ class BaseScraper(ABC):
         await self.rate_limiter.wait(self.retailer_name)
         
         try:
-            proxy_url = self.proxy_manager.get_proxy_url() if self.proxy_manager.is_enabled() else None
-            client_kwargs = {'timeout': 30, 'follow_redirects': True, 'http2': False}
-            if proxy_url:
-                client_kwargs['proxy'] = proxy_url
-            
             request_headers = self._get_headers()
             request_headers['Content-Type'] = 'application/json'
             if headers:
                 request_headers.update(headers)
             
-            async with httpx.AsyncClient(**client_kwargs) as client:
-                response = await client.post(url, json=data, headers=request_headers)
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code in [403, 429]:
-                    self.proxy_manager.record_request(success=False, is_block=True)
-                    return None
-                else:
-                    return None
+            response = await self._request('POST', url, request_headers, json_body=data)
+            
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code in [403, 429]:
+                self.proxy_manager.record_request(success=False, is_block=True)
+                return None
+            else:
+                return None
         except Exception as e:
             print(f"Error posting to {url}: {e}")
             return None
     
+    async def _request(self, method: str, url: str, headers: Dict[str, str], json_body: Any = None,
+                       proxy_url: Optional[str] = None, use_proxy: bool = True) -> httpx.Response:
+        """
+        Shared HTTP path for all scraper fetches.
+        Routes to the replay server when configured and records responses when recording.
+        """
+        if use_proxy and proxy_url is None and self.proxy_manager.is_enabled():
+            proxy_url = self.proxy_manager.get_proxy_url()
+        
+        client = self._http_client(None if self.replay_base_url else proxy_url)
+        timeout = self.timeouts.for_request(url)
+        breaker, generation = await self.breakers.acquire(url)
+        start = time.perf_counter()
+        try:
+            if method == 'GET' and self.hedger.applies_to(url):
+                routed_url = self.route_url(url)
+                response = await self.hedger.request(
+                    url,
+                    lambda: client.request(method, routed_url, headers=headers, timeout=timeout),
+                    lambda: self._send_hedge(proxy_url, method, routed_url, headers, timeout),
+                )
+            else:
+                response = await client.request(method, self.route_url(url), headers=headers, json=json_body,
+                                                timeout=timeout)
+        except Exception as e:
+            phase = timeout_phase(e)
+            if phase:
+                self.timeouts.record_timeout(url, phase, timeout.read)
+            if breaker:
+                breaker.record(generation, False)
+            raise
+        except BaseException:
+            if breaker:
+                breaker.release(generation)
+            raise
+        self.timeouts.observe(url, 'read', time.perf_counter() - start)
+        if breaker:
+            breaker.record(generation, not is_failure_status(response.status_code))
+        
+        if self.recorder:
+            self.recorder.record(method, url, response.status_code, response.headers.get('content-type'),
+                                 response.content, time.perf_counter() - start)
+        return response
+    
+    async def goto(self, page, url: str, timeout: int = None):
+        """
+        page.goto (until domcontentloaded), through the same circuit breaker as HTTP fetches.
+        timeout (ms) applies until the endpoint's navigation timeout has adapted.
+        """
+        timeout = self.timeouts.navigation_ms(url, timeout)
+        breaker, generation = await self.breakers.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = await page.goto(self.route_url(url), wait_until='domcontentloaded', timeout=timeout)
+        except Exception as e:
+            if timeout_phase(e):
+                self.timeouts.record_timeout(url, 'navigation', timeout / 1000)
+            if breaker:
+                breaker.record(generation, False)
+            raise
+        except BaseException:
+            if breaker:
+                breaker.release(generation)
+            raise
+        self.timeouts.observe(url, 'navigation', time.perf_counter() - start)
+        if breaker:
+            # No response (e.g. a same-document navigation) isn't a failure of the host
+            breaker.record(generation, response is None or not is_failure_status(response.status))
+        return response
+    
+    async def _send_hedge(self, proxy_url: Optional[str], method: str, routed_url: str, headers: Dict[str, str],
+                          timeout) -> httpx.Response:
+        """A hedged duplicate is one more request to the host, so it waits its turn at the rate limiter too."""
+        await self.rate_limiter.wait(self.retailer_name)
+        return await self._hedge_client(proxy_url).request(method, routed_url, headers=headers, timeout=timeout)
+    
+    def _hedge_client(self, proxy_url: Optional[str]) -> httpx.AsyncClient:
+        """Client for a hedged duplicate: the next proxy exit when proxying and other_exit is set."""
+        if not self.replay_base_url and self.hedger.other_exit and self.proxy_manager.is_enabled():
+            proxy_url = self.proxy_manager.get_proxy_url()
+        return self._http_client(None if self.replay_base_url else proxy_url)
+    
+    def _http_client(self, proxy_url: Optional[str]) -> httpx.AsyncClient:
+        """
+        Pooled client for this proxy exit, so connections (and TLS sessions) are reused
+        across requests. Cookies are never stored: each request sends only the headers
+        it was given, as with a fresh client.
+        """
+        client = self._http_clients.get(proxy_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeouts.client_default(), follow_redirects=True,
+                http2=False,  # HTTP/1.1 to avoid protocol errors
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+                proxy=proxy_url,
+            )
+            self._http_clients[proxy_url] = client
+        return client
+    
+    async def close(self):
+        """Close the pooled HTTP clients."""
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        for client in clients:
+            await client.aclose()
+    
+    async def scrape_hybrid(self, product_url: str, product_id: Optional[str],
+                            scrape_in_browser: Callable[[str, Optional[str]], Awaitable[Any]]) -> Optional[Any]:
+        """
+        Product page over plain HTTP with the clearance broker's cookies, falling back to
+        scrape_in_browser(url, id) when the answer is a challenge or doesn't parse. Retailers
+        not in CONFIG['hybrid_fetch']['retailers'] go straight to the browser.
+        """
+        hybrid = self.clearance.enabled_for(self.retailer_name)
+        if hybrid:
+            product = await self._scrape_over_http(product_url, product_id)
+            if product:
+                return product
+        
+        start = time.perf_counter()
+        product = await scrape_in_browser(product_url, product_id)
+        if hybrid:
+            self.clearance.record_page('browser', time.perf_counter() - start)
+        return product
+    
+    async def _scrape_over_http(self, product_url: str, product_id: Optional[str]) -> Optional[Any]:
+        """HTTP attempt for scrape_hybrid; None means "use the browser"."""
+        await self.rate_limiter.wait(self.retailer_name)
+        
+        clearance = await self.clearance.get(self.retailer_name, product_url, refresh_url=self.route_url(product_url))
+        start = time.perf_counter()
+        try:
+            response = await self._request('GET', product_url, self.clearance.headers_for(clearance, self._get_headers()))
+        except Exception as e:
+            print(f"  ⚠️  HTTP fetch failed, using browser: {e}")
+            return None
+        
+        if response.status_code == 404:
+            self.clearance.record_page('http', time.perf_counter() - start)
+            return {'status': 'not_found'}
+        
+        html = response.text
+        if self.clearance.is_challenge(self.retailer_name, response.status_code, response.headers, html):
+            self.clearance.invalidate(self.retailer_name)
+            self.clearance.stats['challenges'] += 1
+            return None
+        if response.status_code != 200:
+            return None
+        
+        self.cache_payload(product_id, product_url, 'page', product_url, html)
+        product = await self.parse_page(html, product_url, product_id)
+        if not product or getattr(product, 'status', None) != 'success':
+            self.clearance.stats['unusable'] += 1
+            return None
+        
+        self.clearance.record_page('http', time.perf_counter() - start)
+        self.proxy_manager.record_request(success=True, is_block=False)
+        return product
+    
+    async def keep_session(self, context, page):
+        """
+        Keep what a browser context earned on a good product page: its stored session
+        (CONFIG['session_store']) and, for hybrid retailers without one, the HTTP clearance.
+        """
+        await self.browser_manager.save_session(context, page)
+        if self.clearance.enabled_for(self.retailer_name) and not self.clearance.has(self.retailer_name):
+            await self.clearance.harvest(self.retailer_name, context, page)
+    
+    def route_url(self, url: str) -> str:
+        """Rewrite a live URL to the replay server (http://replay/<host>/<path>) when replaying."""
+        if not self.replay_base_url:
+            return url
+        return replay_url(self.replay_base_url, url)
+    
+    def record_page(self, url: str, status: int, html: str):
+        """Record a browser-rendered page to the corpus (no-op unless recording)."""
+        if self.recorder and html:
+            self.recorder.record('GET', url, status, 'text/html; charset=utf-8', html.encode('utf-8'))
+    
+    def cache_payload(self, product_id: str, product_url: str, kind: str, url: str, body: Union[str, bytes]):
+        """Keep a raw product payload for re-parsing (kinds: 'pdp', 'fulfillment', 'page', 'json_ld')."""
+        if self.response_cache:
+            self.response_cache.store(self.retailer_name, product_id, product_url, kind, url,
+                                      body.encode('utf-8') if isinstance(body, str) else body)
+    
+    def _parse_cached_json_ld(self, text: str, product_url: str, product_id: str) -> Optional[Any]:
+        """Re-parse a cached in-page JSON-LD payload (retailers with _product_from_json_ld)."""
+        try:
+            return self._product_from_json_ld(json.loads(text), product_url, product_id)
+        except ValueError:
+            return None
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get common HTTP headers with full browser fingerprint."""
         import random
@@ -193,18 +453,41 @@ class BaseScraper(ABC):
             'Cache-Control': 'max-age=0',
         }
     
-    def extract_images(self, soup: BeautifulSoup, selectors: List[str]) -> List[str]:
+    async def parse_page(self, html: str, product_url: str, product_id: str, method: str = '_parse_html', **kwargs):
+        """Run a page parser (self.<method>(html, url, id, **kwargs)) through the parse executor."""
+        return await self.parse_executor.parse(self.retailer_name, method, html, product_url, product_id, **kwargs)
+    
+    async def extract_in_page(self, page) -> Optional[Dict[str, Any]]:
+        """
+        Structured data from the live page in one evaluate() (see page_extract.py);
+        None when it fails, is disabled, or when recording (the corpus needs the full page).
+        """
+        if self.recorder or not self.config.get('in_page_extract', True):
+            return None
+        return await page_extract.extract_page(page, self.retailer_name)
+    
+    async def page_content(self, page, fallback: bool = False) -> str:
+        """Full page HTML (page.content()), counted in the page read stats."""
+        return await page_extract.page_content(page, fallback)
+    
+    def parse_document(self, html: str) -> HtmlDocument:
+        """Parse a product page with the configured HTML backend."""
+        start = time.perf_counter()
+        doc = parse_document(html, self.html_backend)
+        script_extract.record_dom_parse(html, time.perf_counter() - start)
+        return doc
+    
+    def extract_images(self, doc: Union[HtmlDocument, BeautifulSoup], selectors: List[str]) -> List[str]:
         """Extract image URLs from page using multiple selectors."""
+        doc = parse_document(doc, self.html_backend) if isinstance(doc, BeautifulSoup) else doc
         image_urls = []
         
         for selector in selectors:
-            images = soup.select(selector)
-            for img in images:
-                url = img.get('src') or img.get('data-src') or img.get('data-original')
-                if url and url.startswith('http'):
+            for url in doc.select_attr(selector, ['src', 'data-src', 'data-original']):
+                if url.startswith('http'):
                     image_urls.append(url)
         
-        return list(set(image_urls))  # Remove duplicates
+        return list(dict.fromkeys(image_urls))  # Remove duplicates, keep page order
     
     def clean_price(self, price_str: str) -> Optional[float]:
         """Extract numeric price from string."""
@@ -220,14 +503,31 @@ class BaseScraper(ABC):
                 return None
         return None
     
-    def parse_json_ld(self, soup: BeautifulSoup) -> Optional[Dict]:
-        """Extract JSON-LD structured data."""
-        scripts = soup.find_all('script', type='application/ld+json')
-        for script in scripts:
+    def parse_json_ld(self, doc: Union[str, HtmlDocument, BeautifulSoup]) -> Optional[Dict]:
+        """
+        Extract JSON-LD structured data (first block that parses).
+        Raw page HTML is scanned for the script block directly; the page is only
+        parsed into a DOM when the scan misses.
+        """
+        if isinstance(doc, str):
+            html = doc
+            blocks = script_extract.scan(html, 'type', 'application/ld+json', 'application/ld+json')
+            for block in blocks or []:
+                try:
+                    data = json.loads(block)
+                    script_extract.record_hit(html)
+                    return data
+                except ValueError:
+                    continue
+            if blocks == []:
+                return None
+            script_extract.record_dom_fallback()
+            doc = self.parse_document(html)
+        
+        doc = parse_document(doc, self.html_backend) if isinstance(doc, BeautifulSoup) else doc
+        for block in doc.json_ld_blocks():
             try:
-                data = json.loads(script.string)
-                return data
-            except:
+                return json.loads(block)
+            except ValueError:
                 continue
         return None
-
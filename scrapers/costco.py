@@ -6,14 +6,15 @@ from typing import List, Dict, Optional, Any, AsyncGenerator
 from bs4 import BeautifulSoup
 import json
 import re
+from models import ProductRecord
 from .base import BaseScraper
 
 
 class CostcoScraper(BaseScraper):
     """Costco.com scraper - public data only, no membership."""
     
-    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager):
-        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager)
+    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager, parse_executor=None):
+        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager, parse_executor)
         self.retailer_name = 'costco'
         from config import RETAILERS
         self.base_url = RETAILERS['costco']['base_url']
@@ -114,15 +115,21 @@ class CostcoScraper(BaseScraper):
     async def scrape_product(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Scrape Costco product page (public data only).
-        Note: Uses browser to handle Cloudflare protection.
+        Plain HTTP with browser-earned Cloudflare cookies when hybrid fetch is on;
+        the browser handles the page (and earns the cookies) otherwise.
         """
+        return await self.scrape_hybrid(product_url, product_id, self._scrape_in_browser)
+    
+    async def _scrape_in_browser(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
+        """Scrape the product page in the browser (handles the Cloudflare challenge)."""
         try:
             context = await self.browser_manager.create_context(self.retailer_name)
             page = await self.browser_manager.new_page(context)
             
             await self.rate_limiter.wait(self.retailer_name)
             
-            response = await page.goto(product_url, wait_until='networkidle', timeout=45000)
+            waiter = self.readiness.watch(page, self.retailer_name)
+            response = await self.goto(page, product_url, timeout=45000)
             
             if not response or response.status in [403, 429]:
                 self.proxy_manager.record_request(success=False, is_block=True)
@@ -133,24 +140,43 @@ class CostcoScraper(BaseScraper):
                 await self.browser_manager.close_context(context)
                 return {'status': 'not_found'}
             
-            # Wait for content to load (Cloudflare check)
-            await page.wait_for_timeout(2000)
+            # Wait for the product data (or the Cloudflare check to clear)
+            await waiter.wait()
+            
+            # JSON-LD and the challenge check straight from the live DOM (one round trip)
+            extracted = await self.extract_in_page(page)
+            if extracted and extracted['challenge']:
+                print("  ⚠️  Cloudflare challenge detected")
+                self.proxy_manager.record_request(success=False, is_block=True)
+                self.browser_manager.discard_session(context)
+                await self.browser_manager.close_context(context)
+                return None
+            
+            product = self._product_from_json_ld(extracted['json_ld'], product_url, product_id) if extracted else None
+            if product:
+                self.cache_payload(product_id, product_url, 'json_ld', product_url, json.dumps(extracted['json_ld']))
+                await self.keep_session(context, page)
+                await self.browser_manager.close_context(context)
+                self.proxy_manager.record_request(success=True, is_block=False)
+                return product
             
-            # Check for Cloudflare challenge
-            page_content = await page.content()
-            if 'cf-browser-verification' in page_content or 'Checking your browser' in page_content:
-                print(f"  ⚠️  Cloudflare challenge detected")
+            # No JSON-LD product - fall back to the full page
+            page_content = await self.page_content(page, fallback=extracted is not None)
+            if extracted is None and ('cf-browser-verification' in page_content or 'Checking your browser' in page_content):
+                print("  ⚠️  Cloudflare challenge detected")
                 self.proxy_manager.record_request(success=False, is_block=True)
+                self.browser_manager.discard_session(context)
                 await self.browser_manager.close_context(context)
                 return None
             
             html = page_content
+            await self.keep_session(context, page)
             await self.browser_manager.close_context(context)
-            
-            soup = BeautifulSoup(html, 'html.parser')
+            self.record_page(product_url, response.status, html)
+            self.cache_payload(product_id, product_url, 'page', product_url, html)
             
             # Parse product data
-            product = self._parse_html(soup, product_url, product_id)
+            product = await self.parse_page(html, product_url, product_id)
             if product:
                 self.proxy_manager.record_request(success=True, is_block=False)
             
@@ -160,67 +186,74 @@ class CostcoScraper(BaseScraper):
             print(f"  Error scraping {product_url}: {e}")
             return None
     
-    def _parse_html(self, soup: BeautifulSoup, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
+    def _product_from_json_ld(self, json_ld: Optional[Dict], product_url: str, product_id: str) -> Optional[ProductRecord]:
+        """ProductRecord from a JSON-LD Product block (parsed from the page HTML or read from the live DOM)."""
+        if not json_ld or json_ld.get('@type') != 'Product':
+            return None
+        
+        offers = json_ld.get('offers', {})
+        price = offers.get('price')
+        availability = offers.get('availability', '')
+        
+        return ProductRecord(
+            product_id=product_id or json_ld.get('sku'),
+            retailer=self.retailer_name,
+            product_url=product_url,
+            title=json_ld.get('name'),
+            brand=json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
+            price_current=self.clean_price(str(price)) if price else None,
+            currency='USD',
+            availability='in_stock' if 'InStock' in availability else 'out_of_stock',
+            description=json_ld.get('description'),
+            image_urls=[json_ld.get('image')] if json_ld.get('image') else [],
+            ratings_average=json_ld.get('aggregateRating', {}).get('ratingValue'),
+            ratings_count=json_ld.get('aggregateRating', {}).get('reviewCount'),
+            status='success'
+        )
+    
+    def _parse_html(self, html: str, product_url: str, product_id: str) -> Optional[ProductRecord]:
         """Parse Costco product page HTML."""
         try:
-            # Try JSON-LD first
-            json_ld = self.parse_json_ld(soup)
-            if json_ld and json_ld.get('@type') == 'Product':
-                offers = json_ld.get('offers', {})
-                price = offers.get('price')
-                availability = offers.get('availability', '')
-                
-                return {
-                    'product_id': product_id or json_ld.get('sku'),
-                    'retailer': self.retailer_name,
-                    'product_url': product_url,
-                    'title': json_ld.get('name'),
-                    'brand': json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
-                    'price_current': self.clean_price(str(price)) if price else None,
-                    'currency': 'USD',
-                    'availability': 'in_stock' if 'InStock' in availability else 'out_of_stock',
-                    'description': json_ld.get('description'),
-                    'image_urls': [json_ld.get('image')] if json_ld.get('image') else [],
-                    'ratings_average': json_ld.get('aggregateRating', {}).get('ratingValue'),
-                    'ratings_count': json_ld.get('aggregateRating', {}).get('reviewCount'),
-                    'status': 'success'
-                }
+            # Try JSON-LD first (scanned from the raw page - no DOM needed)
+            json_ld = self.parse_json_ld(html)
+            product = self._product_from_json_ld(json_ld, product_url, product_id)
+            if product:
+                return product
             
             # Fallback: Manual HTML parsing
-            title_tag = soup.find('h1', {'itemprop': 'name'}) or soup.find('h1')
-            title = title_tag.get_text(strip=True) if title_tag else None
+            doc = self.parse_document(html)
+            
+            title = doc.find_text('h1', {'itemprop': 'name'}) or doc.find_text('h1')
             
             # Price (may be hidden for members)
-            price_tag = soup.find('span', {'class': re.compile('value|price', re.I)})
-            price_text = price_tag.get_text(strip=True) if price_tag else None
+            price_text = doc.find_text('span', {'class': re.compile('value|price', re.I)})
             
             # Check if price is member-only
-            member_only = soup.find(text=re.compile('sign in|member price', re.I))
+            member_only = doc.has_text(re.compile('sign in|member price', re.I))
             availability = 'member_only' if member_only else 'in_stock'
             
             # Images
-            image_urls = self.extract_images(soup, [
+            image_urls = self.extract_images(doc, [
                 'img[itemprop="image"]',
                 'img.product-image',
                 'div.product-image-container img'
             ])
             
             # Description
-            desc_tag = soup.find('div', {'itemprop': 'description'}) or soup.find('div', {'class': re.compile('description', re.I)})
-            description = desc_tag.get_text(strip=True) if desc_tag else None
-            
-            return {
-                'product_id': product_id,
-                'retailer': self.retailer_name,
-                'product_url': product_url,
-                'title': title,
-                'price_current': self.clean_price(price_text) if price_text else None,
-                'currency': 'USD',
-                'availability': availability,
-                'description': description,
-                'image_urls': image_urls,
-                'status': 'success' if title else 'partial_data'
-            }
+            description = doc.find_text('div', {'itemprop': 'description'}) or doc.find_text('div', {'class': re.compile('description', re.I)})
+            
+            return ProductRecord(
+                product_id=product_id,
+                retailer=self.retailer_name,
+                product_url=product_url,
+                title=title,
+                price_current=self.clean_price(price_text) if price_text else None,
+                currency='USD',
+                availability=availability,
+                description=description,
+                image_urls=image_urls,
+                status='success' if title else 'partial_data'
+            )
             
         except Exception as e:
             print(f"  Error parsing HTML: {e}")
@@ -0,0 +1,179 @@
+"""
+Pluggable HTML parsing backends for the product page parsers.
+
+The parsers only need a handful of lookups (JSON-LD blocks, first element by tag
+and attributes, CSS selections, a text search), so each backend implements those
+on its own tree:
+  - 'lxml': libxml2 tree, XPath with EXSLT regex for attribute patterns and
+            cssselect-compiled XPath for CSS selectors. Much faster on 1-2 MB pages.
+  - 'soup': BeautifulSoup with html.parser (fallback when lxml/cssselect are missing).
+
+Select with CONFIG['html_backend'] / HTML_BACKEND.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+AttrValue = Union[str, Pattern]
+
+
+class HtmlDocument(ABC):
+    """A parsed page with the lookups the retailer parsers use."""
+
+    @abstractmethod
+    def json_ld_blocks(self) -> List[str]:
+        """Raw contents of every <script type="application/ld+json">, in page order."""
+
+    @abstractmethod
+    def find_text(self, tag: str, attrs: Dict[str, AttrValue] = None) -> Optional[str]:
+        """
+        Stripped text of the first <tag> whose attributes match (exact string, or
+        regex searched in the attribute value); None if there is no match.
+        """
+
+    @abstractmethod
+    def select_texts(self, css: str) -> List[str]:
+        """Stripped text of every element matching a CSS selector."""
+
+    @abstractmethod
+    def select_attr(self, css: str, attr_names: List[str]) -> List[str]:
+        """Per matching element, the first non-empty attribute out of attr_names."""
+
+    @abstractmethod
+    def has_text(self, pattern: Pattern) -> bool:
+        """True if any text node matches the regex."""
+
+
+class SoupDocument(HtmlDocument):
+    def __init__(self, html_or_soup):
+        if isinstance(html_or_soup, BeautifulSoup):
+            self.soup = html_or_soup
+        else:
+            self.soup = BeautifulSoup(html_or_soup, 'html.parser')
+
+    def json_ld_blocks(self) -> List[str]:
+        return [script.string for script in self.soup.find_all('script', type='application/ld+json') if script.string]
+
+    def find_text(self, tag: str, attrs: Dict[str, AttrValue] = None) -> Optional[str]:
+        element = self.soup.find(tag, attrs or {})
+        return element.get_text(strip=True) if element else None
+
+    def select_texts(self, css: str) -> List[str]:
+        return [element.get_text(strip=True) for element in self.soup.select(css)]
+
+    def select_attr(self, css: str, attr_names: List[str]) -> List[str]:
+        values = []
+        for element in self.soup.select(css):
+            value = next((element.get(name) for name in attr_names if element.get(name)), None)
+            if value:
+                values.append(value)
+        return values
+
+    def has_text(self, pattern: Pattern) -> bool:
+        return self.soup.find(string=pattern) is not None
+
+
+_REGEX_NS = {'re': 'http://exslt.org/regular-expressions'}
+
+
+@lru_cache(maxsize=256)
+def _css(css: str):
+    return CSSSelector(css)
+
+
+@lru_cache(maxsize=256)
+def _find_xpath(tag: str, attr_spec: tuple):
+    """
+    Compiled XPath for find_text: attr_spec is ((name, kind, flags), ...) with
+    kind 'eq' or 're'; values are passed as XPath variables.
+    """
+    predicates = []
+    for i, (name, kind, flags) in enumerate(attr_spec):
+        if kind == 'eq':
+            predicates.append(f'@{name}=$v{i}')
+        else:
+            predicates.append(f"re:test(@{name}, $v{i}, '{flags}')")
+    predicate = ''.join(f'[{p}]' for p in predicates)
+    return etree.XPath(f'(//{tag}{predicate})[1]', namespaces=_REGEX_NS)
+
+
+if LXML_AVAILABLE:
+    _TEXT_NODES = etree.XPath('.//text()')
+    _ALL_TEXT_NODES = etree.XPath('//text()')
+
+
+def _text(element) -> str:
+    """Same as BeautifulSoup get_text(strip=True): stripped text nodes joined with ''."""
+    return ''.join(text.strip() for text in _TEXT_NODES(element))
+
+
+class LxmlDocument(HtmlDocument):
+    def __init__(self, html: str):
+        self.root = lxml.html.document_fromstring(html)
+
+    def json_ld_blocks(self) -> List[str]:
+        return [script.text for script in self.root.iter('script')
+                if script.get('type') == 'application/ld+json' and script.text]
+
+    def find_text(self, tag: str, attrs: Dict[str, AttrValue] = None) -> Optional[str]:
+        spec = []
+        variables = {}
+        for i, (name, value) in enumerate((attrs or {}).items()):
+            if isinstance(value, str):
+                spec.append((name, 'eq', ''))
+                variables[f'v{i}'] = value
+            else:
+                spec.append((name, 're', 'i' if value.flags & re.IGNORECASE else ''))
+                variables[f'v{i}'] = value.pattern
+        found = _find_xpath(tag, tuple(spec))(self.root, **variables)
+        return _text(found[0]) if found else None
+
+    def select_texts(self, css: str) -> List[str]:
+        return [_text(element) for element in _css(css)(self.root)]
+
+    def select_attr(self, css: str, attr_names: List[str]) -> List[str]:
+        values = []
+        for element in _css(css)(self.root):
+            value = next((element.get(name) for name in attr_names if element.get(name)), None)
+            if value:
+                values.append(value)
+        return values
+
+    def has_text(self, pattern: Pattern) -> bool:
+        return any(pattern.search(text) for text in _ALL_TEXT_NODES(self.root))
+
+
+def resolve_backend(name: Optional[str]) -> str:
+    """Configured backend name, falling back to 'soup' when lxml/cssselect aren't installed."""
+    name = (name or 'lxml').lower()
+    if name not in ('lxml', 'soup'):
+        print(f"  ⚠️  Unknown html_backend '{name}', using soup")
+        return 'soup'
+    if name == 'lxml' and not LXML_AVAILABLE:
+        return 'soup'
+    return name
+
+
+def parse_document(html_or_soup, backend: str) -> HtmlDocument:
+    """Parse a page with the given backend (a BeautifulSoup tree is always wrapped as-is)."""
+    if isinstance(html_or_soup, BeautifulSoup):
+        return SoupDocument(html_or_soup)
+    if backend == 'lxml':
+        try:
+            return LxmlDocument(html_or_soup)
+        except (etree.ParserError, ValueError):
+            # Empty documents and strings with an XML encoding declaration
+            pass
+    return SoupDocument(html_or_soup)
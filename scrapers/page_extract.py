@@ -0,0 +1,175 @@
+"""
+In-browser structured data extraction.
+
+page.content() serialises the whole DOM (1-2 MB on product pages), ships it over
+CDP and has it re-parsed in Python, when the parsers only need the JSON-LD block,
+a few __NEXT_DATA__ product fields and a couple of text nodes. EXTRACT_JS collects
+those in the page and returns one compact object from a single evaluate() call:
+
+  {
+    'json_ld':      first JSON-LD block that parses (object) or None,
+    'next_product': projection of __NEXT_DATA__ props.pageProps.initialData.data.product
+                    (only the fields the marketplace parser reads) or None,
+    'price_text':   text of the price selector, 'shipping_text': first "Arrives by" text,
+    'h1':           first <h1> text (joined like get_text(strip=True)),
+    'challenge':    True if a bot-challenge marker is on the page,
+    'page_bytes':   length of the serialised page (what page.content() would have shipped)
+  }
+
+Scrapers fall back to page.content() when the evaluate fails or the page has no
+structured data to use. Stats: round trips and bytes over CDP per page, for both paths.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+EXTRACT_JS = r"""
+(opts) => {
+    const text = (el) => {
+        if (!el) return null;
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) parts.push(walker.currentNode.nodeValue.trim());
+        return parts.join('');
+    };
+    const has = (obj, key) => obj && typeof obj === 'object' && Object.prototype.hasOwnProperty.call(obj, key);
+    // Copy only the listed paths that exist, keeping the original nesting
+    const project = (obj, spec) => {
+        const out = {};
+        for (const [key, sub] of Object.entries(spec)) {
+            if (!has(obj, key)) continue;
+            out[key] = (sub && obj[key] && typeof obj[key] === 'object' && !Array.isArray(obj[key]))
+                ? project(obj[key], sub) : obj[key];
+        }
+        return out;
+    };
+    const html = document.documentElement ? document.documentElement.outerHTML : '';
+    const result = {json_ld: null, next_product: null, price_text: null, shipping_text: null, h1: null,
+                    challenge: (opts.challengeMarkers || []).some((m) => html.includes(m)), page_bytes: html.length};
+    
+    if (opts.jsonLd) {
+        for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+            if (!script.textContent) continue;
+            try { result.json_ld = JSON.parse(script.textContent); break; } catch (e) {}
+        }
+    }
+    if (opts.nextProduct) {
+        const script = document.getElementById('__NEXT_DATA__');
+        try {
+            let node = JSON.parse(script.textContent);
+            for (const key of ['props', 'pageProps', 'initialData', 'data', 'product']) node = has(node, key) ? node[key] : null;
+            if (node && typeof node === 'object' && Object.keys(node).length) result.next_product = project(node, opts.nextProduct);
+        } catch (e) {}
+    }
+    if (opts.priceSelector) {
+        const el = document.querySelector(opts.priceSelector);
+        result.price_text = el ? el.innerText : null;
+    }
+    if (opts.shippingPattern) {
+        const pattern = new RegExp(opts.shippingPattern);
+        const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            if (pattern.test(walker.currentNode.nodeValue) && walker.currentNode.parentElement) {
+                result.shipping_text = walker.currentNode.parentElement.innerText;
+                break;
+            }
+        }
+    }
+    result.h1 = text(document.querySelector('h1'));
+    return result;
+}
+"""
+
+# Fields TargetScraper._marketplace_record reads from the __NEXT_DATA__ product
+_TARGET_NEXT_PRODUCT = {
+    'item': {
+        'product_description': {'title': None, 'downstream_description': None},
+        'primary_brand': {'name': None},
+        'enrichment': {'images': {'primary_image': None, 'alternate_images': None}},
+    },
+    'category': {'name': None},
+    'ratings_and_reviews': {'statistics': {'rating': {'average': None, 'count': None}}},
+}
+
+RETAILER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    'target': {
+        'nextProduct': _TARGET_NEXT_PRODUCT,
+        'priceSelector': 'span[data-test="product-price"]',
+        'shippingPattern': 'Arrives by',
+    },
+    'costco': {
+        'jsonLd': True,
+        'challengeMarkers': ['cf-browser-verification', 'Checking your browser'],
+    },
+    'homegoods': {'jsonLd': True},
+    'tjmaxx': {'jsonLd': True},
+}
+
+PAGE_STATS: Dict[str, int] = {
+    'evaluate_pages': 0,   # Pages read with one evaluate()
+    'content_pages': 0,    # Pages read with page.content()
+    'evaluate_failed': 0,
+    'content_fallbacks': 0,  # page.content() after an evaluate() on the same page
+    'round_trips': 0,      # CDP calls made to read pages
+    'evaluate_bytes': 0,   # Bytes the evaluate() calls returned
+    'content_bytes': 0,    # Bytes the page.content() calls returned
+    'page_bytes': 0,       # Size of the evaluate pages as page.content() would have returned them
+}
+
+
+async def extract_page(page, retailer: str) -> Optional[Dict[str, Any]]:
+    """Run the retailer's extraction in the page (one round trip); None if it fails."""
+    PAGE_STATS['round_trips'] += 1
+    try:
+        result = await page.evaluate(EXTRACT_JS, RETAILER_OPTIONS[retailer])
+    except Exception as e:
+        PAGE_STATS['evaluate_failed'] += 1
+        print(f"  ⚠️  In-page extraction failed, falling back to page content: {e}")
+        return None
+    PAGE_STATS['evaluate_pages'] += 1
+    PAGE_STATS['evaluate_bytes'] += len(json.dumps(result, separators=(',', ':')))
+    PAGE_STATS['page_bytes'] += result.get('page_bytes') or 0
+    return result
+
+
+async def page_content(page, fallback: bool = False) -> str:
+    """
+    page.content() with stats (the full serialised DOM crosses CDP). fallback=True
+    when the page was already evaluated, so it isn't counted as a second page.
+    """
+    html = await page.content()
+    PAGE_STATS['content_fallbacks' if fallback else 'content_pages'] += 1
+    PAGE_STATS['round_trips'] += 1
+    PAGE_STATS['content_bytes'] += len(html)
+    return html
+
+
+def record_round_trips(count: int):
+    """Extra CDP calls made while reading a page (selector lookups, inner_text)."""
+    PAGE_STATS['round_trips'] += count
+
+
+def get_stats() -> Dict:
+    stats = PAGE_STATS
+    pages = stats['evaluate_pages'] + stats['content_pages']
+    per_page_kb = lambda total, count: round(total / count / 1024, 1) if count else 0.0
+    return {
+        'pages': pages,
+        'evaluate_pages': stats['evaluate_pages'],
+        'content_pages': stats['content_pages'],
+        'evaluate_failed': stats['evaluate_failed'],
+        'content_fallbacks': stats['content_fallbacks'],
+        'round_trips_per_page': round(stats['round_trips'] / pages, 2) if pages else 0.0,
+        'evaluate_kb_per_page': per_page_kb(stats['evaluate_bytes'], stats['evaluate_pages']),
+        'content_kb_per_page': per_page_kb(stats['content_bytes'], stats['content_pages'] + stats['content_fallbacks']),
+        'cdp_kb_saved': round((stats['page_bytes'] - stats['evaluate_bytes']) / 1024, 1),
+    }
+
+
+def print_stats():
+    stats = get_stats()
+    if not stats['pages']:
+        return
+    print(f"  Page reads: {stats['evaluate_pages']:,} in-page extractions ({stats['evaluate_kb_per_page']} KB each), "
+          f"{stats['content_pages'] + stats['content_fallbacks']:,} page.content() ({stats['content_kb_per_page']} KB each) | "
+          f"{stats['round_trips_per_page']} CDP round trips/page | {stats['cdp_kb_saved']:,} KB kept off CDP")
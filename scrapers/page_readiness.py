@@ -0,0 +1,135 @@
+"""
+Event-driven page readiness for browser scrapes.
+
+Instead of networkidle plus a fixed sleep, a page is read as soon as any condition
+of the retailer's policy (CONFIG['page_readiness'][retailer]) holds:
+  - 'json_ld':           a <script type="application/ld+json"> is in the DOM
+  - 'selector':          one of policy['selectors'] is in the DOM
+  - 'response':          a response (< 400) whose URL contains one of policy['responses']
+  - 'challenge_cleared': with policy['challenge_markers'], the page finished loading
+                         and shows no challenge marker
+While a challenge marker is on the page, the DOM conditions don't count. After
+policy['timeout_ms'] the scraper proceeds anyway ('timeout').
+
+Usage (watch before goto, so responses during navigation are seen):
+    waiter = self.readiness.watch(page, self.retailer_name)
+    response = await page.goto(url, wait_until='domcontentloaded')
+    await waiter.wait()
+
+Stats per retailer: how long each page actually waited and which condition fired.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Dict, List
+
+from utils import percentile_ms
+
+READY_JS = r"""
+(opts) => {
+    const challenged = () => {
+        if (!opts.challengeMarkers.length || !document.documentElement) return false;
+        const html = document.documentElement.outerHTML;
+        return opts.challengeMarkers.some((m) => html.includes(m));
+    };
+    let ready = null;
+    if (opts.jsonLd && document.querySelector('script[type="application/ld+json"]')) ready = 'json_ld';
+    else if (opts.selectors.some((s) => document.querySelector(s))) ready = 'selector';
+    else if (opts.challengeMarkers.length && document.readyState === 'complete') ready = 'challenge_cleared';
+    return ready && !challenged() ? ready : false;
+}
+"""
+
+POLL_MS = 50
+
+
+class ReadinessWaiter:
+    """Readiness wait for one page (create with PageReadiness.watch before navigating)."""
+    
+    def __init__(self, readiness: 'PageReadiness', page, policy: Dict):
+        self.readiness = readiness
+        self.page = page
+        self.policy = policy
+        self.response_patterns: List[str] = policy.get('responses') or []
+        self.response_seen = asyncio.Event()
+        if self.response_patterns:
+            page.on('response', self._on_response)
+    
+    def _on_response(self, response):
+        if response.status < 400 and any(pattern in response.url for pattern in self.response_patterns):
+            self.response_seen.set()
+    
+    async def wait(self) -> str:
+        """Wait until the page is ready; returns the condition that fired ('timeout' if none did)."""
+        start = time.perf_counter()
+        timeout_ms = self.policy.get('timeout_ms', 10000)
+        opts = {
+            'jsonLd': bool(self.policy.get('json_ld')),
+            'selectors': self.policy.get('selectors') or [],
+            'challengeMarkers': self.policy.get('challenge_markers') or [],
+        }
+        
+        dom_task = response_task = None
+        if self.response_seen.is_set():
+            condition = 'response'  # Already arrived during navigation
+        elif not (opts['jsonLd'] or opts['selectors'] or opts['challengeMarkers'] or self.response_patterns):
+            condition = 'no_policy'
+        else:
+            condition = 'timeout'
+            if opts['jsonLd'] or opts['selectors'] or opts['challengeMarkers']:
+                dom_task = asyncio.create_task(
+                    self.page.wait_for_function(READY_JS, arg=opts, timeout=timeout_ms, polling=POLL_MS))
+            if self.response_patterns:
+                response_task = asyncio.create_task(self.response_seen.wait())
+            
+            tasks = [task for task in (dom_task, response_task) if task]
+            done, pending = await asyncio.wait(tasks, timeout=timeout_ms / 1000, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            
+            if response_task in done:
+                condition = 'response'
+            elif dom_task in done and not dom_task.exception():
+                condition = await dom_task.result().json_value()
+            # A failed DOM wait (Playwright timeout, page closed) counts as a timeout
+        
+        if self.response_patterns:
+            self.page.remove_listener('response', self._on_response)
+        self.readiness.record(condition, time.perf_counter() - start)
+        return condition
+
+
+class PageReadiness:
+    """Readiness policies (per retailer) plus wait-time stats for one scraper."""
+    
+    def __init__(self, config: Dict):
+        self.policies = config.get('page_readiness') or {}
+        self.waits = deque(maxlen=10000)
+        self.conditions = Counter()
+    
+    def watch(self, page, retailer: str) -> ReadinessWaiter:
+        return ReadinessWaiter(self, page, self.policies.get(retailer) or {})
+    
+    def record(self, condition: str, seconds: float):
+        self.conditions[condition] += 1
+        self.waits.append(seconds)
+    
+    def get_stats(self) -> Dict:
+        waits = sorted(self.waits)
+        return {
+            'pages': sum(self.conditions.values()),
+            'wait_p50_ms': percentile_ms(waits, 50),
+            'wait_p95_ms': percentile_ms(waits, 95),
+            'wait_max_ms': round(waits[-1] * 1000, 1) if waits else 0.0,
+            'conditions': dict(self.conditions),
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['pages']:
+            return
+        conditions = ', '.join(f"{name} {count:,}" for name, count in self.conditions.most_common())
+        print(f"  Page readiness: {stats['pages']:,} pages | wait p50 {stats['wait_p50_ms']}ms "
+              f"p95 {stats['wait_p95_ms']}ms max {stats['wait_max_ms']}ms | {conditions}")
@@ -0,0 +1,176 @@
+"""
+Projection-only decoding of Target redsky responses.
+
+The pdp_client_v1 payload is large (promotions, variation hierarchy, taxonomy...)
+but _parse_api_response reads about 25 fields. With msgspec installed, the Structs
+below decode only those fields and skip every other key in C without building
+Python objects for them. The result is converted back to plain dicts (unset fields
+omitted) so _parse_api_response works unchanged.
+
+Without msgspec, responses are fully decoded with orjson (if installed) or json.
+"""
+
+import json
+from typing import Any, List, Optional
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Decode counters (typed = projection succeeded, fallback = schema mismatch, full decode)
+DECODE_STATS = {'typed': 0, 'fallback': 0}
+
+
+def decode_full(content: bytes) -> Any:
+    """Plain full decode - fastest available JSON library."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+if MSGSPEC_AVAILABLE:
+    # Scalars whose JSON type varies between products are typed Any;
+    # kw_only so every field can default to None (unset -> omitted on to_builtins)
+
+    class _Struct(msgspec.Struct, omit_defaults=True, kw_only=True):
+        pass
+
+    class SoftBullets(_Struct):
+        bullets: Optional[List[Any]] = None
+
+    class ProductDescription(_Struct):
+        title: Any = None
+        downstream_description: Any = None
+        soft_bullets: Optional[SoftBullets] = None
+
+    class Brand(_Struct):
+        name: Any = None
+
+    class Images(_Struct):
+        primary_image: Any = None  # URL string or {'url': ...}
+        alternate_images: Optional[List[Any]] = None
+
+    class Enrichment(_Struct):
+        images: Optional[Images] = None
+
+    class Item(_Struct):
+        product_description: Optional[ProductDescription] = None
+        primary_brand: Optional[Brand] = None
+        enrichment: Optional[Enrichment] = None
+
+    class Price(_Struct):
+        current_retail: Any = None
+        current_retail_min: Any = None
+        reg_retail: Any = None
+        reg_retail_max: Any = None
+        comparison_price: Any = None
+
+    class Category(_Struct):
+        name: Any = None
+
+    class Rating(_Struct):
+        average: Any = None
+        count: Any = None
+
+    class RatingStatistics(_Struct):
+        rating: Optional[Rating] = None
+
+    class RatingsAndReviews(_Struct):
+        statistics: Optional[RatingStatistics] = None
+
+    class FulfillmentFiats(_Struct):
+        is_out_of_stock_in_all_store_locations: Any = None
+
+    class PdpProduct(_Struct):
+        tcin: Any = None
+        item: Optional[Item] = None
+        price: Optional[Price] = None
+        category: Optional[Category] = None
+        ratings_and_reviews: Optional[RatingsAndReviews] = None
+        fulfillment_fiats: Optional[FulfillmentFiats] = None
+
+    class PdpData(_Struct):
+        product: Optional[PdpProduct] = None
+
+    class PdpResponse(_Struct):
+        data: Optional[PdpData] = None
+
+    class ShippingService(_Struct):
+        min_delivery_date: Any = None
+        max_delivery_date: Any = None
+
+    class ShippingOptions(_Struct):
+        availability_status: Any = None
+        services: Optional[List[ShippingService]] = None
+
+    class Fulfillment(_Struct):
+        shipping_options: Optional[ShippingOptions] = None
+
+    class PayPerOrderCharges(_Struct):
+        one_day: Any = None
+        scheduled_delivery: Any = None
+
+    class FulfillmentProduct(_Struct):
+        fulfillment: Optional[Fulfillment] = None
+        pay_per_order_charges: Optional[PayPerOrderCharges] = None
+
+    class FulfillmentData(_Struct):
+        product: Optional[FulfillmentProduct] = None
+
+    class FulfillmentResponse(_Struct):
+        data: Optional[FulfillmentData] = None
+
+    # Price alone, for per-store pricing calls (location matrix)
+    class PdpPriceProduct(_Struct):
+        price: Optional[Price] = None
+
+    class PdpPriceData(_Struct):
+        product: Optional[PdpPriceProduct] = None
+
+    class PdpPriceResponse(_Struct):
+        data: Optional[PdpPriceData] = None
+
+    _PDP_DECODER = msgspec.json.Decoder(PdpResponse)
+    _PDP_PRICE_DECODER = msgspec.json.Decoder(PdpPriceResponse)
+    _FULFILLMENT_DECODER = msgspec.json.Decoder(FulfillmentResponse)
+
+
+def _decode_typed(decoder, content: bytes) -> Any:
+    try:
+        decoded = msgspec.to_builtins(decoder.decode(content))
+        DECODE_STATS['typed'] += 1
+        return decoded
+    except msgspec.ValidationError:
+        # Schema drift (e.g. a field changed type) - keep scraping with a full decode
+        DECODE_STATS['fallback'] += 1
+        return decode_full(content)
+
+
+def decode_pdp(content: bytes) -> Any:
+    """Decode a pdp_client_v1 response to the dict shape _parse_api_response expects."""
+    if MSGSPEC_AVAILABLE:
+        return _decode_typed(_PDP_DECODER, content)
+    return decode_full(content)
+
+
+def decode_pdp_price(content: bytes) -> Any:
+    """Decode only data.product.price of a pdp_client_v1 response."""
+    if MSGSPEC_AVAILABLE:
+        return _decode_typed(_PDP_PRICE_DECODER, content)
+    return decode_full(content)
+
+
+def decode_fulfillment(content: bytes) -> Any:
+    """Decode a product_fulfillment_and_variation_hierarchy_v1 response."""
+    if MSGSPEC_AVAILABLE:
+        return _decode_typed(_FULFILLMENT_DECODER, content)
+    return decode_full(content)
@@ -0,0 +1,138 @@
+"""
+Targeted <script> block extraction without building a DOM.
+
+Product pages carry their structured data in one or two script blocks
+(<script type="application/ld+json"> and Target's <script id="__NEXT_DATA__">),
+but a full parse of a 1-2 MB page just to find them costs far more than the
+data itself. These helpers scan the raw page for the opening tag, check its
+attributes, and slice out the payload up to </script>. Script content is raw
+text in HTML, so the slice is exactly what the DOM parsers would return.
+
+Callers fall back to a DOM parse when the scan misses (the marker is on the page
+but no block was found, or no block decoded). Pages that don't contain the marker
+at all can't have the block, so they skip both.
+
+Stats (hit rate, scan time, and time saved estimated from the DOM parses the same
+process did) are kept per process; ParseExecutor merges worker deltas back.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional
+
+# Opening <script ...> tag (attributes captured) and the closing tag
+_SCRIPT_OPEN = re.compile(r'<script\b([^>]*)>', re.I)
+_SCRIPT_CLOSE = re.compile(r'</script\s*>', re.I)
+_ATTR = re.compile(r'''([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+SCRIPT_STATS: Dict[str, float] = {
+    'lookups': 0,        # Fast-path lookups
+    'hits': 0,           # Block found and decoded without a DOM
+    'absent': 0,         # Marker not on the page - no block, no DOM needed
+    'dom_fallbacks': 0,  # Scan missed, block looked up in a full DOM parse
+    'scan_s': 0.0,
+    'hit_bytes': 0,      # Page bytes of the hits (DOM parses avoided)
+    'dom_parses': 0,     # Every product-page DOM parse (fallbacks and markup pages)
+    'dom_s': 0.0,
+    'dom_bytes': 0,
+}
+
+
+def _attrs(attr_text: str) -> Dict[str, str]:
+    attrs = {}
+    for name, dq, sq, bare in _ATTR.findall(attr_text):
+        attrs.setdefault(name.lower(), dq or sq or bare)
+    return attrs
+
+
+def find_script_blocks(html: str, attr: str, value: str, first_only: bool = False) -> List[str]:
+    """
+    Raw contents of <script> blocks whose attribute `attr` equals `value`, in page order.
+    Empty blocks are skipped (same as the DOM backends).
+    """
+    blocks = []
+    for match in _SCRIPT_OPEN.finditer(html):
+        if _attrs(match.group(1)).get(attr) != value:
+            continue
+        close = _SCRIPT_CLOSE.search(html, match.end())
+        if not close:
+            break
+        content = html[match.end():close.start()]
+        if content:
+            blocks.append(content)
+            if first_only:
+                break
+    return blocks
+
+
+def scan(html: str, attr: str, value: str, marker: str, first_only: bool = False) -> Optional[List[str]]:
+    """
+    Fast-path lookup with stats. Returns the matching blocks, [] when the page
+    can't contain one (marker absent), or None when a DOM parse should decide.
+    """
+    start = time.perf_counter()
+    SCRIPT_STATS['lookups'] += 1
+    if marker not in html:
+        SCRIPT_STATS['absent'] += 1
+        blocks = []
+    else:
+        blocks = find_script_blocks(html, attr, value, first_only) or None
+    SCRIPT_STATS['scan_s'] += time.perf_counter() - start
+    return blocks
+
+
+def record_hit(html: str):
+    SCRIPT_STATS['hits'] += 1
+    SCRIPT_STATS['hit_bytes'] += len(html)
+
+
+def record_dom_fallback():
+    SCRIPT_STATS['dom_fallbacks'] += 1
+
+
+def record_dom_parse(html: str, seconds: float):
+    SCRIPT_STATS['dom_parses'] += 1
+    SCRIPT_STATS['dom_s'] += seconds
+    SCRIPT_STATS['dom_bytes'] += len(html)
+
+
+def stats_snapshot() -> Dict[str, float]:
+    return dict(SCRIPT_STATS)
+
+
+def stats_delta(before: Dict[str, float]) -> Dict[str, float]:
+    """Counters added since a snapshot (shipped back from parse workers)."""
+    return {key: SCRIPT_STATS[key] - before[key] for key in SCRIPT_STATS}
+
+
+def merge_stats(delta: Dict[str, float]):
+    for key, value in delta.items():
+        SCRIPT_STATS[key] += value
+
+
+def get_stats() -> Dict:
+    stats = SCRIPT_STATS
+    found = stats['hits'] + stats['dom_fallbacks']
+    # DOM cost per byte observed in this run, applied to the pages the fast path skipped
+    dom_s_per_byte = stats['dom_s'] / stats['dom_bytes'] if stats['dom_bytes'] else None
+    saved_s = stats['hit_bytes'] * dom_s_per_byte - stats['scan_s'] if dom_s_per_byte is not None else None
+    return {
+        'lookups': stats['lookups'],
+        'hits': stats['hits'],
+        'absent': stats['absent'],
+        'dom_fallbacks': stats['dom_fallbacks'],
+        'hit_rate_percent': round(stats['hits'] / found * 100, 1) if found else 0.0,
+        'scan_avg_ms': round(stats['scan_s'] / stats['lookups'] * 1000, 3) if stats['lookups'] else 0.0,
+        'dom_avg_ms': round(stats['dom_s'] / stats['dom_parses'] * 1000, 2) if stats['dom_parses'] else None,
+        'est_time_saved_s': round(saved_s, 2) if saved_s is not None else None,
+    }
+
+
+def print_stats():
+    stats = get_stats()
+    if not stats['lookups']:
+        return
+    saved = f"~{stats['est_time_saved_s']}s" if stats['est_time_saved_s'] is not None else 'n/a (no DOM parses to compare)'
+    print(f"  Script blocks: {stats['hits']:,} fast-path hits ({stats['hit_rate_percent']}%) | "
+          f"{stats['dom_fallbacks']:,} DOM fallbacks | {stats['absent']:,} absent | "
+          f"scan avg {stats['scan_avg_ms']}ms | DOM time saved {saved}")
@@ -2,26 +2,43 @@
 Target scraper - GraphQL API interception strategy.
 """
 
-from typing import List, Dict, Optional, Any, AsyncGenerator
+from typing import List, Dict, Optional, Any, AsyncGenerator, Union
 from bs4 import BeautifulSoup
 from datetime import datetime
+import asyncio
 import json
 import re
 import gzip
 from io import BytesIO
-import httpx
-from .base import BaseScraper
+from lanes import Lane
+from models import ProductRecord
+from . import page_extract, script_extract
+from .base import BaseScraper, TransientFetchError
+from .redsky_schema import decode_pdp, decode_pdp_price, decode_fulfillment
 
 
 class TargetScraper(BaseScraper):
     """Target.com scraper using GraphQL API and sitemap enumeration."""
     
-    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager):
-        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager)
+    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager, parse_executor=None):
+        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager, parse_executor)
         self.retailer_name = 'target'
         from config import RETAILERS
         self.base_url = RETAILERS['target']['base_url']
         self.sitemap_url = RETAILERS['target']['sitemap_url']
+        
+        # Location matrix (CONFIG['locations']): products rows are scraped at the first store/ZIP;
+        # further stores/ZIPs fan out price-only and fulfillment calls into product_locations
+        locations = config.get('locations') or {}
+        self.pricing_stores = locations.get('stores') or ['2064']
+        self.shipping_zips = locations.get('zips') or ['50000']
+        self.location_matrix = len(self.pricing_stores) > 1 or len(self.shipping_zips) > 1
+        self._location_slots = asyncio.Semaphore(locations.get('concurrency', 32))
+        self.location_stats = {'products': 0, 'requests': 0, 'failed': 0, 'rows': 0}
+        
+        # Browser work handed off by scrape_product(browser_handoff=True) runs here, not in an API slot
+        browser_slots = (config.get('browser_lane') or {}).get('target', 8)
+        self.browser_lane = Lane('target browser', browser_slots) if browser_slots else None
     
     async def enumerate_products(self) -> AsyncGenerator[Dict[str, str], None]:
         """
@@ -103,22 +120,21 @@ class TargetScraper(BaseScraper):
         await self.rate_limiter.wait(self.retailer_name)
         
         try:
-            async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-                response = await client.get(url, headers=self._get_headers())
-                
-                if response.status_code != 200:
-                    return None
-                
-                # Try to decompress if actually gzipped, otherwise return as-is
-                if url.endswith('.gz'):
-                    try:
-                        decompressed = gzip.decompress(response.content)
-                        return decompressed.decode('utf-8')
-                    except gzip.BadGzipFile:
-                        # Already decompressed by server
-                        return response.text
-                else:
+            response = await self._request('GET', url, self._get_headers(), use_proxy=False)
+            
+            if response.status_code != 200:
+                return None
+            
+            # Try to decompress if actually gzipped, otherwise return as-is
+            if url.endswith('.gz'):
+                try:
+                    decompressed = gzip.decompress(response.content)
+                    return decompressed.decode('utf-8')
+                except gzip.BadGzipFile:
+                    # Already decompressed by server
                     return response.text
+            else:
+                return response.text
         except Exception as e:
             print(f"  Error fetching sitemap {url}: {e}")
             return None
@@ -131,10 +147,13 @@ class TargetScraper(BaseScraper):
             return match.group(1)
         return None
     
-    async def scrape_product(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
+    async def scrape_product(self, product_url: str, product_id: str = None,
+                             browser_handoff: bool = False) -> Optional[Dict[str, Any]]:
         """
         Scrape Target product using GraphQL API.
         Target loads product data via API after page load.
+        browser_handoff: instead of opening a browser page here, return
+        {'status': 'needs_browser', 'reason': ...} for scrape_handoff() in the browser lane.
         """
         try:
             # Extract TCIN from URL if not provided
@@ -149,42 +168,24 @@ class TargetScraper(BaseScraper):
             await self.rate_limiter.wait(self.retailer_name)
             
             # Call Target's internal API
-            product_data = await self._fetch_product_api(product_id)
+            product_data = await self._fetch_product_api(product_id, product_url)
             
             # Check if product needs browser (marketplace seller)
             if product_data and product_data.get('status') == 'needs_browser':
                 # Fallback to browser scraping for marketplace products
-                context = await self.browser_manager.create_context(self.retailer_name)
-                page = await self.browser_manager.new_page(context)
-                await page.goto(product_url, wait_until='networkidle', timeout=30000)
-                
-                # Wait for price element to ensure content is loaded
-                try:
-                    await page.wait_for_selector('span[data-test="product-price"]', timeout=10000)
-                except:
-                    pass  # Continue anyway if selector not found
-                
-                # Scrape from live page before closing
-                result = await self._parse_browser_fallback_live(page, product_url, product_id)
-                await self.browser_manager.close_context(context)
-                return result
+                if browser_handoff:
+                    return {'status': 'needs_browser', 'reason': 'marketplace'}
+                return await self._scrape_in_browser(product_url, product_id)
             
             # Check if product not found
             if product_data and product_data.get('status') == 'not_found':
-                return {'status': 'not_found'}
+                return product_data
             
             if not product_data:
                 # Try page load as fallback
-                context = await self.browser_manager.create_context(self.retailer_name)
-                page = await self.browser_manager.new_page(context)
-                response = await page.goto(product_url, wait_until='domcontentloaded', timeout=30000)
-                
-                if response and response.status == 404:
-                    await self.browser_manager.close_context(context)
-                    return {'status': 'not_found'}
-                
-                await self.browser_manager.close_context(context)
-                return None
+                if browser_handoff:
+                    return {'status': 'needs_browser', 'reason': 'api_failed'}
+                return await self._check_page(product_url)
             
             # Parse API response
             product = self._parse_api_response(product_data, product_url, product_id)
@@ -195,54 +196,217 @@ class TargetScraper(BaseScraper):
             
             if product:
                 self.proxy_manager.record_request(success=True, is_block=False)
+            if isinstance(product, ProductRecord) and self.location_matrix:
+                await self._scrape_locations(product_id, product, product_data)
             
             return product
             
+        except TransientFetchError:
+            raise
         except Exception as e:
             import traceback
             print(f"  ❌ EXCEPTION scraping {product_url}: {e}")
             traceback.print_exc()
             return None
     
-    async def _fetch_product_api(self, tcin: str) -> Optional[Dict]:
-        """Fetch product data from Target's internal API."""
+    async def scrape_handoff(self, product_url: str, product_id: str, handoff: Dict) -> Optional[Dict[str, Any]]:
+        """Browser half of scrape_product(browser_handoff=True); the caller holds a browser_lane slot."""
+        try:
+            if handoff.get('reason') == 'marketplace':
+                return await self._scrape_in_browser(product_url, product_id)
+            return await self._check_page(product_url)
+        except Exception as e:
+            print(f"  ❌ EXCEPTION in browser fallback for {product_url}: {e}")
+            return None
+    
+    async def _check_page(self, product_url: str) -> Optional[Dict[str, Any]]:
+        """After an API failure: {'status': 'not_found'} if the product page is a 404, else None."""
+        context = await self.browser_manager.create_context(self.retailer_name)
+        try:
+            page = await self.browser_manager.new_page(context)
+            response = await self.goto(page, product_url)
+            if response and response.status == 404:
+                return {'status': 'not_found'}
+            return None
+        finally:
+            await self.browser_manager.close_context(context)
+    
+    async def _scrape_in_browser(self, product_url: str, product_id: str) -> Optional[ProductRecord]:
+        """Scrape the live product page (marketplace sellers, and fields the API doesn't have)."""
+        context = await self.browser_manager.create_context(self.retailer_name)
+        try:
+            page = await self.browser_manager.new_page(context)
+            waiter = self.readiness.watch(page, self.retailer_name)
+            await self.goto(page, product_url)
+            
+            # Wait for the price element (continues anyway on timeout)
+            await waiter.wait()
+            
+            # Scrape from live page before closing
+            return await self._parse_browser_fallback_live(page, product_url, product_id)
+        finally:
+            await self.browser_manager.close_context(context)
+    
+    def _api_headers(self, product_url: str) -> Dict[str, str]:
+        """Browser-like headers for redsky calls (captured from real browser)."""
+        return {
+            'accept': 'application/json',
+            'referer': product_url,
+            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
+            'sec-ch-ua': '"Not=A?Brand";v="24", "Chromium";v="140"',
+            'sec-ch-ua-mobile': '?0',
+            'sec-ch-ua-platform': '"macOS"',
+        }
+    
+    def _pdp_api_url(self, tcin: str, store_id: str = None) -> str:
+        # pricing_store_id is REQUIRED (GraphQL NonNull parameter)
+        # Default store 2064 (what Target.com uses for online browsing)
+        store_id = store_id or self.pricing_stores[0]
+        return f'https://redsky.target.com/redsky_aggregations/v1/web/pdp_client_v1?key=9f36aeafbe60771e321a7cc95a78140772ab3e96&tcin={tcin}&pricing_store_id={store_id}&store_id={store_id}&channel=WEB'
+    
+    def _fulfillment_api_url(self, tcin: str, zip_code: str = None) -> str:
+        # Default: central US ZIP for consistent nationwide estimates (50000 = Des Moines, IA)
+        zip_code = zip_code or self.shipping_zips[0]
+        return f'https://redsky.target.com/redsky_aggregations/v1/web/product_fulfillment_and_variation_hierarchy_v1?key=9f36aeafbe60771e321a7cc95a78140772ab3e96&tcin={tcin}&zip={zip_code}'
+    
+    async def _fetch_product_api(self, tcin: str, manifest_url: str = None) -> Optional[Dict]:
+        """Fetch product data from Target's internal API (manifest_url: the URL the payloads are cached under)."""
         product_url = f'https://www.target.com/p/-/A-{tcin}'
+        cached_url = manifest_url or product_url
         
         try:
-            # Use browser-like headers (captured from real browser)
-            api_headers = {
-                'accept': 'application/json',
-                'referer': product_url,
-                'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
-                'sec-ch-ua': '"Not=A?Brand";v="24", "Chromium";v="140"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"macOS"',
-            }
+            api_headers = self._api_headers(product_url)
             
             # 1. Get main product data
-            # pricing_store_id is REQUIRED (GraphQL NonNull parameter)
-            # Using store 2064 (what Target.com uses for online browsing)
-            pdp_api_url = f'https://redsky.target.com/redsky_aggregations/v1/web/pdp_client_v1?key=9f36aeafbe60771e321a7cc95a78140772ab3e96&tcin={tcin}&pricing_store_id=2064&store_id=2064&channel=WEB'
-            product_data = await self.fetch_json(pdp_api_url, headers=api_headers)
+            # A block/429/5xx/timeout here raises TransientFetchError so the product is retried later
+            product_data = await self.fetch_json(self._pdp_api_url(tcin), headers=api_headers, decoder=decode_pdp,
+                                                cache_as=(tcin, cached_url, 'pdp'), transient=True)
             
-            # If API returns no data, product is discontinued/not found - skip it
-            if not product_data or not product_data.get('data', {}).get('product'):
-                return {'status': 'not_found'}  # Product doesn't exist (404)
+            # None is an error, not an answer - only a 404 or an empty product means it doesn't exist
+            if product_data is None:
+                return None
+            if product_data.get('status') == 'not_found':
+                return product_data
+            if not product_data.get('data', {}).get('product'):
+                return {'status': 'not_found', 'reason': 'empty_payload'}  # Discontinued/not found
             
             # 2. Get fulfillment data (shipping estimate & cost)
-            # Use central US ZIP for consistent nationwide estimates (50000 = Des Moines, IA)
-            fulfillment_api_url = f'https://redsky.target.com/redsky_aggregations/v1/web/product_fulfillment_and_variation_hierarchy_v1?key=9f36aeafbe60771e321a7cc95a78140772ab3e96&tcin={tcin}&zip=50000'
-            fulfillment_data = await self.fetch_json(fulfillment_api_url, headers=api_headers)
+            fulfillment_data = await self.fetch_json(self._fulfillment_api_url(tcin), headers=api_headers,
+                                                    decoder=decode_fulfillment, cache_as=(tcin, cached_url, 'fulfillment'))
             
             # Merge fulfillment data into product data
             if fulfillment_data and fulfillment_data.get('data', {}).get('product'):
                 product_data['data']['product']['fulfillment_data'] = fulfillment_data['data']['product']
             
             return product_data
+        except TransientFetchError:
+            raise
         except Exception as e:
             print(f"  API fetch error for {tcin}: {e}")
             return None
     
+    async def _scrape_locations(self, tcin: str, product: ProductRecord, product_data: Dict):
+        """
+        Write the product's per-store prices and per-ZIP shipping to product_locations.
+        The first store/ZIP come from the payloads just fetched for the products row; only
+        the other locations cost requests (price-only pdp per store, fulfillment per ZIP),
+        sharing a bounded number of slots across all products.
+        """
+        scraped_at = datetime.now().isoformat()
+        api_headers = self._api_headers(f'https://www.target.com/p/-/A-{tcin}')
+        base_fulfillment = product_data['data']['product'].get('fulfillment_data', {})
+        rows = [
+            (tcin, 'store', self.pricing_stores[0], product.price_current, product.price_compare_at,
+             None, None, None, scraped_at),
+            (tcin, 'zip', self.shipping_zips[0], None, None, product.shipping_cost, product.shipping_estimate,
+             self._parse_shipping_availability(base_fulfillment), scraped_at),
+        ]
+        
+        async def fetch_store(store_id: str):
+            async with self._location_slots:
+                data = await self.fetch_json(self._pdp_api_url(tcin, store_id), headers=api_headers, decoder=decode_pdp_price)
+            price_obj = (((data or {}).get('data') or {}).get('product') or {}).get('price')
+            if price_obj is None:
+                return None
+            price_current, price_compare = self._parse_price(price_obj)
+            return (tcin, 'store', store_id, price_current, price_compare, None, None, None, scraped_at)
+        
+        async def fetch_zip(zip_code: str):
+            async with self._location_slots:
+                data = await self.fetch_json(self._fulfillment_api_url(tcin, zip_code), headers=api_headers,
+                                             decoder=decode_fulfillment)
+            fulfillment_data = ((data or {}).get('data') or {}).get('product')
+            if not fulfillment_data:
+                return None
+            shipping_cost, shipping_estimate = self._parse_shipping(fulfillment_data)
+            return (tcin, 'zip', zip_code, None, None, shipping_cost, shipping_estimate,
+                    self._parse_shipping_availability(fulfillment_data), scraped_at)
+        
+        results = await asyncio.gather(*[fetch_store(store_id) for store_id in self.pricing_stores[1:]],
+                                       *[fetch_zip(zip_code) for zip_code in self.shipping_zips[1:]],
+                                       return_exceptions=True)
+        rows.extend(result for result in results if isinstance(result, tuple))
+        self.database.upsert_product_locations(rows)
+        
+        stats = self.location_stats
+        stats['products'] += 1
+        stats['requests'] += 2 + len(results)  # pdp + fulfillment for the products row, plus the fan-out
+        stats['failed'] += sum(1 for result in results if not isinstance(result, tuple))
+        stats['rows'] += len(rows)
+    
+    def get_location_stats(self) -> Dict:
+        stats = self.location_stats
+        return {
+            'stores': len(self.pricing_stores),
+            'zips': len(self.shipping_zips),
+            'products': stats['products'],
+            'requests_per_product': round(stats['requests'] / stats['products'], 2) if stats['products'] else 0.0,
+            # pdp + fulfillment for every store x ZIP pair, without reuse
+            'unshared_requests_per_product': 2 * len(self.pricing_stores) * len(self.shipping_zips),
+            'rows': stats['rows'],
+            'failed': stats['failed'],
+        }
+    
+    def print_location_stats(self):
+        stats = self.get_location_stats()
+        if not stats['products']:
+            return
+        print(f"  Location matrix: {stats['stores']} stores x {stats['zips']} ZIPs | {stats['products']:,} products | "
+              f"{stats['requests_per_product']} requests/product (vs {stats['unshared_requests_per_product']} "
+              f"fetching every store x ZIP pair) | {stats['rows']:,} location rows, {stats['failed']:,} failed calls")
+    
+    async def fetch_fulfillment(self, tcin: str, product_url: str) -> Optional[Dict[str, Any]]:
+        """
+        shipping_cost and shipping_estimate from the fulfillment API alone - one request instead
+        of a full scrape (main.py --refresh fulfillment, rescrape_incomplete.py). Availability
+        isn't returned: the stored value is the pdp's store-level stock, not shipping availability.
+        """
+        try:
+            fulfillment_data = await self.fetch_json(
+                self._fulfillment_api_url(tcin), headers=self._api_headers(f'https://www.target.com/p/-/A-{tcin}'),
+                decoder=decode_fulfillment, cache_as=(tcin, product_url, 'fulfillment')
+            )
+        except Exception as e:
+            print(f"  Fulfillment fetch error for {tcin}: {e}")
+            return None
+        if not fulfillment_data or not fulfillment_data.get('data', {}).get('product'):
+            return None
+        product = fulfillment_data['data']['product']
+        shipping_cost, shipping_estimate = self._parse_shipping(product)
+        return {'shipping_cost': shipping_cost, 'shipping_estimate': shipping_estimate}
+    
+    def _parse_cached_api(self, pdp: str, product_url: str, product_id: str,
+                          fulfillment: Optional[str] = None) -> Optional[ProductRecord]:
+        """_parse_api_response over cached redsky payloads (main.py --reparse)."""
+        product_data = decode_pdp(pdp.encode('utf-8'))
+        if not product_data or not product_data.get('data', {}).get('product'):
+            return None
+        if fulfillment:
+            fulfillment_data = decode_fulfillment(fulfillment.encode('utf-8'))
+            if fulfillment_data and fulfillment_data.get('data', {}).get('product'):
+                product_data['data']['product']['fulfillment_data'] = fulfillment_data['data']['product']
+        return self._parse_api_response(product_data, product_url, product_id)
+    
     def _parse_api_response(self, data: Dict, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
         """Parse Target API response."""
         try:
@@ -263,19 +427,15 @@ class TargetScraper(BaseScraper):
             prod_desc = item.get('product_description', {})
             title = prod_desc.get('title')
             
-            # Skip only if title is completely missing
+            # No title is a payload we can't parse, not proof the product is gone - fail (and retry), don't tombstone
             if not title:
-                return {'status': 'not_found'}
+                return None
             
             # Brand is in primary_brand, not product_brand
             brand = item.get('primary_brand', {}).get('name')
             
             # Price - handle both single products and variants
-            price_obj = product.get('price', {})
-            # For products with variants (different sizes/colors), use min price
-            price_current = price_obj.get('current_retail') or price_obj.get('current_retail_min')
-            # For compare-at price, check reg_retail, then reg_retail_max (for variants)
-            price_compare = price_obj.get('reg_retail') or price_obj.get('reg_retail_max') or price_obj.get('comparison_price')
+            price_current, price_compare = self._parse_price(product.get('price', {}))
             
             # Images
             images = product.get('item', {}).get('enrichment', {}).get('images', {})
@@ -339,57 +499,96 @@ class TargetScraper(BaseScraper):
             specifications = ' | '.join(specs_list) if specs_list else None
             
             # Shipping from fulfillment API
-            fulfillment_data = product.get('fulfillment_data', {})
-            shipping_options = fulfillment_data.get('fulfillment', {}).get('shipping_options', {})
-            
-            # Extract shipping cost (standard shipping)
-            pay_charges = fulfillment_data.get('pay_per_order_charges', {})
-            shipping_cost = pay_charges.get('one_day') or pay_charges.get('scheduled_delivery')
-            
-            # Extract delivery estimate
-            services = shipping_options.get('services', [])
-            shipping_estimate = None
-            if services:
-                standard_service = services[0]  # Get first/standard shipping
-                min_date = standard_service.get('min_delivery_date')
-                max_date = standard_service.get('max_delivery_date')
-                if min_date:
-                    # Convert "2025-10-18" to "Sat, Oct 18"
-                    date_obj = datetime.strptime(min_date, '%Y-%m-%d')
-                    shipping_estimate = f"{date_obj.strftime('%a, %b %d')}"
-            
-            return {
-                'product_id': tcin,
-                'retailer': 'target',
-                'product_url': product_url,
-                'title': title,
-                'brand': brand,
-                'category': category,
-                'price_current': price_current,
-                'price_compare_at': price_compare,
-                'currency': 'USD',
-                'availability': availability,
-                'description': description,
-                'specifications': specifications,
-                'image_urls': all_images[:10] if all_images else None,
-                'ratings_average': ratings_avg,
-                'ratings_count': ratings_count,
-                'shipping_cost': shipping_cost,
-                'shipping_estimate': shipping_estimate,
-                'variants': None,  # Complex, can add if needed
-                'seller': 'Target',
-                'scraped_at': datetime.now().isoformat(),
-                'status': 'success'
-            }
+            shipping_cost, shipping_estimate = self._parse_shipping(product.get('fulfillment_data', {}))
+            
+            return ProductRecord(
+                product_id=tcin,
+                retailer='target',
+                product_url=product_url,
+                title=title,
+                brand=brand,
+                category=category,
+                price_current=price_current,
+                price_compare_at=price_compare,
+                currency='USD',
+                availability=availability,
+                description=description,
+                specifications=specifications,
+                image_urls=all_images[:10] if all_images else None,
+                ratings_average=ratings_avg,
+                ratings_count=ratings_count,
+                shipping_cost=shipping_cost,
+                shipping_estimate=shipping_estimate,
+                variants=None,  # Complex, can add if needed
+                seller='Target',
+                scraped_at=datetime.now().isoformat(),
+                status='success'
+            )
         except Exception as e:
             print(f"  ❌ PARSE EXCEPTION for {product_id}: {e}")
             import traceback
             traceback.print_exc()
             return None
     
-    def _extract_next_data(self, soup: BeautifulSoup) -> Optional[Dict]:
-        """Extract __NEXT_DATA__ JSON from page."""
-        script = soup.find('script', id='__NEXT_DATA__')
+    def _parse_price(self, price_obj: Dict) -> tuple:
+        """(price_current, price_compare_at) from a pdp price object."""
+        # For products with variants (different sizes/colors), use min price
+        price_current = price_obj.get('current_retail') or price_obj.get('current_retail_min')
+        # For compare-at price, check reg_retail, then reg_retail_max (for variants)
+        price_compare = price_obj.get('reg_retail') or price_obj.get('reg_retail_max') or price_obj.get('comparison_price')
+        return price_current, price_compare
+    
+    def _parse_shipping(self, fulfillment_data: Dict) -> tuple:
+        """(shipping_cost, shipping_estimate) from the fulfillment API's product object."""
+        shipping_options = fulfillment_data.get('fulfillment', {}).get('shipping_options', {})
+        
+        # Extract shipping cost (standard shipping)
+        pay_charges = fulfillment_data.get('pay_per_order_charges', {})
+        shipping_cost = pay_charges.get('one_day') or pay_charges.get('scheduled_delivery')
+        
+        # Extract delivery estimate
+        services = shipping_options.get('services', [])
+        shipping_estimate = None
+        if services:
+            standard_service = services[0]  # Get first/standard shipping
+            min_date = standard_service.get('min_delivery_date')
+            if min_date:
+                # Convert "2025-10-18" to "Sat, Oct 18"
+                date_obj = datetime.strptime(min_date, '%Y-%m-%d')
+                shipping_estimate = f"{date_obj.strftime('%a, %b %d')}"
+        
+        return shipping_cost, shipping_estimate
+    
+    # Online (ship-to-home) availability_status values that mean the product can be ordered
+    IN_STOCK_STATUSES = {'IN_STOCK', 'LIMITED_STOCK', 'PRE_ORDER_SELLABLE', 'BACKORDER_SELLABLE'}
+    
+    def _parse_shipping_availability(self, fulfillment_data: Dict) -> Optional[str]:
+        """in_stock/out_of_stock from the fulfillment API's shipping availability (None if absent)."""
+        status = fulfillment_data.get('fulfillment', {}).get('shipping_options', {}).get('availability_status')
+        if not status:
+            return None
+        return 'in_stock' if status in self.IN_STOCK_STATUSES else 'out_of_stock'
+    
+    def _extract_next_data(self, html: Union[str, BeautifulSoup]) -> Optional[Dict]:
+        """
+        Extract __NEXT_DATA__ JSON from page. Raw HTML is scanned for the script
+        block (it can be several MB); the page is only parsed into a DOM when the scan misses.
+        """
+        if isinstance(html, str):
+            blocks = script_extract.scan(html, 'id', '__NEXT_DATA__', '__NEXT_DATA__', first_only=True)
+            if blocks == []:
+                return None
+            if blocks:
+                try:
+                    data = json.loads(blocks[0])
+                    script_extract.record_hit(html)
+                    return data
+                except ValueError:
+                    pass
+            script_extract.record_dom_fallback()
+            html = BeautifulSoup(html, 'html.parser')
+        
+        script = html.find('script', id='__NEXT_DATA__')
         if script and script.string:
             try:
                 return json.loads(script.string)
@@ -397,20 +596,27 @@ class TargetScraper(BaseScraper):
                 pass
         return None
     
-    async def _parse_browser_fallback_live(self, page, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
+    async def _parse_browser_fallback_live(self, page, product_url: str, product_id: str) -> Optional[ProductRecord]:
         """Parse marketplace/third-party seller products from live page."""
         try:
+            # Price, shipping and the __NEXT_DATA__ product fields in one evaluate()
+            extracted = await self.extract_in_page(page)
+            if extracted is not None:
+                title = None if extracted['next_product'] is not None else extracted['h1']
+                return self._marketplace_record(
+                    extracted['next_product'], title, product_url, product_id,
+                    price_current=self._live_price(extracted['price_text']),
+                    shipping_estimate=extracted['shipping_text'].strip() if extracted['shipping_text'] else None,
+                )
+            
             # Scrape price from live DOM (loaded dynamically)
             price_current = None
             try:
                 price_elem = await page.query_selector('span[data-test="product-price"]')
+                page_extract.record_round_trips(1)
                 if price_elem:
-                    price_text = await price_elem.inner_text()
-                    price_text = price_text.strip().replace('$', '').replace(',', '')
-                    try:
-                        price_current = float(price_text)
-                    except:
-                        pass
+                    price_current = self._live_price(await price_elem.inner_text())
+                    page_extract.record_round_trips(1)
             except:
                 pass
             
@@ -419,109 +625,126 @@ class TargetScraper(BaseScraper):
             try:
                 # Look for "Arrives by" text
                 shipping_elem = await page.query_selector('text=/Arrives by/')
+                page_extract.record_round_trips(1)
                 if shipping_elem:
                     shipping_text = await shipping_elem.inner_text()
+                    page_extract.record_round_trips(1)
                     shipping_estimate = shipping_text.strip()
             except:
                 pass
             
             # Now get full HTML for remaining data
-            html = await page.content()
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            
+            html = await self.page_content(page)
+            return await self.parse_page(html, product_url, product_id, method='_parse_marketplace_html',
+                                         price_current=price_current, shipping_estimate=shipping_estimate)
+        except Exception as e:
+            print(f"  Browser fallback failed for {product_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def _live_price(self, price_text: Optional[str]) -> Optional[float]:
+        """Price from the live price element's text ('$1,249.99')."""
+        if not price_text:
+            return None
+        try:
+            return float(price_text.strip().replace('$', '').replace(',', ''))
+        except ValueError:
+            return None
+    
+    def _parse_marketplace_html(self, html: str, product_url: str, product_id: str,
+                                price_current: float = None, shipping_estimate: str = None) -> Optional[ProductRecord]:
+        """Parse a marketplace product page; price and shipping come from the live DOM."""
+        try:
             # Extract __NEXT_DATA__ for full details
-            script = soup.find('script', id='__NEXT_DATA__')
-            if script and script.string:
-                data = json.loads(script.string)
-                props = data.get('props', {}).get('pageProps', {}).get('initialData', {}).get('data', {}).get('product', {})
-                
-                if props:
-                    # Extract from __NEXT_DATA__ structure
-                    item = props.get('item', {})
-                    title = item.get('product_description', {}).get('title', 'Unknown')
-                    brand = item.get('primary_brand', {}).get('name')
-                    category = props.get('category', {}).get('name')
-                    
-                    # Description
-                    description = item.get('product_description', {}).get('downstream_description')
-                    if description:
-                        from bs4 import BeautifulSoup as BS
-                        description = BS(description, 'html.parser').get_text(strip=True, separator=' ')
-                    
-                    # Images
-                    images = item.get('enrichment', {}).get('images', {})
-                    image_urls = [images.get('primary_image', '')] if images.get('primary_image') else []
-                    image_urls.extend(images.get('alternate_images', []))
-                    
-                    # Ratings
-                    ratings = props.get('ratings_and_reviews', {}).get('statistics', {}).get('rating', {})
-                    ratings_avg = ratings.get('average')
-                    ratings_count = ratings.get('count')
-                    
-                    # Seller
-                    seller = 'Marketplace'
-                    
-                    return {
-                        'product_id': product_id,
-                        'retailer': 'target',
-                        'product_url': product_url,
-                        'title': title,
-                        'brand': brand,
-                        'category': category,
-                        'price_current': price_current,  # From live DOM
-                        'price_compare_at': None,
-                        'currency': 'USD',
-                        'availability': 'in_stock',
-                        'description': description,
-                        'specifications': None,
-                        'image_urls': image_urls,
-                        'ratings_average': ratings_avg,
-                        'ratings_count': ratings_count,
-                        'shipping_cost': None,
-                        'shipping_estimate': shipping_estimate,  # From live DOM
-                        'variants': None,
-                        'seller': seller,
-                        'scraped_at': datetime.now().isoformat(),
-                        'status': 'success'
-                    }
+            data = self._extract_next_data(html)
+            props = (data or {}).get('props', {}).get('pageProps', {}).get('initialData', {}).get('data', {}).get('product', {}) or None
             
             # Fallback to simple DOM scraping if __NEXT_DATA__ not available
-            title = None
-            h1 = soup.find('h1')
-            if h1:
-                title = h1.get_text(strip=True)
-            
-            return {
-                'product_id': product_id,
-                'retailer': 'target',
-                'product_url': product_url,
-                'title': title or 'Unknown',
-                'brand': None,
-                'category': None,
-                'price_current': price_current,
-                'price_compare_at': None,
-                'currency': 'USD',
-                'availability': 'in_stock',
-                'description': None,
-                'specifications': None,
-                'image_urls': None,
-                'ratings_average': None,
-                'ratings_count': None,
-                'shipping_cost': None,
-                'shipping_estimate': shipping_estimate,
-                'variants': None,
-                'seller': 'Marketplace',
-                'scraped_at': datetime.now().isoformat(),
-                'status': 'success'
-            }
+            title = None if props is not None else self.parse_document(html).find_text('h1')
+            
+            return self._marketplace_record(props, title, product_url, product_id, price_current, shipping_estimate)
         except Exception as e:
-            print(f"  Browser fallback failed for {product_id}: {e}")
+            print(f"  Marketplace page parse failed for {product_id}: {e}")
             import traceback
             traceback.print_exc()
             return None
     
-    def _parse_next_data(self, data: Dict, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
+    def _marketplace_record(self, props: Optional[Dict], title: Optional[str], product_url: str, product_id: str,
+                            price_current: float = None, shipping_estimate: str = None) -> ProductRecord:
+        """
+        Marketplace ProductRecord from the __NEXT_DATA__ product (page HTML or the live-DOM
+        projection); without one, only the <h1> title is known.
+        """
+        if props is not None:
+            # Extract from __NEXT_DATA__ structure
+            item = props.get('item', {})
+            title = item.get('product_description', {}).get('title', 'Unknown')
+            brand = item.get('primary_brand', {}).get('name')
+            category = props.get('category', {}).get('name')
+            
+            # Description
+            description = item.get('product_description', {}).get('downstream_description')
+            if description:
+                description = BeautifulSoup(description, 'html.parser').get_text(strip=True, separator=' ')
+            
+            # Images
+            images = item.get('enrichment', {}).get('images', {})
+            image_urls = [images.get('primary_image', '')] if images.get('primary_image') else []
+            image_urls.extend(images.get('alternate_images', []))
+            
+            # Ratings
+            ratings = props.get('ratings_and_reviews', {}).get('statistics', {}).get('rating', {})
+            
+            return ProductRecord(
+                product_id=product_id,
+                retailer='target',
+                product_url=product_url,
+                title=title,
+                brand=brand,
+                category=category,
+                price_current=price_current,  # From live DOM
+                price_compare_at=None,
+                currency='USD',
+                availability='in_stock',
+                description=description,
+                specifications=None,
+                image_urls=image_urls,
+                ratings_average=ratings.get('average'),
+                ratings_count=ratings.get('count'),
+                shipping_cost=None,
+                shipping_estimate=shipping_estimate,  # From live DOM
+                variants=None,
+                seller='Marketplace',
+                scraped_at=datetime.now().isoformat(),
+                status='success'
+            )
+        
+        return ProductRecord(
+            product_id=product_id,
+            retailer='target',
+            product_url=product_url,
+            title=title or 'Unknown',
+            brand=None,
+            category=None,
+            price_current=price_current,
+            price_compare_at=None,
+            currency='USD',
+            availability='in_stock',
+            description=None,
+            specifications=None,
+            image_urls=None,
+            ratings_average=None,
+            ratings_count=None,
+            shipping_cost=None,
+            shipping_estimate=shipping_estimate,
+            variants=None,
+            seller='Marketplace',
+            scraped_at=datetime.now().isoformat(),
+            status='success'
+        )
+    
+    def _parse_next_data(self, data: Dict, product_url: str, product_id: str) -> Optional[ProductRecord]:
         """Parse product data from __NEXT_DATA__ JSON."""
         try:
             # Navigate through the nested structure
@@ -561,60 +784,61 @@ class TargetScraper(BaseScraper):
             # Availability
             availability = 'in_stock' if product_data.get('available', False) else 'out_of_stock'
             
-            return {
-                'product_id': tcin,
-                'retailer': self.retailer_name,
-                'product_url': product_url,
-                'title': title,
-                'brand': brand,
-                'category': category,
-                'price_current': self.clean_price(str(price_current)) if price_current else None,
-                'price_compare_at': self.clean_price(str(price_compare)) if price_compare else None,
-                'currency': 'USD',
-                'availability': availability,
-                'description': description,
-                'image_urls': image_urls,
-                'ratings_average': ratings_avg,
-                'ratings_count': ratings_count,
-                'specifications': {},
-                'status': 'success'
-            }
+            return ProductRecord(
+                product_id=tcin,
+                retailer=self.retailer_name,
+                product_url=product_url,
+                title=title,
+                brand=brand,
+                category=category,
+                price_current=self.clean_price(str(price_current)) if price_current else None,
+                price_compare_at=self.clean_price(str(price_compare)) if price_compare else None,
+                currency='USD',
+                availability=availability,
+                description=description,
+                image_urls=image_urls,
+                ratings_average=ratings_avg,
+                ratings_count=ratings_count,
+                specifications={},
+                status='success'
+            )
             
         except Exception as e:
             print(f"  Error parsing __NEXT_DATA__: {e}")
             return None
     
-    def _parse_html(self, soup: BeautifulSoup, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
+    def _parse_html(self, html: str, product_url: str, product_id: str) -> Optional[ProductRecord]:
         """Fallback HTML parsing for Target."""
         try:
-            # Try JSON-LD
-            json_ld = self.parse_json_ld(soup)
+            # Try JSON-LD (scanned from the raw page - no DOM needed)
+            json_ld = self.parse_json_ld(html)
             if json_ld and json_ld.get('@type') == 'Product':
-                return {
-                    'product_id': product_id or json_ld.get('sku'),
-                    'retailer': self.retailer_name,
-                    'product_url': product_url,
-                    'title': json_ld.get('name'),
-                    'brand': json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
-                    'price_current': self.clean_price(str(json_ld.get('offers', {}).get('price'))),
-                    'image_urls': [json_ld.get('image')] if json_ld.get('image') else [],
-                    'description': json_ld.get('description'),
-                    'ratings_average': json_ld.get('aggregateRating', {}).get('ratingValue'),
-                    'ratings_count': json_ld.get('aggregateRating', {}).get('reviewCount'),
-                    'availability': 'in_stock' if 'InStock' in json_ld.get('offers', {}).get('availability', '') else 'out_of_stock',
-                    'currency': 'USD',
-                    'status': 'success'
-                }
+                return ProductRecord(
+                    product_id=product_id or json_ld.get('sku'),
+                    retailer=self.retailer_name,
+                    product_url=product_url,
+                    title=json_ld.get('name'),
+                    brand=json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
+                    price_current=self.clean_price(str(json_ld.get('offers', {}).get('price'))),
+                    image_urls=[json_ld.get('image')] if json_ld.get('image') else [],
+                    description=json_ld.get('description'),
+                    ratings_average=json_ld.get('aggregateRating', {}).get('ratingValue'),
+                    ratings_count=json_ld.get('aggregateRating', {}).get('reviewCount'),
+                    availability='in_stock' if 'InStock' in json_ld.get('offers', {}).get('availability', '') else 'out_of_stock',
+                    currency='USD',
+                    status='success'
+                )
             
             # Basic HTML extraction
-            title = soup.find('h1')
-            return {
-                'product_id': product_id,
-                'retailer': self.retailer_name,
-                'product_url': product_url,
-                'title': title.get_text(strip=True) if title else None,
-                'status': 'partial_data'
-            }
+            doc = self.parse_document(html)
+            
+            return ProductRecord(
+                product_id=product_id,
+                retailer=self.retailer_name,
+                product_url=product_url,
+                title=doc.find_text('h1'),
+                status='partial_data'
+            )
             
         except Exception as e:
             print(f"  Error parsing HTML: {e}")
@@ -6,14 +6,15 @@ from typing import List, Dict, Optional, Any
 from bs4 import BeautifulSoup
 import json
 import re
+from models import ProductRecord
 from .base import BaseScraper
 
 
 class TJMaxxScraper(BaseScraper):
     """TJMaxx.com scraper - category pagination approach."""
     
-    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager):
-        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager)
+    def __init__(self, config, database, browser_manager, rate_limiter, proxy_manager, parse_executor=None):
+        super().__init__(config, database, browser_manager, rate_limiter, proxy_manager, parse_executor)
         self.retailer_name = 'tjmaxx'
         self.base_url = 'https://www.tjmaxx.com'
     
@@ -134,14 +135,19 @@ class TJMaxxScraper(BaseScraper):
         return None
     
     async def scrape_product(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
-        """Scrape TJ Maxx product page."""
+        """Scrape TJ Maxx product page (over HTTP first when hybrid fetch is on)."""
+        return await self.scrape_hybrid(product_url, product_id, self._scrape_in_browser)
+    
+    async def _scrape_in_browser(self, product_url: str, product_id: str = None) -> Optional[Dict[str, Any]]:
+        """Scrape the product page in the browser."""
         try:
             context = await self.browser_manager.create_context(self.retailer_name)
             page = await self.browser_manager.new_page(context)
             
             await self.rate_limiter.wait(self.retailer_name)
             
-            response = await page.goto(product_url, wait_until='domcontentloaded', timeout=30000)
+            waiter = self.readiness.watch(page, self.retailer_name)
+            response = await self.goto(page, product_url)
             
             if not response or response.status in [403, 429]:
                 self.proxy_manager.record_request(success=False, is_block=True)
@@ -153,14 +159,30 @@ class TJMaxxScraper(BaseScraper):
                 await self.browser_manager.close_context(context)
                 return {'status': 'not_found'}
             
-            await page.wait_for_timeout(1000)
+            await waiter.wait()
             
-            html = await page.content()
-            await self.browser_manager.close_context(context)
+            # JSON-LD straight from the live DOM (one round trip); full page only if there is none
+            extracted = await self.extract_in_page(page)
+            product = self._product_from_json_ld(extracted['json_ld'], product_url, product_id) if extracted else None
+            if product:
+                self.cache_payload(product_id, product_url, 'json_ld', product_url, json.dumps(extracted['json_ld']))
+                await self.keep_session(context, page)
+                await self.browser_manager.close_context(context)
+                self.proxy_manager.record_request(success=True, is_block=False)
+                return product
             
-            soup = BeautifulSoup(html, 'html.parser')
+            html = await self.page_content(page, fallback=extracted is not None)
+            challenged = self.clearance.is_challenge(self.retailer_name, response.status, response.headers, html)
+            if challenged:
+                self.browser_manager.discard_session(context)
+            else:
+                await self.keep_session(context, page)
+            await self.browser_manager.close_context(context)
+            self.record_page(product_url, response.status, html)
+            if not challenged:
+                self.cache_payload(product_id, product_url, 'page', product_url, html)
             
-            product = self._parse_html(soup, product_url, product_id)
+            product = await self.parse_page(html, product_url, product_id)
             if product:
                 self.proxy_manager.record_request(success=True, is_block=False)
             
@@ -170,63 +192,68 @@ class TJMaxxScraper(BaseScraper):
             print(f"  Error scraping {product_url}: {e}")
             return None
     
-    def _parse_html(self, soup: BeautifulSoup, product_url: str, product_id: str) -> Optional[Dict[str, Any]]:
+    def _product_from_json_ld(self, json_ld: Optional[Dict], product_url: str, product_id: str) -> Optional[ProductRecord]:
+        """ProductRecord from a JSON-LD Product block (parsed from the page HTML or read from the live DOM)."""
+        if not json_ld or json_ld.get('@type') != 'Product':
+            return None
+        
+        offers = json_ld.get('offers', {})
+        return ProductRecord(
+            product_id=product_id or json_ld.get('sku'),
+            retailer=self.retailer_name,
+            product_url=product_url,
+            title=json_ld.get('name'),
+            brand=json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
+            price_current=self.clean_price(str(offers.get('price'))),
+            currency='USD',
+            availability='in_stock' if 'InStock' in offers.get('availability', '') else 'out_of_stock',
+            description=json_ld.get('description'),
+            image_urls=[json_ld.get('image')] if json_ld.get('image') else [],
+            category=json_ld.get('category'),
+            status='success'
+        )
+    
+    def _parse_html(self, html: str, product_url: str, product_id: str) -> Optional[ProductRecord]:
         """Parse TJ Maxx product page."""
         try:
-            # Try JSON-LD
-            json_ld = self.parse_json_ld(soup)
-            if json_ld and json_ld.get('@type') == 'Product':
-                offers = json_ld.get('offers', {})
-                return {
-                    'product_id': product_id or json_ld.get('sku'),
-                    'retailer': self.retailer_name,
-                    'product_url': product_url,
-                    'title': json_ld.get('name'),
-                    'brand': json_ld.get('brand', {}).get('name') if isinstance(json_ld.get('brand'), dict) else json_ld.get('brand'),
-                    'price_current': self.clean_price(str(offers.get('price'))),
-                    'currency': 'USD',
-                    'availability': 'in_stock' if 'InStock' in offers.get('availability', '') else 'out_of_stock',
-                    'description': json_ld.get('description'),
-                    'image_urls': [json_ld.get('image')] if json_ld.get('image') else [],
-                    'category': json_ld.get('category'),
-                    'status': 'success'
-                }
+            # Try JSON-LD (scanned from the raw page - no DOM needed)
+            json_ld = self.parse_json_ld(html)
+            product = self._product_from_json_ld(json_ld, product_url, product_id)
+            if product:
+                return product
             
             # Fallback: HTML parsing
-            title_tag = soup.find('h1', {'class': re.compile('product-title|product-name', re.I)}) or soup.find('h1')
-            title = title_tag.get_text(strip=True) if title_tag else None
+            doc = self.parse_document(html)
             
-            price_tag = soup.find('span', {'class': re.compile('price|product-price', re.I)})
-            price_text = price_tag.get_text(strip=True) if price_tag else None
+            title = doc.find_text('h1', {'class': re.compile('product-title|product-name', re.I)}) or doc.find_text('h1')
             
-            brand_tag = soup.find('span', {'class': re.compile('brand', re.I)})
-            brand = brand_tag.get_text(strip=True) if brand_tag else None
+            price_text = doc.find_text('span', {'class': re.compile('price|product-price', re.I)})
             
-            image_urls = self.extract_images(soup, [
+            brand = doc.find_text('span', {'class': re.compile('brand', re.I)})
+            
+            image_urls = self.extract_images(doc, [
                 'img.product-image',
                 'div.product-images img',
                 'img[itemprop="image"]'
             ])
             
-            desc_tag = soup.find('div', {'class': re.compile('description', re.I)})
-            description = desc_tag.get_text(strip=True) if desc_tag else None
-            
-            breadcrumbs = soup.select('nav.breadcrumb a, ol.breadcrumb a')
-            category = ' > '.join([b.get_text(strip=True) for b in breadcrumbs])
-            
-            return {
-                'product_id': product_id,
-                'retailer': self.retailer_name,
-                'product_url': product_url,
-                'title': title,
-                'brand': brand,
-                'category': category,
-                'price_current': self.clean_price(price_text) if price_text else None,
-                'currency': 'USD',
-                'description': description,
-                'image_urls': image_urls,
-                'status': 'success' if title else 'partial_data'
-            }
+            description = doc.find_text('div', {'class': re.compile('description', re.I)})
+            
+            category = ' > '.join(doc.select_texts('nav.breadcrumb a, ol.breadcrumb a'))
+            
+            return ProductRecord(
+                product_id=product_id,
+                retailer=self.retailer_name,
+                product_url=product_url,
+                title=title,
+                brand=brand,
+                category=category,
+                price_current=self.clean_price(price_text) if price_text else None,
+                currency='USD',
+                description=description,
+                image_urls=image_urls,
+                status='success' if title else 'partial_data'
+            )
             
         except Exception as e:
             print(f"  Error parsing HTML: {e}")
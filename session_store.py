@@ -0,0 +1,198 @@
+"""
+Persistent browser sessions (Playwright storage_state) per retailer and proxy identity.
+
+A fresh browser context has no cookies, so every Costco / TJ Maxx page load repeats
+the first-visit bot checks and consent flows. The store keeps the storage_state
+(cookies + localStorage) and User-Agent of contexts that got a product page, and
+loads one into each new context for the same retailer and proxy identity:
+
+  <dir>/<retailer>/<identity>/<slot>.json
+      {'created_at', 'saved_at', 'uses', 'user_agent', 'storage_state'}
+
+  - identity: hash of the proxy URL ('direct' without a proxy) - cookies earned on
+    one exit are not offered on another
+  - rotation: up to sessions_per_identity slots, handed out least recently used;
+    a slot is retired after max_uses pages or max_age_seconds, or as soon as a
+    page loaded with it gets a challenge
+  - the HTTP path (clearance_broker.py) seeds its clearance from the same slots
+
+Settings: CONFIG['session_store'].
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+class Session:
+    """One stored session slot, as loaded into a context."""
+    
+    def __init__(self, path: str, data: Dict):
+        self.path = path
+        self.created_at = data.get('created_at', time.time())
+        self.saved_at = data.get('saved_at', self.created_at)  # When storage_state (the cookies) was last written
+        self.uses = data.get('uses', 0)
+        self.user_agent = data.get('user_agent')
+        self.storage_state = data.get('storage_state') or {}
+    
+    def cookies_for(self, url: str) -> Dict[str, str]:
+        """Cookies from this session that a browser would send to url."""
+        host = urlsplit(url).hostname or ''
+        cookies = {}
+        for cookie in self.storage_state.get('cookies', []):
+            domain = cookie.get('domain', '').lstrip('.')
+            if domain and (host == domain or host.endswith('.' + domain)):
+                cookies[cookie['name']] = cookie['value']
+        return cookies
+
+
+class SessionStore:
+    """storage_state files per retailer and proxy identity, plus cold vs. warm page stats."""
+    
+    def __init__(self, config: Dict):
+        settings = config.get('session_store') or {}
+        self.dir = settings.get('dir')
+        self.retailers = settings.get('retailers') or []
+        self.max_age = settings.get('max_age_seconds', 21600)
+        self.max_uses = settings.get('max_uses', 500)
+        self.slots = settings.get('sessions_per_identity', 4)
+        self._last_used: Dict[str, float] = {}
+        
+        self.stats = {
+            'cold_pages': 0, 'cold_seconds': 0.0,  # Contexts started with empty storage
+            'warm_pages': 0, 'warm_seconds': 0.0,  # Contexts started from a stored session
+            'saved': 0, 'retired': 0, 'expired': 0, 'errors': 0,
+        }
+    
+    def enabled_for(self, retailer: Optional[str]) -> bool:
+        return bool(self.dir) and retailer in self.retailers
+    
+    @staticmethod
+    def identity(proxy_url: Optional[str]) -> str:
+        """Directory name for a proxy exit (the URL is hashed - it carries credentials)."""
+        if not proxy_url:
+            return 'direct'
+        return hashlib.sha1(proxy_url.encode()).hexdigest()[:12]
+    
+    def _slot_dir(self, retailer: str, proxy_url: Optional[str]) -> str:
+        return os.path.join(self.dir, retailer, self.identity(proxy_url))
+    
+    def _live_slots(self, slot_dir: str) -> List[Session]:
+        """Sessions in a slot directory, deleting the expired and used-up ones."""
+        sessions = []
+        if not os.path.isdir(slot_dir):
+            return sessions
+        for name in os.listdir(slot_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(slot_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    session = Session(path, json.load(f))
+            except (OSError, ValueError):
+                self.stats['errors'] += 1
+                continue
+            if time.time() - session.created_at > self.max_age or session.uses >= self.max_uses:
+                self._remove(path)
+                self.stats['expired'] += 1
+                continue
+            sessions.append(session)
+        return sessions
+    
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self._last_used.pop(path, None)
+    
+    def _load(self, retailer: str, proxy_url: Optional[str]) -> Optional[Session]:
+        sessions = self._live_slots(self._slot_dir(retailer, proxy_url))
+        if not sessions:
+            return None
+        session = min(sessions, key=lambda s: self._last_used.get(s.path, 0))
+        self._last_used[session.path] = time.time()
+        return session
+    
+    async def load(self, retailer: str, proxy_url: Optional[str]) -> Optional[Session]:
+        """Least recently used live session for this retailer and proxy exit (None = start cold)."""
+        if not self.enabled_for(retailer):
+            return None
+        return await asyncio.to_thread(self._load, retailer, proxy_url)
+    
+    def _save(self, retailer: str, proxy_url: Optional[str], session: Optional[Session],
+              storage_state: Dict, user_agent: str):
+        slot_dir = self._slot_dir(retailer, proxy_url)
+        os.makedirs(slot_dir, exist_ok=True)
+        
+        if session and os.path.exists(session.path):
+            path, created_at, uses = session.path, session.created_at, session.uses + 1
+        else:
+            # New session: take a free slot, or replace the oldest one
+            live = self._live_slots(slot_dir)
+            if len(live) >= self.slots:
+                self._remove(min(live, key=lambda s: s.created_at).path)
+            path, created_at, uses = os.path.join(slot_dir, f'{uuid.uuid4().hex[:12]}.json'), time.time(), 1
+        
+        data = {'created_at': created_at, 'saved_at': time.time(), 'uses': uses,
+                'user_agent': user_agent, 'storage_state': storage_state}
+        tmp_path = f'{path}.{uuid.uuid4().hex[:6]}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    async def save(self, retailer: str, proxy_url: Optional[str], session: Optional[Session],
+                   storage_state: Dict, user_agent: str):
+        """Write back a context's storage_state (into its own slot if it was loaded from one)."""
+        try:
+            await asyncio.to_thread(self._save, retailer, proxy_url, session, storage_state, user_agent)
+            self.stats['saved'] += 1
+        except OSError as e:
+            print(f"  ⚠️  Could not save {retailer} session: {e}")
+            self.stats['errors'] += 1
+    
+    def retire(self, session: Session):
+        """Drop a session whose page got a challenge anyway."""
+        if os.path.exists(session.path):
+            self._remove(session.path)
+            self.stats['retired'] += 1
+    
+    def latest(self, retailer: str, proxy_url: Optional[str]) -> Optional[Session]:
+        """Most recently saved live session (used to seed the HTTP path's clearance)."""
+        if not self.enabled_for(retailer):
+            return None
+        sessions = self._live_slots(self._slot_dir(retailer, proxy_url))
+        return max(sessions, key=lambda s: os.path.getmtime(s.path)) if sessions else None
+    
+    def record_page(self, warm: bool, seconds: float):
+        """Lifetime of a one-page context, by whether it started from a stored session."""
+        kind = 'warm' if warm else 'cold'
+        self.stats[f'{kind}_pages'] += 1
+        self.stats[f'{kind}_seconds'] += seconds
+    
+    def get_stats(self) -> Dict:
+        stats = self.stats
+        avg_ms = lambda kind: round(stats[f'{kind}_seconds'] / stats[f'{kind}_pages'] * 1000) if stats[f'{kind}_pages'] else 0
+        return {
+            'cold_pages': stats['cold_pages'],
+            'warm_pages': stats['warm_pages'],
+            'cold_avg_ms': avg_ms('cold'),
+            'warm_avg_ms': avg_ms('warm'),
+            'saved': stats['saved'],
+            'retired': stats['retired'],
+            'expired': stats['expired'],
+            'errors': stats['errors'],
+        }
+    
+    def print_stats(self):
+        stats = self.get_stats()
+        if not stats['cold_pages'] + stats['warm_pages']:
+            return
+        print(f"  Browser sessions: cold {stats['cold_pages']:,} pages (avg {stats['cold_avg_ms']}ms) | "
+              f"warm {stats['warm_pages']:,} pages (avg {stats['warm_avg_ms']}ms) | "
+              f"{stats['saved']:,} saved, {stats['retired']:,} retired, {stats['expired']:,} expired")
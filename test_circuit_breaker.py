@@ -0,0 +1,100 @@
+"""Circuit breaker state machine (circuit_breaker.py)."""
+
+import asyncio
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, endpoint_key
+
+
+def make_breaker(**settings):
+    return CircuitBreaker('test', dict({'failure_threshold': 3, 'open_seconds': 0.01, 'max_open_seconds': 0.04}, **settings))
+
+
+def open_breaker(breaker):
+    generation = asyncio.run(breaker.acquire())
+    for _ in range(breaker.failure_threshold):
+        breaker.record(generation, False)
+    assert breaker.state == OPEN
+    return generation
+
+
+def test_consecutive_failures_open_and_success_resets():
+    breaker = make_breaker()
+    generation = asyncio.run(breaker.acquire())
+    breaker.record(generation, False)
+    breaker.record(generation, False)
+    breaker.record(generation, True)
+    breaker.record(generation, False)
+    assert breaker.state == CLOSED
+    open_breaker(breaker)
+    assert breaker.stats['opens'] == 1
+
+
+def test_probe_success_closes():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    probe = asyncio.run(breaker.acquire())  # Waits out open_seconds
+    assert breaker.state == HALF_OPEN
+    breaker.record(probe, True)
+    assert breaker.state == CLOSED
+    assert breaker.cooldown == breaker.open_seconds
+
+
+def test_probe_failure_reopens_for_longer():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    probe = asyncio.run(breaker.acquire())
+    breaker.record(probe, False)
+    assert breaker.state == OPEN
+    assert breaker.cooldown == 0.02
+    assert breaker.stats['failed_probes'] == 1
+
+
+def test_stale_success_does_not_close_half_open_breaker():
+    breaker = make_breaker()
+    in_flight = open_breaker(breaker)  # A request sent before the breaker opened
+    probe = asyncio.run(breaker.acquire())
+    breaker.record(in_flight, True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.stats['stale_outcomes'] == 1
+    breaker.record(probe, True)
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_probe_lets_another_through():
+    breaker = make_breaker()
+    stale = open_breaker(breaker)
+    probe = asyncio.run(breaker.acquire())
+    breaker.release(stale)  # Not the probe: ignored
+    assert breaker.state == HALF_OPEN
+    breaker.release(probe)
+    assert breaker.state == OPEN
+    assert asyncio.run(breaker.acquire()) > probe
+    assert breaker.state == HALF_OPEN
+
+
+def test_waiters_resume_when_probe_succeeds():
+    async def scenario():
+        breaker = make_breaker(open_seconds=0.05)
+        generation = await breaker.acquire()
+        for _ in range(3):
+            breaker.record(generation, False)
+        probe = await breaker.acquire()
+        waiter = asyncio.ensure_future(breaker.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        breaker.record(probe, True)
+        return await asyncio.wait_for(waiter, 1)
+    
+    assert asyncio.run(scenario()) > 0
+
+
+def test_disabled_breakers_hand_out_nothing():
+    breakers = CircuitBreakers({'circuit_breaker': {'enabled': False}})
+    assert asyncio.run(breakers.acquire('https://redsky.target.com/v1/pdp?tcin=1')) == (None, 0)
+
+
+def test_endpoint_key():
+    assert endpoint_key('https://redsky.target.com/redsky_aggregations/v1/web/pdp_client_v1?tcin=1') == \
+        ('redsky.target.com', '/redsky_aggregations/v1/web/pdp_client_v1')
+    assert endpoint_key('https://www.target.com/p/some-product/-/A-123') == ('www.target.com', '/p')
+    assert endpoint_key('https://www.costco.com/widget.product.100.html') == ('www.costco.com', '/')
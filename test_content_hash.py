@@ -0,0 +1,111 @@
+"""Change-only product writes: content hash, fulfillment columns, history rows (database.py, product_writer.py)."""
+
+import asyncio
+
+from database import Database
+from models import ProductRecord
+from product_writer import ProductWriter
+
+LATER = '2026-10-20T09:00:00'  # A re-scrape's scraped_at
+
+
+def product(product_id='1', **fields):
+    values = dict(title='Lamp', description='A lamp', price_current=10.0, availability='in_stock',
+                  shipping_cost=0.0, shipping_estimate='Mon, Oct 20', scraped_at='2026-10-19T08:00:00', scrape_run_id=1)
+    values.update(fields)
+    return ProductRecord(product_id, 'target', f'https://www.target.com/p/-/A-{product_id}', **values)
+
+
+def content_hash(record):
+    return Database._content_hash(Database._product_row(record))
+
+
+def stored(database, product_id='1'):
+    with database.get_connection() as conn:
+        row = conn.execute("SELECT * FROM products WHERE product_id = ?", (product_id,)).fetchone()
+        observations = conn.execute("SELECT COUNT(*) FROM product_observations WHERE product_id = ?", (product_id,)).fetchone()[0]
+    return dict(row), observations
+
+
+def test_hash_ignores_scrape_time_and_fulfillment_columns():
+    base = content_hash(product())
+    assert content_hash(product(scraped_at=LATER, scrape_run_id=2)) == base
+    for column, value in (('shipping_estimate', 'Tue, Oct 21'), ('shipping_cost', 5.99), ('availability', 'out_of_stock')):
+        assert content_hash(product(**{column: value})) == base, column
+    assert content_hash(product(price_current=12.0)) != base
+    assert content_hash(product(description='A brighter lamp')) != base
+
+
+def test_unchanged_rescrape_keeps_row_and_adds_no_history(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.insert_product(product())
+    database.insert_product(product(scraped_at=LATER, scrape_run_id=2))
+    
+    row, observations = stored(database)
+    assert (row['scraped_at'], row['scrape_run_id'], observations) == ('2026-10-19T08:00:00', 1, 1)
+    assert database.write_stats['products_unchanged'] == 1
+    assert database.write_stats['content_bytes_skipped'] == database.write_stats['content_bytes_written']
+
+
+def test_fulfillment_change_updates_in_place(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.insert_product(product())
+    database.insert_product(product(shipping_estimate='Tue, Oct 21', availability='out_of_stock', scraped_at=LATER, scrape_run_id=2))
+    
+    row, observations = stored(database)
+    assert (row['shipping_estimate'], row['availability'], row['scrape_run_id']) == ('Tue, Oct 21', 'out_of_stock', 1)
+    assert observations == 2
+    assert database.write_stats['fulfillment_updates'] == 1
+
+
+def test_price_change_rewrites_row_and_counts_a_change(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.insert_product(product())
+    database.insert_product(product(price_current=12.0, scraped_at=LATER, scrape_run_id=2))
+    
+    row, observations = stored(database)
+    assert (row['price_current'], row['scrape_run_id'], observations) == (12.0, 2, 2)
+    with database.get_connection() as conn:
+        stats = conn.execute("SELECT observations, changes, price_changes FROM product_change_stats").fetchone()
+    assert tuple(stats) == (2, 1, 1)
+
+
+def test_batch_with_repeated_product_matches_one_by_one(tmp_path):
+    scrapes = [product('1'), product('2'), product('1', price_current=12.0), product('1', price_current=12.0, shipping_cost=5.99)]
+    batched = Database(str(tmp_path / 'batched.db'))
+    batched.insert_products(scrapes)
+    single = Database(str(tmp_path / 'single.db'))
+    for scrape in scrapes:
+        single.insert_product(scrape)
+    
+    for product_id in ('1', '2'):
+        assert stored(batched, product_id) == stored(single, product_id)
+    assert batched.write_stats == single.write_stats
+
+
+def test_fulfillment_refresh_leaves_availability_and_hash(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.insert_product(product())
+    before, _ = stored(database)
+    changed = database.update_fulfillment([('1', {'shipping_cost': 5.99, 'shipping_estimate': 'Tue, Oct 21',
+                                                  'availability': 'out_of_stock'})], scrape_run_id=2)
+    
+    row, observations = stored(database)
+    assert changed == 1 and observations == 2
+    assert (row['shipping_cost'], row['availability'], row['content_hash']) == (5.99, 'in_stock', before['content_hash'])
+
+
+def test_writer_flushes_in_batches(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    writer = ProductWriter(database, batch_size=2)
+    
+    async def scrape():
+        for product_id in '123':
+            await writer.add(product(product_id))
+        pending = len(writer)
+        await writer.flush()
+        return pending
+    
+    assert asyncio.run(scrape()) == 1
+    assert writer.stats['batches'] == 2 and writer.stats['products'] == 3
+    assert all(stored(database, product_id)[0] for product_id in '123')
@@ -0,0 +1,54 @@
+"""Lease ranges in the SQLite coordinator backend (coordinator.py)."""
+
+from coordinator import SQLiteLeaseBackend
+
+
+def make_backend(tmp_path, total=2500, chunk=1000):
+    backend = SQLiteLeaseBackend(str(tmp_path / 'leases.db'))
+    backend.register_job('job', total, chunk)
+    return backend
+
+
+def test_register_splits_manifest_into_ranges_once(tmp_path):
+    backend = make_backend(tmp_path)
+    assert backend.register_job('job', 2500, 1000) == 3  # Re-registering doesn't add ranges
+    leases = [backend.acquire('job', f'w{i}', 60) for i in range(3)]
+    assert [(lease['range_start'], lease['range_end']) for lease in leases] == [(0, 1000), (1000, 2000), (2000, 2500)]
+
+
+def test_leased_range_is_not_handed_out_twice(tmp_path):
+    backend = make_backend(tmp_path, total=1000)
+    assert backend.acquire('job', 'w1', 60) is not None
+    assert backend.acquire('job', 'w2', 60) is None
+    assert backend.get_progress('job') == {'total': 1, 'pending': 0, 'leased': 1, 'expired': 0, 'done': 0}
+
+
+def test_expired_lease_goes_to_another_worker(tmp_path):
+    backend = make_backend(tmp_path, total=1000)
+    stale = backend.acquire('job', 'w1', -1)  # Already past its expiry, as if w1 died
+    assert backend.get_progress('job')['expired'] == 1
+    
+    lease = backend.acquire('job', 'w2', 60)
+    assert lease['range_start'] == stale['range_start']
+    assert lease['attempts'] == 2
+    # The dead worker's token no longer renews or releases the range
+    assert not backend.renew(stale, 60)
+    assert not backend.release(stale)
+    assert backend.renew(lease, 60)
+
+
+def test_release_returns_range_to_pending(tmp_path):
+    backend = make_backend(tmp_path, total=1000)
+    lease = backend.acquire('job', 'w1', 60)
+    assert backend.release(lease)
+    assert backend.get_progress('job')['pending'] == 1
+    assert backend.acquire('job', 'w2', 60)['range_start'] == 0
+
+
+def test_complete_is_final(tmp_path):
+    backend = make_backend(tmp_path, total=1000)
+    lease = backend.acquire('job', 'w1', 60)
+    assert backend.complete(lease)
+    assert not backend.complete(lease)
+    assert backend.acquire('job', 'w2', 60) is None
+    assert backend.get_progress('job')['done'] == 1
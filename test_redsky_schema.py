@@ -0,0 +1,51 @@
+"""Typed redsky projection vs. a full JSON decode (scrapers/redsky_schema.py)."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from config import CONFIG
+from scrapers import TargetScraper, redsky_schema
+
+FIXTURES_DIR = Path(__file__).parent / 'benchmarks' / 'fixtures'
+CASES = [('simple', '87654321'), ('variants', '12345678')]
+
+pytestmark = pytest.mark.skipif(not redsky_schema.MSGSPEC_AVAILABLE, reason='typed projection needs msgspec')
+
+
+def parse(name: str, tcin: str, decode_pdp, decode_fulfillment) -> dict:
+    """Decode + merge as TargetScraper._fetch_product_api, then _parse_api_response."""
+    target = TargetScraper(CONFIG, None, None, None, None)
+    data = decode_pdp((FIXTURES_DIR / f'target_pdp_{name}.json').read_bytes())
+    fulfillment = decode_fulfillment((FIXTURES_DIR / f'target_fulfillment_{name}.json').read_bytes())
+    data['data']['product']['fulfillment_data'] = fulfillment['data']['product']
+    product = target._parse_api_response(data, f'https://www.target.com/p/-/A-{tcin}', tcin).to_dict()
+    product.pop('scraped_at')
+    return product
+
+
+@pytest.mark.parametrize('name,tcin', CASES)
+def test_projection_parses_like_full_decode(name, tcin):
+    projected = parse(name, tcin, redsky_schema.decode_pdp, redsky_schema.decode_fulfillment)
+    full = parse(name, tcin, json.loads, json.loads)
+    assert projected == full
+    assert projected['title'] and projected['price_current'] is not None
+
+
+@pytest.mark.parametrize('name,tcin', CASES)
+def test_price_projection_matches_full_price(name, tcin):
+    raw = (FIXTURES_DIR / f'target_pdp_{name}.json').read_bytes()
+    projected = redsky_schema.decode_pdp_price(raw)['data']['product']['price']
+    full = json.loads(raw)['data']['product']['price']
+    assert projected == {key: value for key, value in full.items() if key in projected}
+    assert projected
+
+
+def test_schema_drift_falls_back_to_full_decode():
+    payload = json.loads((FIXTURES_DIR / 'target_pdp_simple.json').read_bytes())
+    payload['data']['product']['item']['product_description'] = 'now a string'
+    fallbacks = redsky_schema.DECODE_STATS['fallback']
+    decoded = redsky_schema.decode_pdp(json.dumps(payload).encode())
+    assert redsky_schema.DECODE_STATS['fallback'] == fallbacks + 1
+    assert decoded == payload
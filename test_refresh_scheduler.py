@@ -0,0 +1,86 @@
+"""Change-rate estimate and refresh scheduling math (refresh_scheduler.py)."""
+
+import csv
+import math
+import time
+
+import pytest
+
+from database import Database
+from models import ProductRecord
+from refresh_scheduler import SECONDS_PER_DAY, RefreshScheduler, change_probability, change_rate, next_due, observe
+
+SETTINGS = {'prior_changes': 1.0, 'prior_days': 14.0, 'due_probability': 0.5,
+            'min_interval_hours': 12, 'max_interval_days': 30}
+
+
+def product(price, availability='in_stock', product_id='1'):
+    return ProductRecord(product_id, 'target', f'https://www.target.com/p/-/A-{product_id}',
+                         price_current=price, availability=availability)
+
+
+def as_row(values):
+    """observe() output as the product_change_stats row it is written to."""
+    columns = ('product_id', 'retailer', 'observations', 'changes', 'price_changes', 'availability_changes',
+               'observed_days', 'last_price', 'last_availability', 'first_seen_at', 'last_scraped_at',
+               'last_changed_at', 'change_rate', 'next_due_at')
+    return dict(zip(columns, values))
+
+
+def test_change_rate_starts_at_prior_and_follows_observed_changes():
+    assert change_rate(0, 0.0, SETTINGS) == pytest.approx(1 / 14)
+    assert change_rate(9, 6.0, SETTINGS) == pytest.approx(10 / 20)
+    # Settings come from the caller
+    assert change_rate(0, 0.0, {'prior_changes': 2.0, 'prior_days': 4.0}) == 0.5
+
+
+def test_change_probability():
+    assert change_probability(0.5, 0) == 0
+    assert change_probability(0.5, -1) == 0
+    assert change_probability(math.log(2), 1) == pytest.approx(0.5)
+
+
+def test_next_due_is_where_probability_reaches_due_probability_within_bounds():
+    now = 1_000_000.0
+    rate = math.log(2) / 3  # P(changed) reaches 0.5 after 3 days
+    assert (next_due(now, rate, SETTINGS) - now) / SECONDS_PER_DAY == pytest.approx(3)
+    assert (next_due(now, 100.0, SETTINGS) - now) / SECONDS_PER_DAY == pytest.approx(0.5)  # min_interval_hours
+    assert (next_due(now, 1e-6, SETTINGS) - now) / SECONDS_PER_DAY == pytest.approx(30)  # max_interval_days
+
+
+def test_observe_counts_at_most_one_change_per_scrape():
+    start = 1_000_000.0
+    first = as_row(observe(None, product(10.0), start, SETTINGS))
+    assert (first['observations'], first['changes'], first['observed_days']) == (1, 0, 0.0)
+    
+    later = start + 2 * SECONDS_PER_DAY
+    second = as_row(observe(first, product(12.0, 'out_of_stock'), later, SETTINGS))
+    assert (second['observations'], second['changes'], second['price_changes'], second['availability_changes']) == (2, 1, 1, 1)
+    assert second['observed_days'] == pytest.approx(2)
+    assert second['last_changed_at'] == later
+    assert second['change_rate'] == pytest.approx(2 / 16)
+    
+    third = as_row(observe(second, product(12.004, 'out_of_stock'), later + SECONDS_PER_DAY, SETTINGS))
+    assert third['changes'] == 1  # Under half a cent isn't a price change
+    assert third['last_changed_at'] == later
+
+
+def test_manifest_lists_most_likely_changed_first(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'), SETTINGS)
+    now = time.time()
+    with database.get_connection() as conn:
+        for product_id, rate, age_days in (('steady', 0.01, 5), ('volatile', 1.0, 5), ('recent', 1.0, 0.1), ('stale', 0.1, 20)):
+            conn.execute("INSERT INTO products (product_id, retailer, product_url) VALUES (?, 'target', ?)",
+                         (product_id, f'https://www.target.com/p/-/A-{product_id}'))
+            conn.execute("INSERT INTO product_change_stats (product_id, retailer, last_scraped_at, change_rate, next_due_at) "
+                         "VALUES (?, 'target', ?, ?, ?)", (product_id, now - age_days * SECONDS_PER_DAY, rate, now))
+        conn.commit()
+    
+    scheduler = RefreshScheduler({'refresh': SETTINGS, 'manifests_dir': str(tmp_path / 'manifests')}, database)
+    path, summary = scheduler.build_manifest('target', budget=2, now=now)
+    
+    with open(path) as f:
+        urls = [row['url'] for row in csv.DictReader(f)]
+    assert urls == ['https://www.target.com/p/-/A-volatile', 'https://www.target.com/p/-/A-stale']
+    assert (summary['eligible'], summary['selected']) == (3, 2)  # 'recent' is inside min_interval_hours
+    assert summary['expected_changes'] > summary['expected_changes_unordered']
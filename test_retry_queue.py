@@ -0,0 +1,62 @@
+"""Retry heap, backoff and retry budget (retry_queue.py)."""
+
+from database import Database
+from retry_queue import RetryQueue
+
+
+def make_queue(tmp_path, **settings):
+    config = {'retries': 2, 'retry_queue': dict({'base_delay_seconds': 0, 'max_delay_seconds': 0,
+                                                 'budget_percent': 10, 'budget_floor': 1}, **settings)}
+    database = Database(str(tmp_path / 'scraper.db'))
+    return RetryQueue(config, database, 'target', run_id=1), database
+
+
+def product(product_id):
+    return {'product_id': product_id, 'product_url': f'https://www.target.com/p/-/A-{product_id}'}
+
+
+def dead_letters(database):
+    with database.get_connection() as conn:
+        return [tuple(row) for row in conn.execute("SELECT product_id, reason, attempts FROM dead_letters")]
+
+
+def test_failed_product_comes_back_until_out_of_attempts(tmp_path):
+    queue, database = make_queue(tmp_path, budget_floor=10)
+    queue.record_attempt(product('1'))
+    assert queue.schedule(product('1'), 'http_503', 'busy')
+    
+    retry = queue.pop_due()[0]
+    assert retry['attempt'] == 1 and retry['error_class'] == 'http_503'
+    queue.record_attempt(retry)
+    assert queue.schedule(retry, 'http_503', 'busy')
+    assert not queue.schedule(queue.pop_due()[0], 'http_503', 'busy')  # Third failure, max 2 retries
+    assert dead_letters(database) == [('1', 'max_attempts', 3)]
+    assert queue.fresh_requests == 1  # Retries don't earn budget
+
+
+def test_retry_budget_scales_with_fresh_requests(tmp_path):
+    queue, database = make_queue(tmp_path)
+    for i in range(20):
+        queue.record_attempt(product(str(i)))
+    # Floor 1 + 10% of 20 fresh requests = 3 retries
+    scheduled = [queue.schedule(product(str(i)), 'ReadTimeout', 'timeout') for i in range(5)]
+    assert scheduled == [True, True, True, False, False]
+    assert queue.budget_denied == 2
+    assert [reason for _, reason, _ in dead_letters(database)] == ['retry_budget', 'retry_budget']
+
+
+def test_heap_releases_products_in_due_order(tmp_path):
+    queue, _ = make_queue(tmp_path, budget_floor=10)
+    for product_id, delay in (('late', 60), ('soon', 0)):
+        queue.backoff_seconds = lambda attempt, delay=delay: delay
+        queue.schedule(product(product_id), 'http_429', 'slow down')
+    assert [item['product_id'] for item in queue.pop_due()] == ['soon']
+    assert len(queue) == 1
+    assert 59 < queue.seconds_until_due() <= 60
+
+
+def test_backoff_is_jittered_and_capped(tmp_path):
+    queue, _ = make_queue(tmp_path, base_delay_seconds=5, max_delay_seconds=30)
+    for attempt, full in ((1, 5), (2, 10), (3, 20), (6, 30)):
+        delays = [queue.backoff_seconds(attempt) for _ in range(50)]
+        assert all(full / 2 <= delay <= full for delay in delays)
@@ -0,0 +1,48 @@
+"""Tombstones for products that no longer exist, and what may create one (database.py, scrapers/target.py)."""
+
+import json
+import time
+from pathlib import Path
+
+from config import CONFIG
+from database import Database
+from scrapers import TargetScraper
+
+FIXTURES_DIR = Path(__file__).parent / 'benchmarks' / 'fixtures'
+
+
+def age_tombstone(database, product_id, days):
+    with database.get_connection() as conn:
+        conn.execute("UPDATE tombstones SET last_seen_at = ? WHERE product_id = ?", (time.time() - days * 86400, product_id))
+        conn.commit()
+
+
+def test_tombstone_expires_after_ttl(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.add_tombstone('target', 'fresh', 'http_404')
+    database.add_tombstone('target', 'old', 'http_404')
+    database.add_tombstone('costco', 'other', 'http_404')
+    age_tombstone(database, 'old', 8)
+    
+    assert database.get_tombstoned('target', ttl_days=7) == {'fresh'}
+    assert database.get_tombstoned('target', ttl_days=30) == {'fresh', 'old'}
+
+
+def test_not_found_again_renews_the_tombstone(tmp_path):
+    database = Database(str(tmp_path / 'scraper.db'))
+    database.add_tombstone('target', '1', 'http_404')
+    age_tombstone(database, '1', 8)
+    database.add_tombstone('target', '1', 'empty_payload')
+    
+    assert database.get_tombstoned('target', ttl_days=7) == {'1'}
+    with database.get_connection() as conn:
+        row = conn.execute("SELECT reason, hits, first_seen_at < last_seen_at FROM tombstones").fetchone()
+    assert tuple(row) == ('empty_payload', 2, 1)
+
+
+def test_payload_without_title_is_a_failure_not_a_tombstone():
+    target = TargetScraper(CONFIG, None, None, None, None)
+    data = json.loads((FIXTURES_DIR / 'target_pdp_simple.json').read_bytes())
+    del data['data']['product']['item']['product_description']['title']
+    
+    assert target._parse_api_response(data, 'https://www.target.com/p/-/A-87654321', '87654321') is None
@@ -0,0 +1,128 @@
+"""
+Per-phase timeouts for HTTP fetches and browser navigation.
+
+One flat 30s timeout wastes slots on dead connections and still cuts off pages that
+are legitimately slow. Instead:
+  - connect, write and pool timeouts are fixed (connect_seconds, write_seconds,
+    pool_seconds) - they don't depend on how heavy an endpoint's responses are
+  - the read timeout and the page navigation timeout follow each endpoint's recent
+    latency: multiplier x its p`quantile`, kept within floor_seconds..ceiling_seconds.
+    Until an endpoint has min_samples, CONFIG['timeout_seconds'] (HTTP) or the
+    caller's timeout (navigation) is used.
+A request that times out counts as a sample at its timeout, so a run of timeouts
+raises the timeout instead of tightening it. Timeouts are counted per endpoint and
+phase (connect / read / write / pool / navigation).
+
+Settings: CONFIG['timeouts'] and CONFIG['timeout_seconds'].
+"""
+
+from typing import Dict, Optional, Tuple
+
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from circuit_breaker import endpoint_key
+from hedging import RollingLatency
+
+HTTPX_TIMEOUT_PHASES = (
+    (httpx.ConnectTimeout, 'connect'),
+    (httpx.ReadTimeout, 'read'),
+    (httpx.WriteTimeout, 'write'),
+    (httpx.PoolTimeout, 'pool'),
+)
+
+
+def timeout_phase(exc: BaseException) -> Optional[str]:
+    """The phase a timeout exception happened in, or None if it isn't a timeout."""
+    for exc_type, phase in HTTPX_TIMEOUT_PHASES:
+        if isinstance(exc, exc_type):
+            return phase
+    if isinstance(exc, PlaywrightTimeoutError):
+        return 'navigation'
+    return None
+
+
+class TimeoutPolicy:
+    """Per-scraper timeouts, adapted per (host, endpoint)."""
+    
+    def __init__(self, config: Dict):
+        settings = config.get('timeouts') or {}
+        self.default_seconds = config.get('timeout_seconds', 30)
+        self.connect = settings.get('connect_seconds', 5)
+        self.write = settings.get('write_seconds', 10)
+        self.pool = settings.get('pool_seconds', 10)
+        self.min_samples = settings.get('min_samples', 200)
+        self.window = settings.get('window', 2000)
+        self.phases = {
+            'read': settings.get('read') or {},
+            'navigation': settings.get('navigation') or {},
+        }
+        self._latency: Dict[Tuple[str, str, str], RollingLatency] = {}
+        self.timeouts: Dict[Tuple[str, str], int] = {}  # (endpoint, phase) -> count
+        self.requests: Dict[str, int] = {}              # endpoint -> requests
+    
+    def _window(self, url: str, phase: str) -> RollingLatency:
+        key = endpoint_key(url) + (phase,)
+        window = self._latency.get(key)
+        if window is None:
+            window = self._latency[key] = RollingLatency(self.window)
+        return window
+    
+    def _bounded(self, window: RollingLatency, phase: str) -> float:
+        settings = self.phases[phase]
+        seconds = window.quantile(settings.get('quantile', 99) / 100) * settings.get('multiplier', 3)
+        return min(max(seconds, settings.get('floor_seconds', 5)), settings.get('ceiling_seconds', 60))
+    
+    def _adaptive(self, url: str, phase: str, default: float) -> float:
+        window = self._window(url, phase)
+        if len(window) < self.min_samples:
+            return default
+        return self._bounded(window, phase)
+    
+    def client_default(self) -> httpx.Timeout:
+        """Timeouts for a new httpx client (requests normally pass their own via for_request)."""
+        return httpx.Timeout(self.default_seconds, connect=self.connect, write=self.write, pool=self.pool)
+    
+    def for_request(self, url: str) -> httpx.Timeout:
+        return httpx.Timeout(connect=self.connect, read=self._adaptive(url, 'read', self.default_seconds),
+                             write=self.write, pool=self.pool)
+    
+    def navigation_ms(self, url: str, default_ms: int = None) -> int:
+        default = default_ms / 1000 if default_ms else self.default_seconds
+        return int(self._adaptive(url, 'navigation', default) * 1000)
+    
+    def observe(self, url: str, phase: str, seconds: float):
+        """A completed request or navigation (phase 'read' or 'navigation')."""
+        name = ''.join(endpoint_key(url))
+        self.requests[name] = self.requests.get(name, 0) + 1
+        self._window(url, phase).add(seconds)
+    
+    def record_timeout(self, url: str, phase: str, timeout_seconds: float = None):
+        """A request that timed out in `phase`; its timeout counts as a latency sample."""
+        name = ''.join(endpoint_key(url))
+        self.requests[name] = self.requests.get(name, 0) + 1
+        self.timeouts[(name, phase)] = self.timeouts.get((name, phase), 0) + 1
+        if timeout_seconds and phase in self.phases:
+            self._window(url, phase).add(timeout_seconds)
+    
+    def get_stats(self) -> Dict:
+        stats = {}
+        for (host, path, phase), window in self._latency.items():
+            if len(window) < self.min_samples:
+                continue
+            stats.setdefault(host + path, {})[f'{phase}_timeout_seconds'] = round(self._bounded(window, phase), 1)
+        for (name, phase), count in self.timeouts.items():
+            endpoint = stats.setdefault(name, {})
+            endpoint.setdefault('timeouts', {})[phase] = count
+        for name, endpoint in stats.items():
+            endpoint['requests'] = self.requests.get(name, 0)
+        return stats
+    
+    def print_stats(self):
+        for name, stats in self.get_stats().items():
+            adapted = ', '.join(f"{phase} {stats[f'{phase}_timeout_seconds']}s" for phase in self.phases
+                                if f'{phase}_timeout_seconds' in stats)
+            timeouts = stats.get('timeouts') or {}
+            counted = ', '.join(f"{count:,} {phase}" for phase, count in sorted(timeouts.items())) or 'none'
+            print(f"  Timeouts {name}: {adapted or 'defaults'} | timed out: {counted} "
+                  f"(of {stats['requests']:,} requests)")
@@ -94,6 +94,14 @@ def format_timestamp() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
+def percentile_ms(sorted_seconds: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list of durations (seconds), in ms."""
+    if not sorted_seconds:
+        return 0.0
+    rank = max(0, min(len(sorted_seconds) - 1, int(round(pct / 100 * len(sorted_seconds))) - 1))
+    return round(sorted_seconds[rank] * 1000, 1)
+
+
 def retry_with_backoff(max_attempts: int = 3):
     """Decorator for retry logic with exponential backoff."""
     return retry(